@@ -0,0 +1,134 @@
+"""Content-addressed storage for the bulky parts of an execution result.
+
+A result carries the Kroki-encoded ERD, the DDL for every model and the
+printed output. Snippets that share their models (journey chapters in
+particular) share the first two verbatim, so they are stored once under the
+hash of their contents and the cached result only keeps the hashes.
+
+Replies sent to the browser leave the ERD out the same way, as a reference
+under "blobs" the frontend loads from /api/blob/<digest>. A digest names the
+same ERD forever, so the browser keeps it and asks for it once.
+"""
+
+import hashlib
+import json
+
+from django.core.cache import cache
+
+# Blobs are shared between results with different lifetimes, so they live as
+# long as the longest of them. A result whose blob was evicted anyway is
+# treated as a cache miss.
+BLOB_TIMEOUT = 60 * 60 * 24 * 365
+
+# Below this, a reference costs about as much as the value it replaces.
+MIN_BLOB_SIZE = 256
+
+# The parts of a result a browser loads from /api/blob/<digest>.
+REFERENCED_PARTS = ("erd",)
+
+
+def _key(digest):
+    return f"blob-{digest}"
+
+
+def split_ddl(queries):
+    """Split the executor's query list into its DDL prefix and the rest.
+
+    collect_ddl entries carry only time and sql; queries the snippet ran also
+    carry their template.
+    """
+    count = 0
+    for query in queries:
+        if "template" in query:
+            break
+        count += 1
+    return queries[:count], queries[count:]
+
+
+def put(value):
+    """Store value under the hash of its JSON encoding and return the hash."""
+    encoded = json.dumps(value, sort_keys=True, separators=(",", ":"))
+    digest = hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+    cache.set(_key(digest), encoded, timeout=BLOB_TIMEOUT)
+    return digest
+
+
+def get(digest):
+    """Return the JSON encoding stored under digest, or None."""
+    return cache.get(_key(digest))
+
+
+def exists(digest):
+    """Whether a blob is stored under digest."""
+    return cache.has_key(_key(digest))
+
+
+def pack(reply):
+    """Move the large parts of a job-done reply into blobs.
+
+    Returns the reply to cache and the {part: digest} references, which are
+    also recorded on the cached reply under "blobs" for unpack() to follow.
+    """
+    result = dict(reply["result"])
+    ddl, queries = split_ddl(result.get("queries", []))
+    parts = {
+        "erd": result.get("erd"),
+        "ddl": ddl,
+        "output": result.get("output"),
+    }
+
+    refs = {}
+    for name, value in parts.items():
+        if value and len(json.dumps(value)) >= MIN_BLOB_SIZE:
+            refs[name] = put(value)
+
+    if "ddl" in refs:
+        result["queries"] = queries
+    for name in ("erd", "output"):
+        if name in refs:
+            del result[name]
+
+    return {**reply, "result": result, "blobs": refs}, refs
+
+
+def refer(reply):
+    """Return reply with its large REFERENCED_PARTS moved into blobs.
+
+    The references are recorded under "blobs", as {part: digest}. Replies
+    without a result and small parts are returned as they are.
+    """
+    result = reply.get("result") or {}
+    refs = {
+        name: put(result[name])
+        for name in REFERENCED_PARTS
+        if result.get(name) and len(json.dumps(result[name])) >= MIN_BLOB_SIZE
+    }
+    if not refs:
+        return reply
+    result = {name: value for name, value in result.items() if name not in refs}
+    return {**reply, "result": result, "blobs": refs}
+
+
+def unpack(stored):
+    """Rebuild a reply cached by pack(), or None if one of its blobs is gone.
+
+    The rebuilt reply is the one pack() was given, without the references.
+    """
+    stored = dict(stored)
+    refs = stored.pop("blobs", None)
+    if not refs:
+        return stored
+
+    found = cache.get_many([_key(digest) for digest in refs.values()])
+    if len(found) != len(refs):
+        return None
+
+    result = dict(stored["result"])
+    for name, digest in refs.items():
+        value = json.loads(found[_key(digest)])
+        if name == "ddl":
+            result["queries"] = value + result.get("queries", [])
+        else:
+            result[name] = value
+
+    return {**stored, "result": result}
@@ -28,6 +28,19 @@ JOB_NETWORK_DISABLED_EVENT = "job-network-disabled"
 JOB_TIMEOUT_EVENT = "job-timeout"
 JOB_OVERLOADED = "job-overloaded"
 
+# Opt-in executor modes a request may ask for, with the values each takes.
+# The executor gets them as environment variables of the same name.
+EXECUTION_OPTIONS = {
+    # EXPLAIN every distinct SELECT the snippet runs.
+    "explain": ("plan", "analyze"),
+    # Time run() or the bench_* functions over repeated iterations.
+    "benchmark": (True,),
+    # Profile run(), returning its stacks in the collapsed format.
+    "profile": (True,),
+    # Trace run()'s allocations to find the lines memory grows on.
+    "memory": (True,),
+}
+
 
 # Supported ORM versions (ordered by preference, latest first)
 ORM_VERSIONS = {
@@ -1,9 +1,12 @@
+from django import forms
 from django.forms import ModelForm
 
 from . import models
 
 
 class SnippetForm(ModelForm):
+    # Snippet.code is a property over the snippet's blob, not a model field.
+    code = forms.CharField(widget=forms.Textarea)
 
     class Meta:
         model = models.Snippet
@@ -13,3 +16,12 @@ class SnippetForm(ModelForm):
             "code",
             "private",
         ]
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.instance.pk:
+            self.fields["code"].initial = self.instance.code
+
+    def save(self, commit=True):
+        self.instance.code = self.cleaned_data["code"]
+        return super().save(commit=commit)
@@ -1,3 +1,4 @@
+import asyncio
 import os
 import subprocess
 import logging
@@ -7,6 +8,8 @@ from typing import Optional, Literal
 
 import httpx
 
+from dryorm import metrics
+
 logger = logging.getLogger(__name__)
 
 # Base cache directory - now contains git repo and worktrees
@@ -390,13 +393,15 @@ class RefService:
     def fetch_ref(self, ref_type: RefType, ref_id: str) -> RefInfo:
         """Generic method to fetch any ref type."""
         if ref_type == "pr":
-            return self.fetch_pr(int(ref_id))
+            fetch, ref_id = self.fetch_pr, int(ref_id)
         elif ref_type == "branch":
-            return self.fetch_branch(ref_id)
+            fetch = self.fetch_branch
         elif ref_type == "tag":
-            return self.fetch_tag(ref_id)
+            fetch = self.fetch_tag
         else:
             raise ValueError(f"Unknown ref type: {ref_type}")
+        with metrics.REF_FETCH_SECONDS.labels(ref_type).time():
+            return fetch(ref_id)
 
     def get_cached_ref(self, ref_type: RefType, ref_id: str) -> Optional[RefInfo]:
         """Generic method to get cached ref."""
@@ -442,34 +447,35 @@ class RefService:
         return None
 
     # ========== Search Methods ==========
+    # Async, so that a search waiting on GitHub does not hold up a worker.
+
+    def _pr_result(self, pr: dict) -> dict:
+        sha = pr["head"]["sha"]
+        cached_ref = self.get_cached_pr(pr["number"])
+        # Check if cached version matches current SHA
+        is_cached = cached_ref is not None and cached_ref.sha == sha[:12]
+        return {
+            "id": pr["number"],
+            "title": pr["title"],
+            "state": pr["state"],
+            "author": pr["user"]["login"],
+            "sha": sha,
+            "cached": is_cached,
+        }
 
-    def search_prs(self, query: str, limit: int = 10) -> list[dict]:
+    async def search_prs(self, query: str, limit: int = 10) -> list[dict]:
         """Search for Django PRs by number or title. Includes SHA and cache status."""
-        results = []
-
         # If query is a number, search by PR number
         if query.isdigit():
             url = f"{self.GITHUB_API_BASE}/repos/{self.DJANGO_REPO}/pulls/{query}"
             try:
-                with httpx.Client(timeout=10.0) as client:
-                    response = client.get(url, headers=self._get_headers())
+                async with httpx.AsyncClient(timeout=10.0) as client:
+                    response = await client.get(url, headers=self._get_headers())
                     if response.status_code == 200:
-                        pr = response.json()
-                        sha = pr["head"]["sha"]
-                        cached_ref = self.get_cached_pr(pr["number"])
-                        # Check if cached version matches current SHA
-                        is_cached = cached_ref is not None and cached_ref.sha == sha[:12]
-                        results = [{
-                            "id": pr["number"],
-                            "title": pr["title"],
-                            "state": pr["state"],
-                            "author": pr["user"]["login"],
-                            "sha": sha,
-                            "cached": is_cached,
-                        }]
+                        return [self._pr_result(response.json())]
             except httpx.HTTPError:
                 pass
-            return results
+            return []
 
         # Otherwise search by title using GitHub search API
         url = f"{self.GITHUB_API_BASE}/search/issues"
@@ -480,39 +486,34 @@ class RefService:
             "order": "desc",
         }
         try:
-            with httpx.Client(timeout=10.0) as client:
-                response = client.get(url, headers=self._get_headers(), params=params)
-                if response.status_code == 200:
-                    data = response.json()
-                    # For each PR, we need to get the full PR data to get the SHA
-                    for item in data.get("items", []):
-                        pr_url = f"{self.GITHUB_API_BASE}/repos/{self.DJANGO_REPO}/pulls/{item['number']}"
-                        pr_response = client.get(pr_url, headers=self._get_headers())
-                        if pr_response.status_code == 200:
-                            pr = pr_response.json()
-                            sha = pr["head"]["sha"]
-                            cached_ref = self.get_cached_pr(pr["number"])
-                            is_cached = cached_ref is not None and cached_ref.sha == sha[:12]
-                            results.append({
-                                "id": pr["number"],
-                                "title": pr["title"],
-                                "state": pr["state"],
-                                "author": pr["user"]["login"],
-                                "sha": sha,
-                                "cached": is_cached,
-                            })
+            async with httpx.AsyncClient(timeout=10.0) as client:
+                response = await client.get(url, headers=self._get_headers(), params=params)
+                if response.status_code != 200:
+                    return []
+                # Search results lack the head SHA, so fetch every PR, all at once
+                pr_responses = await asyncio.gather(*(
+                    client.get(
+                        f"{self.GITHUB_API_BASE}/repos/{self.DJANGO_REPO}/pulls/{item['number']}",
+                        headers=self._get_headers(),
+                    )
+                    for item in response.json().get("items", [])
+                ))
+                return [
+                    self._pr_result(pr_response.json())
+                    for pr_response in pr_responses
+                    if pr_response.status_code == 200
+                ]
         except httpx.HTTPError:
-            pass
-        return results
+            return []
 
-    def search_branches(self, query: str, limit: int = 10) -> list[dict]:
+    async def search_branches(self, query: str, limit: int = 10) -> list[dict]:
         """Search for Django branches by name. Includes cache status."""
         url = f"{self.GITHUB_API_BASE}/repos/{self.DJANGO_REPO}/branches"
         params = {"per_page": 100}  # Get more to filter client-side
 
         try:
-            with httpx.Client(timeout=10.0) as client:
-                response = client.get(url, headers=self._get_headers(), params=params)
+            async with httpx.AsyncClient(timeout=10.0) as client:
+                response = await client.get(url, headers=self._get_headers(), params=params)
                 if response.status_code == 200:
                     branches = response.json()
                     # Filter by query (case-insensitive)
@@ -535,14 +536,14 @@ class RefService:
         except httpx.HTTPError:
             return []
 
-    def search_tags(self, query: str, limit: int = 10) -> list[dict]:
+    async def search_tags(self, query: str, limit: int = 10) -> list[dict]:
         """Search for Django tags by name. Includes cache status."""
         url = f"{self.GITHUB_API_BASE}/repos/{self.DJANGO_REPO}/tags"
         params = {"per_page": 100}  # Get more to filter client-side
 
         try:
-            with httpx.Client(timeout=10.0) as client:
-                response = client.get(url, headers=self._get_headers(), params=params)
+            async with httpx.AsyncClient(timeout=10.0) as client:
+                response = await client.get(url, headers=self._get_headers(), params=params)
                 if response.status_code == 200:
                     tags = response.json()
                     # Filter by query (case-insensitive)
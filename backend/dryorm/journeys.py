@@ -0,0 +1,156 @@
+"""Journeys, parsed once and indexed by slug.
+
+A journey is a TOML file under data/journeys with a title, an order and a
+list of chapters. The files only change on deploy (or while editing them
+locally), so they are parsed into an index the first time they are needed and
+again only when one of them is added, removed or modified. The API responses
+are serialized along with the index, so serving them is a dictionary lookup.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import tomllib
+from dataclasses import dataclass
+from types import MappingProxyType
+
+from django.conf import settings
+
+
+def journeys_path():
+    return os.path.join(settings.BASE_DIR, "data", "journeys")
+
+
+def slugify(text):
+    """Convert text to a URL-friendly slug."""
+    # Remove or replace special characters, convert to lowercase
+    slug = re.sub(r'[^\w\s-]', '', text.lower())
+    # Replace spaces and multiple dashes with single dashes
+    slug = re.sub(r'[-\s]+', '-', slug)
+    # Strip leading/trailing dashes
+    return slug.strip('-')
+
+
+def load_journeys(path):
+    """Parse every journey under path, keyed by slug in display order."""
+    journeys_list = []
+
+    if os.path.exists(path):
+        for filename in os.listdir(path):
+            if filename.endswith('.toml'):
+                file_path = os.path.join(path, filename)
+                try:
+                    with open(file_path, 'rb') as f:
+                        journey_data = tomllib.load(f)
+
+                    slug = filename[:-5]  # Remove .toml extension
+                    journey = {
+                        'title': journey_data.get('title', slug),
+                        'slug': slug,
+                        'chapters': journey_data.get('chapters', []),
+                        'order': journey_data.get('order', 999)  # Default to high number if no order
+                    }
+
+                    # Add slugs to chapters based on their titles
+                    for chapter in journey['chapters']:
+                        chapter['slug'] = slugify(chapter['title'])
+
+                    journeys_list.append(journey)
+
+                except Exception as e:
+                    print(f"Error loading journey {filename}: {e}")
+
+    # Sort by order field and convert to dict
+    journeys_list.sort(key=lambda x: x['order'])
+    return {journey['slug']: journey for journey in journeys_list}
+
+
+def serialize(data):
+    """Return data as JSON bytes along with a strong ETag for them."""
+    payload = json.dumps(data).encode("utf-8")
+    return payload, hashlib.sha256(payload).hexdigest()
+
+
+@dataclass(frozen=True)
+class Chapter:
+    payload: bytes
+    etag: str
+
+
+@dataclass(frozen=True)
+class JourneyIndex:
+    """Every journey, plus the serialized responses the API serves from them.
+
+    Shared between requests: treat it, and everything reachable from it, as
+    read-only.
+    """
+
+    signature: tuple
+    journeys: MappingProxyType
+    payload: bytes
+    etag: str
+    chapters: MappingProxyType
+
+    def chapter(self, journey_slug, chapter_slug):
+        return self.chapters.get((journey_slug, chapter_slug))
+
+
+def build_index(path, signature):
+    journeys = load_journeys(path)
+    payload, etag = serialize(journeys)
+
+    chapters = {}
+    for journey in journeys.values():
+        for chapter in journey["chapters"]:
+            key = (journey["slug"], chapter["slug"])
+            # The first of two chapters with the same title wins, as it did
+            # when chapters were looked up by scanning the list.
+            if key not in chapters:
+                chapters[key] = Chapter(*serialize({
+                    "code": chapter.get("content", "") or chapter.get("code", ""),
+                    "title": chapter.get("title", ""),
+                    "description": chapter.get("description", ""),
+                }))
+
+    return JourneyIndex(
+        signature=signature,
+        journeys=MappingProxyType(journeys),
+        payload=payload,
+        etag=etag,
+        chapters=MappingProxyType(chapters),
+    )
+
+
+def signature(path):
+    """The name and modification time of every journey file under path."""
+    try:
+        with os.scandir(path) as entries:
+            return tuple(sorted(
+                (entry.name, entry.stat().st_mtime_ns)
+                for entry in entries
+                if entry.name.endswith(".toml")
+            ))
+    except FileNotFoundError:
+        return ()
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_index():
+    """Return the journey index, rebuilding it if a journey file changed."""
+    global _index
+
+    path = journeys_path()
+    current = signature(path)
+    index = _index
+    if index is not None and index.signature == current:
+        return index
+
+    with _index_lock:
+        if _index is None or _index.signature != current:
+            _index = build_index(path, current)
+        return _index
@@ -0,0 +1,162 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Q
+
+from dryorm import journeys
+from dryorm import models
+from dryorm import pagination
+from dryorm import templates
+
+NAME_WORDS = [
+    "aggregate", "annotate", "prefetch", "select", "related", "window",
+    "subquery", "exists", "bulk", "create", "update", "constraint", "index",
+    "json", "filter", "exclude", "union", "distinct", "values", "manager",
+]
+
+# Mirrors models.search_document, which computes the same vector in Python.
+GENERATE_SQL = f"""
+    INSERT INTO dryorm_snippet
+        (name, slug, blob_id, result, created, private, database, django_version,
+         search_vector)
+    SELECT
+        name, 'bench-' || i, digest, '', now() - i * interval '1 minute',
+        i %% 10 = 0, 'sqlite', '5.2.8',
+        setweight(to_tsvector('{models.SEARCH_CONFIG}', regexp_replace(name, '\\W+', ' ', 'g')), 'A')
+        || setweight(to_tsvector('{models.SEARCH_CONFIG}', regexp_replace(code, '\\W+', ' ', 'g')), 'B')
+    FROM (
+        SELECT
+            i,
+            initcap(words[1 + i %% cardinality(words)]) || ' '
+                || words[1 + (i / 7) %% cardinality(words)] || ' ' || i AS name,
+            codes[1 + i %% cardinality(codes)] AS code,
+            digests[1 + i %% cardinality(codes)] AS digest
+        FROM
+            generate_series(%(start)s, %(stop)s) AS i,
+            (
+                SELECT
+                    %(words)s::text[] AS words,
+                    %(codes)s::text[] AS codes,
+                    %(digests)s::text[] AS digests
+            ) AS sources
+    ) AS generated
+"""
+
+
+class Command(BaseCommand):
+    """Time the snippet browser's queries against generated tables.
+
+    Everything runs in one transaction that is rolled back at the end, so it
+    is safe to point at a database with real snippets in it, but it should
+    not be run against production: the generated rows hold locks until then.
+    """
+
+    help = "Benchmarks snippet search at several table sizes"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rows",
+            default="10000,100000,1000000",
+            help="Comma-separated table sizes to measure at",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=20,
+            help="Times to run each query at each size",
+        )
+        parser.add_argument(
+            "--terms",
+            default="prefetch,select related,annotate count,zzz",
+            help="Comma-separated search terms",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("Snippet search needs PostgreSQL")
+
+        sizes = sorted(int(rows) for rows in options["rows"].split(","))
+        terms = options["terms"].split(",")
+
+        with transaction.atomic():
+            generated = 0
+            for size in sizes:
+                self.generate(generated + 1, size)
+                generated = size
+                self.stdout.write(f"\n{size} rows")
+                for label, run in self.queries(terms, size):
+                    self.report(label, run, options["repeat"])
+            transaction.set_rollback(True)
+
+    def generate(self, start, stop):
+        codes = list(templates.EXECUTOR_TEMPLATES["django"].values())
+        for journey in journeys.get_index().journeys.values():
+            for chapter in journey["chapters"]:
+                codes.append(chapter.get("content", "") or chapter.get("code", ""))
+        digests = [models.CodeBlob.objects.store(code).digest for code in codes]
+
+        with connection.cursor() as cursor:
+            cursor.execute(GENERATE_SQL, {
+                "words": NAME_WORDS,
+                "codes": codes,
+                "digests": digests,
+                "start": start,
+                "stop": stop,
+            })
+            cursor.execute("ANALYZE dryorm_snippet")
+
+    def queries(self, terms, size):
+        """Yield (label, function) for what snippets_api runs per request."""
+        snippets = models.Snippet.objects.public()
+        per_page = 20
+
+        def offset_page(queryset, page, count=True):
+            def run():
+                if count:
+                    queryset.count()
+                list(queryset[(page - 1) * per_page : page * per_page])
+            return run
+
+        def cursor_page(queryset, depth):
+            # The cursor a client would hold after paging depth rows in.
+            row = next(iter(queryset[depth - 1 : depth]), None) if depth else None
+            token = pagination.encode_cursor(row) if row else ""
+            return lambda: pagination.paginate_after(queryset, token, per_page)
+
+        recent = snippets.recent().summaries()
+        deep = size * 9 // 10 // per_page
+        yield "list page 1", offset_page(recent, 1)
+        yield "list page 1 (all columns)", offset_page(snippets.recent(), 1)
+        yield "list page 1 (estimated count)", lambda: (
+            pagination.estimated_count(recent), list(recent[:per_page])
+        )
+        yield f"list page {deep}", offset_page(recent, deep, count=False)
+        yield "list cursor first page", cursor_page(recent, 0)
+        yield f"list cursor at page {deep}", cursor_page(recent, (deep - 1) * per_page)
+
+        for term in terms:
+            found = snippets.summaries().search(term)
+            yield f"search {term!r}", offset_page(found, 1)
+            yield f"search {term!r} cursor page 5", cursor_page(found, 4 * per_page)
+            yield f"icontains {term!r}", offset_page(
+                snippets.filter(
+                    Q(name__icontains=term) | Q(blob__code__icontains=term)
+                ).order_by("-created"),
+                1,
+            )
+
+    def report(self, label, run, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            run()
+            timings.append((time.perf_counter() - started) * 1000)
+
+        timings.sort()
+        p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+        self.stdout.write(
+            f"  {label:<40} median {statistics.median(timings):8.2f}ms"
+            f"  p95 {p95:8.2f}ms"
+        )
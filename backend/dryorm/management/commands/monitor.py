@@ -1,13 +1,13 @@
 from django.core.management.base import BaseCommand
 
-import redis
+from dryorm import redis_pool
 
 
 class Command(BaseCommand):
     help = "executes the transaction"
 
     def handle(self, *args, **options):
-        connection = redis.Redis("redis", 6379)
+        connection = redis_pool.get_pubsub_client()
         pubsub = connection.pubsub()
         pubsub.subscribe("back-channel")
 
@@ -0,0 +1,102 @@
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand
+
+from dryorm import constants
+from dryorm import databases
+from dryorm import journeys
+from dryorm import tasks
+from dryorm import templates
+
+
+class Command(BaseCommand):
+    """Run every journey chapter and template so their first visitor hits the cache.
+
+    These are the only snippets we know ahead of time, and after a deploy or a
+    cache flush they are also the ones most likely to be opened first. Each is
+    run once per database and ORM version, exactly as the frontend would send
+    it, so the result lands under the key a real request looks up.
+
+    Items that are already cached come back without a container run, so a
+    repeat pass only costs the ones that were evicted.
+    """
+
+    help = "Fills the result cache with every journey chapter and template"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--databases",
+            default=",".join(databases.DATABASES),
+            help="Comma-separated databases to warm",
+        )
+        parser.add_argument(
+            "--orm-versions",
+            default=",".join(constants.ORM_VERSIONS),
+            help="Comma-separated ORM versions to warm",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=4,
+            help="Containers to run at once. Keep it well under max_containers "
+            "so live traffic is not turned away while warming.",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Run items again even if they are cached",
+        )
+
+    def handle(self, *args, **options):
+        items = [
+            (label, code, database, orm_version)
+            for label, code in self.snippets()
+            for database in options["databases"].split(",")
+            for orm_version in options["orm_versions"].split(",")
+        ]
+        self.stdout.write(
+            f"Warming {len(items)} items with concurrency {options['concurrency']}"
+        )
+
+        events = Counter()
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=options["concurrency"]) as pool:
+            futures = {
+                pool.submit(self.warm, code, database, orm_version, options["force"]): (
+                    label,
+                    database,
+                    orm_version,
+                )
+                for label, code, database, orm_version in items
+            }
+            for future in as_completed(futures):
+                label, database, orm_version = futures[future]
+                event, elapsed = future.result()
+                events[event] += 1
+                self.stdout.write(
+                    f"{elapsed:7.2f}s  {event:<26} {database:<9} {orm_version:<14} {label}"
+                )
+
+        self.stdout.write(f"Done in {time.monotonic() - started:.2f}s")
+        for event, count in events.most_common():
+            self.stdout.write(f"  {event}: {count}")
+
+    def snippets(self):
+        for name, code in templates.EXECUTOR_TEMPLATES["django"].items():
+            yield f"template {name}", code
+
+        for journey in journeys.get_index().journeys.values():
+            for chapter in journey["chapters"]:
+                code = chapter.get("content", "") or chapter.get("code", "")
+                yield f"journey {journey['slug']}/{chapter['slug']}", code
+
+    def warm(self, code, database, orm_version, force):
+        # The frontend trims the editor contents before sending them, and the
+        # cache key is a hash of exactly what was sent.
+        started = time.monotonic()
+        result = tasks.run_django_sync(
+            code.strip(), database, ignore_cache=force, orm_version=orm_version
+        )
+        return result["event"], time.monotonic() - started
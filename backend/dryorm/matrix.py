@@ -0,0 +1,122 @@
+"""Running one snippet on several executors and comparing what they did.
+
+/execute/matrix runs a snippet on every (database, ORM version) pair asked
+for and streams each cell's reply as it arrives. Its last line is the
+summary built here: for the DDL, the queries, the output and the returned
+value, which cells agree and how the others differ from the first group.
+
+A cell turned away because every container slot is taken waits for one,
+asking again every MATRIX_RETRY_INTERVAL for up to MATRIX_SLOT_WAIT
+seconds. A cell still turned away after that is listed as skipped, apart
+from the cells that failed, so a busy server shows up as a partial
+comparison rather than a broken one.
+"""
+
+import difflib
+import json
+
+from . import blobs
+from . import constants
+
+# Cells of one matrix request run at most this many at a time, so a single
+# request cannot take every container slot from other users.
+MATRIX_CONCURRENCY = 4
+
+# How long a cell keeps asking for a container slot, and how often.
+MATRIX_SLOT_WAIT = 30
+MATRIX_RETRY_INTERVAL = 1
+
+
+def select_cells(databases=None, orm_versions=None):
+    """The (database, orm_version) pairs to run, in EXECUTORS order.
+
+    Either list may be omitted to mean every known value. Raises ValueError
+    for a database or version no executor knows; pairs that simply have no
+    executor (PostGIS on an old Django, say) are left out.
+    """
+    known_databases = {database for database, _ in constants.EXECUTORS}
+    known_versions = {orm_version for _, orm_version in constants.EXECUTORS}
+    databases = known_databases if databases is None else set(databases)
+    orm_versions = known_versions if orm_versions is None else set(orm_versions)
+
+    if unknown := sorted(databases - known_databases):
+        raise ValueError(f"Unknown database: {', '.join(unknown)}")
+    if unknown := sorted(orm_versions - known_versions):
+        raise ValueError(f"Unknown ORM version: {', '.join(unknown)}")
+
+    return [
+        (database, orm_version)
+        for database, orm_version in constants.EXECUTORS
+        if database in databases and orm_version in orm_versions
+    ]
+
+
+def label(database, orm_version):
+    return f"{database}/{orm_version}"
+
+
+def _aspects(result):
+    """The lines of each compared aspect of a job-done result."""
+    ddl, queries = blobs.split_ddl(result.get("queries") or [])
+    return {
+        "ddl": [query["sql"] for query in ddl],
+        "queries": [query["sql"] for query in queries],
+        "output": (result.get("output") or "").splitlines(),
+        "returned": json.dumps(result.get("returned"), indent=1, sort_keys=True, default=str).splitlines(),
+    }
+
+
+def _compare(lines_by_cell):
+    """Group cells with identical lines, diffing each group against the first."""
+    groups = []
+    for cell, lines in lines_by_cell.items():
+        for group in groups:
+            if group["lines"] == lines:
+                group["cells"].append(cell)
+                break
+        else:
+            groups.append({"cells": [cell], "lines": lines})
+
+    first = groups[0] if groups else None
+    return {
+        "identical": len(groups) <= 1,
+        "groups": [
+            {
+                "cells": group["cells"],
+                "diff": [] if group is first else list(difflib.unified_diff(
+                    first["lines"], group["lines"],
+                    fromfile=first["cells"][0], tofile=group["cells"][0], lineterm="",
+                )),
+            }
+            for group in groups
+        ],
+    }
+
+
+def summarize(replies):
+    """Compare the replies of a matrix run, keyed by cell label.
+
+    Only cells that ran to completion are compared. Cells that never got a
+    container slot are listed under "skipped"; the others are listed under
+    "failed" with the event they ended with.
+    """
+    done = {
+        cell: _aspects(reply.get("result") or {})
+        for cell, reply in replies.items()
+        if reply.get("event") == constants.JOB_DONE_EVENT
+    }
+    return {
+        "cells": len(replies),
+        "skipped": [
+            cell for cell, reply in replies.items() if reply.get("event") == constants.JOB_OVERLOADED
+        ],
+        "failed": {
+            cell: reply.get("event")
+            for cell, reply in replies.items()
+            if cell not in done and reply.get("event") != constants.JOB_OVERLOADED
+        },
+        **{
+            aspect: _compare({cell: aspects[aspect] for cell, aspects in done.items()})
+            for aspect in ("ddl", "queries", "output", "returned")
+        },
+    }
@@ -0,0 +1,199 @@
+"""Prometheus metrics for executions, served at /metrics.
+
+Gunicorn runs several workers, each with its own copy of these metrics. With
+PROMETHEUS_MULTIPROC_DIR set, as gunicorn.conf.py expects, every worker
+writes them to files in that directory and /metrics adds them up across
+workers. Without it, as under runserver, they are this process's own.
+
+Container slot occupancy is read from Redis when /metrics is scraped, since
+the count is shared by every backend process, and so is whether Redis
+answers at all.
+"""
+
+import os
+
+import redis
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from prometheus_client.core import GaugeMetricFamily
+
+from dryorm import constants
+
+# From a cache hit in milliseconds up to a ref build near its 120s limit.
+EXECUTION_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2, 3, 5, 8, 13, 20, 30, 60, 120)
+
+PHASE_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30, 60)
+
+REF_FETCH_BUCKETS = (0.1, 0.5, 1, 2, 5, 10, 20, 30, 60, 120, 300)
+
+# From a reply off a warm connection up to redis_pool's two second timeouts.
+REDIS_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2)
+
+EXECUTION_SECONDS = Histogram(
+    "dryorm_execution_seconds",
+    "Time from admission to cleanup of an execution, cache hits included.",
+    ["executor", "database", "event"],
+    buckets=EXECUTION_BUCKETS,
+)
+
+PHASE_SECONDS = Histogram(
+    "dryorm_execution_phase_seconds",
+    "Time an execution spent in each phase, as the backend or the executor measured it.",
+    ["executor", "database", "source", "phase"],
+    buckets=PHASE_BUCKETS,
+)
+
+EVENTS = Counter(
+    "dryorm_execution_events",
+    "Executions by the JOB_* event they ended with.",
+    ["executor", "database", "event"],
+)
+
+CACHE_LOOKUPS = Counter(
+    "dryorm_result_cache_lookups",
+    "Result cache lookups, by hit or miss. Runs that ignore the cache are not counted.",
+    ["result"],
+)
+
+QUEUED = Gauge(
+    "dryorm_blocking_queued",
+    "Blocking calls (executions, ref fetches) waiting for a thread.",
+    multiprocess_mode="livesum",
+)
+
+IN_PROGRESS = Gauge(
+    "dryorm_executions_in_progress",
+    "Executions running in the pipeline.",
+    multiprocess_mode="livesum",
+)
+
+REF_FETCH_SECONDS = Histogram(
+    "dryorm_ref_fetch_seconds",
+    "Time to fetch a ref's source and check out its worktree.",
+    ["ref_type"],
+    buckets=REF_FETCH_BUCKETS,
+)
+
+REDIS_CHECKOUT_SECONDS = Histogram(
+    "dryorm_redis_pool_checkout_seconds",
+    "Time waited to check a connection out of the Redis command pool, once per checkout.",
+    buckets=REDIS_BUCKETS,
+)
+
+REDIS_REPLY_SECONDS = Histogram(
+    "dryorm_redis_reply_seconds",
+    "Time waited for each reply on the Redis command pool.",
+    buckets=REDIS_BUCKETS,
+)
+
+REDIS_CONNECTS = Counter(
+    "dryorm_redis_connects",
+    "Connections the Redis command pool opened.",
+)
+
+REDIS_ERRORS = Counter(
+    "dryorm_redis_errors",
+    "Failed connects, and connection errors and timeouts waiting for a reply, on the Redis command pool.",
+)
+
+
+def observe_execution(executor, database, execution):
+    """Record a finished pipeline Execution."""
+    event = execution.reply.get("event", "")
+    total = sum(ms for stage, ms in execution.timings.items() if "." not in stage)
+    EXECUTION_SECONDS.labels(executor.key, database, event).observe(total / 1000)
+    EVENTS.labels(executor.key, database, event).inc()
+    for source, timings in execution.breakdown().items():
+        for phase, ms in timings.items():
+            PHASE_SECONDS.labels(executor.key, database, source, phase).observe(ms / 1000)
+
+
+class SlotCollector:
+    """Container slots in use, against each executor's max_containers."""
+
+    def describe(self):
+        # Registering calls this rather than collect(), which reads Redis.
+        yield self.limits()
+        yield self.in_use()
+
+    def limits(self):
+        return GaugeMetricFamily(
+            "dryorm_container_slots_max",
+            "Containers an executor may run at once.",
+            labels=["executor"],
+        )
+
+    def in_use(self, value=None):
+        return GaugeMetricFamily(
+            "dryorm_container_slots_in_use",
+            "Executor containers running, across every backend process.",
+            value=value,
+        )
+
+    def collect(self):
+        # Imported here: tasks and redis_pool record their metrics through
+        # this module.
+        from dryorm import redis_pool
+        from dryorm.tasks import CONTAINER_COUNT_KEY
+
+        limits = self.limits()
+        for executor in [*constants.EXECUTORS.values(), *constants.REF_EXECUTORS.values()]:
+            limits.add_metric([executor.key], executor.max_containers)
+        yield limits
+
+        try:
+            yield self.in_use(int(redis_pool.get_client().get(CONTAINER_COUNT_KEY) or 0))
+        except redis.RedisError:
+            pass
+
+
+slots = SlotCollector()
+REGISTRY.register(slots)
+
+
+class RedisCollector:
+    """Whether Redis answers a PING, checked at every scrape."""
+
+    def describe(self):
+        # Registering calls this rather than collect(), which PINGs Redis.
+        yield self.up()
+
+    def up(self, value=None):
+        return GaugeMetricFamily(
+            "dryorm_redis_up",
+            "1 if Redis answered a PING within its timeouts, else 0.",
+            value=value,
+        )
+
+    def collect(self):
+        from dryorm import redis_pool
+
+        yield self.up(int(redis_pool.healthy()))
+
+
+redis_up = RedisCollector()
+REGISTRY.register(redis_up)
+
+
+def registry():
+    """The registry a scrape is served from."""
+    if "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+        return REGISTRY
+    collected = CollectorRegistry()
+    multiprocess.MultiProcessCollector(collected)
+    collected.register(slots)
+    collected.register(redis_up)
+    return collected
+
+
+def render():
+    """Return the metrics exposition and its content type."""
+    return generate_latest(registry()), CONTENT_TYPE_LATEST
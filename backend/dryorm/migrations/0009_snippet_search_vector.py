@@ -0,0 +1,49 @@
+# Generated by Django 5.2.5 on 2026-10-19 15:14
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+from django.db.models import F, Func, TextField, Value
+
+
+def words(field):
+    return Func(
+        F(field), Value(r'\W+'), Value(' '), Value('g'),
+        function='regexp_replace',
+        output_field=TextField(),
+    )
+
+
+def populate_search_vector(apps, schema_editor):
+    """Compute the search vector of existing snippets in a single UPDATE.
+
+    Must match models.search_document, which maintains it from here on.
+    """
+    Snippet = apps.get_model('dryorm', 'Snippet')
+    Snippet.objects.update(
+        search_vector=(
+            SearchVector(words('name'), weight='A', config='english')
+            + SearchVector(words('code'), weight='B', config='english')
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dryorm', '0008_add_session_key_to_snippet'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='snippet',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(populate_search_vector, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='snippet',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='snippet_search_vector_idx'),
+        ),
+    ]
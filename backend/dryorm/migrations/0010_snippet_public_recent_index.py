@@ -0,0 +1,21 @@
+# Generated by Django 5.2.5 on 2026-10-19 15:22
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Built concurrently so a large snippet table stays writable meanwhile,
+    # which can't happen inside a transaction.
+    atomic = False
+
+    dependencies = [
+        ('dryorm', '0009_snippet_search_vector'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='snippet',
+            index=models.Index(condition=models.Q(('private', False)), fields=['-created', '-id'], name='snippet_public_recent_idx'),
+        ),
+    ]
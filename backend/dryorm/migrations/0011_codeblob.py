@@ -0,0 +1,33 @@
+# Generated by Django 5.2.5 on 2026-10-19 15:24
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dryorm', '0010_snippet_public_recent_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CodeBlob',
+            fields=[
+                ('digest', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('code', models.TextField()),
+            ],
+        ),
+        migrations.AddField(
+            model_name='snippet',
+            name='blob',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='snippets', to='dryorm.codeblob'),
+        ),
+        # Nullable until it is dropped, so that unapplying the drop can add
+        # it back before the data migration refills it.
+        migrations.AlterField(
+            model_name='snippet',
+            name='code',
+            field=models.TextField(null=True),
+        ),
+    ]
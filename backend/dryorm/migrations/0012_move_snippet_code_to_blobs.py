@@ -0,0 +1,41 @@
+# Generated by Django 5.2.5 on 2026-10-19 15:24
+
+from django.db import migrations
+
+# sha256 of the UTF-8 encoded code, as models.code_digest computes it.
+DIGEST = "encode(sha256(convert_to(code, 'UTF8')), 'hex')"
+
+
+def move_code_to_blobs(apps, schema_editor):
+    """Store each distinct code once and point every snippet at its blob.
+
+    Done in two statements rather than row by row, so it stays quick on
+    large tables.
+    """
+    schema_editor.execute(f"""
+        INSERT INTO dryorm_codeblob (digest, code)
+        SELECT DISTINCT ON (digest) digest, code
+        FROM (SELECT {DIGEST} AS digest, code FROM dryorm_snippet) AS codes
+        ON CONFLICT (digest) DO NOTHING
+    """)
+    schema_editor.execute(f"UPDATE dryorm_snippet SET blob_id = {DIGEST}")
+
+
+def move_code_to_snippets(apps, schema_editor):
+    schema_editor.execute("""
+        UPDATE dryorm_snippet
+        SET code = dryorm_codeblob.code
+        FROM dryorm_codeblob
+        WHERE dryorm_codeblob.digest = dryorm_snippet.blob_id
+    """)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dryorm', '0011_codeblob'),
+    ]
+
+    operations = [
+        migrations.RunPython(move_code_to_blobs, move_code_to_snippets),
+    ]
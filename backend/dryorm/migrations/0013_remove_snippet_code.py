@@ -0,0 +1,23 @@
+# Generated by Django 5.2.5 on 2026-10-19 15:24
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dryorm', '0012_move_snippet_code_to_blobs'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='snippet',
+            name='blob',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='snippets', to='dryorm.codeblob'),
+        ),
+        migrations.RemoveField(
+            model_name='snippet',
+            name='code',
+        ),
+    ]
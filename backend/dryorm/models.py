@@ -1,10 +1,25 @@
+import hashlib
 import random
+import re
 import string
 
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    SearchVector,
+    SearchVectorField,
+)
 from django.db import models
+from django.db.models.functions import Cast
 from django.utils.text import slugify
 from django.urls import reverse
 
+# Text search configuration for the snippet browser. Code is mostly English
+# identifiers, so stemming "prefetch_related" and "prefetching" together helps.
+SEARCH_CONFIG = "english"
+NON_WORD = re.compile(r"\W+")
+
 
 def generate_random_string(length=8):
     # A-Z, a-z, 0-9
@@ -12,6 +27,73 @@ def generate_random_string(length=8):
     return "".join(random.choices(characters, k=length))
 
 
+def search_document(name, code):
+    """What the snippet browser searches: the name, ranked above the code.
+
+    Punctuation is blanked out first, otherwise the text search parser keeps
+    dotted paths such as django.db.models as a single word.
+    """
+    return SearchVector(
+        models.Value(NON_WORD.sub(" ", name), output_field=models.TextField()),
+        weight="A",
+        config=SEARCH_CONFIG,
+    ) + SearchVector(
+        models.Value(NON_WORD.sub(" ", code), output_field=models.TextField()),
+        weight="B",
+        config=SEARCH_CONFIG,
+    )
+
+
+def search_query(text):
+    """Match every word of text, each as a prefix, so results follow typing."""
+    words = re.findall(r"\w+", text)
+    if not words:
+        return None
+    return SearchQuery(
+        " & ".join(f"{word}:*" for word in words),
+        search_type="raw",
+        config=SEARCH_CONFIG,
+    )
+
+
+class SnippetQuerySet(models.QuerySet):
+
+    def public(self):
+        return self.filter(private=False)
+
+    def recent(self):
+        return self.order_by("-created", "-id")
+
+    def summaries(self):
+        """Leave out the result and the code's blob, which listings never show."""
+        return self.only(
+            "slug", "name", "created", "database", "orm_version", "ref_type", "ref_id", "sha"
+        )
+
+    def search(self, text):
+        """Snippets matching text, best match first."""
+        query = search_query(text)
+        if query is None:
+            return self.none()
+        # ts_rank returns a real; as a double it survives a trip through a
+        # pagination cursor and compares equal to itself afterwards.
+        rank = Cast(SearchRank(models.F("search_vector"), query), models.FloatField())
+        return (
+            self.filter(search_vector=query)
+            .annotate(rank=rank)
+            .order_by("-rank", "-created", "-id")
+        )
+
+    def after(self, created, id, rank=None):
+        """Snippets that come after the given one in recent() or search() order."""
+        older = models.Q(created__lt=created) | models.Q(created=created, id__lt=id)
+        if rank is None:
+            # The redundant bound lets the database seek to created instead
+            # of filtering its way there.
+            return self.filter(older, created__lte=created)
+        return self.filter(models.Q(rank__lt=rank) | models.Q(older, rank=rank))
+
+
 class SnippetManager(models.Manager):
 
     def create_snippet(self, name, code, database, private, orm_version=None, ref_type=None, ref_id=None, sha=None, session_key=None):
@@ -33,11 +115,35 @@ class SnippetManager(models.Manager):
         )
 
 
+def code_digest(code):
+    return hashlib.sha256(code.encode("utf-8")).hexdigest()
+
+
+class CodeBlobManager(models.Manager):
+
+    def store(self, code):
+        """Return the blob holding code, creating it if nobody saved it before."""
+        blob, _ = self.get_or_create(digest=code_digest(code), defaults={"code": code})
+        return blob
+
+
+class CodeBlob(models.Model):
+    """Snippet code, stored once however many snippets share it.
+
+    Most saved snippets are unchanged templates or journey chapters.
+    """
+
+    digest = models.CharField(max_length=64, primary_key=True)
+    code = models.TextField()
+
+    objects = CodeBlobManager()
+
+
 class Snippet(models.Model):
 
     name = models.CharField(max_length=100)
     slug = models.SlugField(max_length=100, unique=True)
-    code = models.TextField()
+    blob = models.ForeignKey(CodeBlob, on_delete=models.PROTECT, related_name="snippets")
     result = models.TextField(blank=True)
     created = models.DateTimeField(auto_now=True)
     private = models.BooleanField(default=False)
@@ -55,7 +161,39 @@ class Snippet(models.Model):
     # Session-based ownership (for allowing updates without auth)
     session_key = models.CharField(max_length=40, null=True, blank=True)
 
-    objects = SnippetManager()
+    # Maintained by save() from name and code, and indexed for the browser.
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = SnippetManager.from_queryset(SnippetQuerySet)()
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=["search_vector"], name="snippet_search_vector_idx"),
+            # Serves the browser's listing, recent() over public(), in order
+            # and from any cursor.
+            models.Index(
+                fields=["-created", "-id"],
+                condition=models.Q(private=False),
+                name="snippet_public_recent_idx",
+            ),
+        ]
+
+    # Code assigned since the snippet was loaded; it goes to a blob on save().
+    _code = None
+
+    @property
+    def code(self):
+        return self.blob.code if self._code is None else self._code
+
+    @code.setter
+    def code(self, value):
+        self._code = value
+
+    def save(self, *args, **kwargs):
+        if self._code is not None and self.blob_id != code_digest(self._code):
+            self.blob = CodeBlob.objects.store(self._code)
+        self.search_vector = search_document(self.name, self.code)
+        super().save(*args, **kwargs)
 
     def get_absolute_url(self):
         return reverse("detail", kwargs={"pk": self.id})
@@ -0,0 +1,74 @@
+"""Cursor pagination and cheap totals for the snippet browser.
+
+Offset pagination reads and discards every row before the page it returns,
+and each page also ran an exact COUNT(*). A cursor instead records where the
+previous page ended (its last row's rank, created time and id) so the next
+page starts there with an index range scan, however deep it is.
+
+Cursors are opaque to clients: base64 of a small JSON object.
+"""
+
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from django.core.cache import cache
+
+# The public snippet count only feeds the "N snippets" label and the page
+# count, so it may lag behind new snippets by this much.
+COUNT_TIMEOUT = 60
+
+COUNT_CACHE_KEY = "snippets-public-count"
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(snippet):
+    """The cursor for the page that follows snippet."""
+    position = {"c": snippet.created.isoformat(), "i": snippet.id}
+    rank = getattr(snippet, "rank", None)
+    if rank is not None:
+        position["r"] = rank
+    encoded = json.dumps(position, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(encoded).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token):
+    """Return the {created, id, rank} position encoded in token."""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        position = json.loads(base64.urlsafe_b64decode(padded))
+        return {
+            "created": datetime.fromisoformat(position["c"]),
+            "id": int(position["i"]),
+            "rank": float(position["r"]) if "r" in position else None,
+        }
+    except (binascii.Error, ValueError, TypeError, KeyError) as e:
+        raise InvalidCursor(token) from e
+
+
+def paginate_after(queryset, token, per_page):
+    """Return a page of queryset starting after token, and the next cursor.
+
+    The queryset must be ordered by Snippet.objects.recent() or search().
+    Raises InvalidCursor for a cursor taken from the other of the two, since
+    only a search's cursor carries a rank and only a search has one.
+    """
+    if token:
+        position = decode_cursor(token)
+        if (position["rank"] is not None) != ("rank" in queryset.query.annotations):
+            raise InvalidCursor(token)
+        queryset = queryset.after(**position)
+
+    # One extra row tells whether there is a next page without counting.
+    rows = list(queryset[: per_page + 1])
+    page, more = rows[:per_page], len(rows) > per_page
+    return page, encode_cursor(page[-1]) if more else None
+
+
+def estimated_count(queryset):
+    """The number of public snippets, recounted at most every COUNT_TIMEOUT."""
+    return cache.get_or_set(COUNT_CACHE_KEY, queryset.count, timeout=COUNT_TIMEOUT)
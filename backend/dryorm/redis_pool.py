@@ -0,0 +1,121 @@
+"""Redis connections shared by the whole process.
+
+Container slot accounting talks to Redis on every execution. Connections
+come from one pool per process instead of a new client per call, so they are
+set up once, checked before reuse when they have been idle, and bounded by
+timeouts: a Redis that stops answering fails the request after a couple of
+seconds instead of hanging the thread that made it.
+
+Subscribers wait on their connection indefinitely, which a read timeout
+would cut short, so they get a pool of their own.
+
+The command pool records its checkouts, connects, errors and reply times in
+the metrics served at /metrics, and healthy() is what that scrape reports as
+dryorm_redis_up.
+"""
+
+import os
+import threading
+import time
+
+import redis
+
+from dryorm import metrics
+
+REDIS_URL = os.environ.get("REDIS_URL", "redis://redis:6379/0")
+
+# Seconds to wait for Redis to accept a connection and to answer a command.
+CONNECT_TIMEOUT = float(os.environ.get("REDIS_CONNECT_TIMEOUT", 1))
+SOCKET_TIMEOUT = float(os.environ.get("REDIS_SOCKET_TIMEOUT", 2))
+
+# Connections idle for longer than this are PINGed before they are reused.
+HEALTH_CHECK_INTERVAL = 30
+
+# Past this many connections in use, callers wait up to POOL_TIMEOUT seconds
+# for one to be returned rather than opening more.
+MAX_CONNECTIONS = int(os.environ.get("REDIS_MAX_CONNECTIONS", 64))
+POOL_TIMEOUT = float(os.environ.get("REDIS_POOL_TIMEOUT", 2))
+
+
+class InstrumentedConnection(redis.Connection):
+    """A connection that records its connects, errors and reply wait time."""
+
+    def _connect(self):
+        try:
+            sock = super()._connect()
+        except OSError:
+            metrics.REDIS_ERRORS.inc()
+            raise
+        metrics.REDIS_CONNECTS.inc()
+        return sock
+
+    def read_response(self, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return super().read_response(*args, **kwargs)
+        except (redis.ConnectionError, redis.TimeoutError):
+            metrics.REDIS_ERRORS.inc()
+            raise
+        finally:
+            metrics.REDIS_REPLY_SECONDS.observe(time.perf_counter() - started)
+
+
+class InstrumentedPool(redis.BlockingConnectionPool):
+    """A pool that records how long each checkout waited for a connection."""
+
+    def get_connection(self, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return super().get_connection(*args, **kwargs)
+        finally:
+            metrics.REDIS_CHECKOUT_SECONDS.observe(time.perf_counter() - started)
+
+
+def _pool(pool_class=redis.BlockingConnectionPool, **kwargs):
+    return pool_class.from_url(
+        REDIS_URL,
+        max_connections=MAX_CONNECTIONS,
+        timeout=POOL_TIMEOUT,
+        socket_connect_timeout=CONNECT_TIMEOUT,
+        health_check_interval=HEALTH_CHECK_INTERVAL,
+        **kwargs,
+    )
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def _get_pool(name, **kwargs):
+    pool = _pools.get(name)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(name)
+            if pool is None:
+                pool = _pools[name] = _pool(**kwargs)
+    return pool
+
+
+def get_client():
+    """A client on the shared command pool."""
+    return redis.Redis(
+        connection_pool=_get_pool(
+            "commands",
+            pool_class=InstrumentedPool,
+            socket_timeout=SOCKET_TIMEOUT,
+            connection_class=InstrumentedConnection,
+        )
+    )
+
+
+def get_pubsub_client():
+    """A client on the subscriber pool, whose reads wait for as long as it takes."""
+    return redis.Redis(connection_pool=_get_pool("pubsub", socket_timeout=None))
+
+
+def healthy():
+    """Whether Redis answers a PING within the timeouts."""
+    try:
+        return get_client().ping()
+    except (redis.ConnectionError, redis.TimeoutError):
+        return False
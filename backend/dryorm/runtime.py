@@ -0,0 +1,158 @@
+"""The container runtime executors run on.
+
+Every execution creates a container, starts it, waits for it, reads its
+result file out of it and removes it. ContainerRuntime does that over one
+Docker client per process, so its connection pool to the Docker socket is
+reused from one execution to the next instead of being built per request.
+
+The Docker SDK is blocking, and so are these methods. The views run the
+pipeline that calls them on threads of their own, off the event loop.
+
+FakeRuntime stands in for Docker in tests.
+"""
+
+import io
+import os
+import tarfile
+import threading
+from dataclasses import dataclass, field
+
+import docker
+from docker.errors import APIError, ImageNotFound
+
+# Connections kept open to the Docker socket. Executions run on up to
+# BLOCKING_THREADS threads, and each holds a connection while it waits.
+DOCKER_POOL_SIZE = int(os.environ.get("DOCKER_POOL_SIZE", 64))
+
+
+def read_archive(stream, path):
+    """Return the contents of path from a get_archive() tar stream."""
+    file_obj = io.BytesIO()
+    for chunk in stream:
+        file_obj.write(chunk)
+    file_obj.seek(0)
+    with tarfile.open(fileobj=file_obj) as tar:
+        return tar.extractfile(tar.getmember(os.path.basename(path))).read()
+
+
+class ContainerRuntime:
+    """Container lifecycle over a shared, long-lived Docker client."""
+
+    def __init__(self, client=None):
+        self._client = client
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = docker.from_env(max_pool_size=DOCKER_POOL_SIZE)
+        return self._client
+
+    def create(self, image, name, environment, memory, network, volumes=None):
+        return self.client.containers.create(
+            image,
+            name=name,
+            mem_limit=memory,
+            memswap_limit=memory,
+            network=network,
+            environment=environment,
+            volumes=volumes,
+            detach=True,
+        )
+
+    def start(self, container):
+        container.start()
+
+    def wait(self, container, timeout=None):
+        """Wait for container to exit and return its exit code."""
+        return container.wait(timeout=timeout)["StatusCode"]
+
+    def read_file(self, container, path):
+        """Return the contents of path in container, or None if it has none.
+
+        Works on stopped containers.
+        """
+        try:
+            stream, _ = container.get_archive(path)
+            return read_archive(stream, path)
+        except (APIError, KeyError, tarfile.TarError):
+            return None
+
+    def logs(self, container):
+        return container.logs(stdout=True, stderr=True)
+
+    def remove(self, container, force=False):
+        container.remove(force=force)
+
+
+@dataclass
+class FakeContainer:
+    image: str
+    name: str
+    environment: list
+    memory: str
+    network: str
+    volumes: dict = None
+    exit_code: int = 0
+    files: dict = field(default_factory=dict)
+    output: bytes = b""
+    started: bool = False
+    removed: bool = False
+
+    @property
+    def env(self):
+        return dict(item.split("=", 1) for item in self.environment)
+
+
+class FakeRuntime(ContainerRuntime):
+    """Runs containers in memory, by handing them to a function.
+
+    handler(container) is called when a container starts. It sees the image,
+    environment and so on, and sets exit_code, files and output on it.
+    Images listed in missing_images fail to create like unpulled ones do.
+    """
+
+    def __init__(self, handler=None, missing_images=()):
+        super().__init__()
+        self.handler = handler or (lambda container: None)
+        self.missing_images = set(missing_images)
+        self.containers = []
+
+    def create(self, image, name, environment, memory, network, volumes=None):
+        if image in self.missing_images:
+            raise ImageNotFound(f"No such image: {image}")
+        container = FakeContainer(image, name, environment, memory, network, volumes)
+        self.containers.append(container)
+        return container
+
+    def start(self, container):
+        container.started = True
+        self.handler(container)
+
+    def wait(self, container, timeout=None):
+        return container.exit_code
+
+    def read_file(self, container, path):
+        return container.files.get(path)
+
+    def logs(self, container):
+        return container.output
+
+    def remove(self, container, force=False):
+        container.removed = True
+
+
+_runtime = None
+_runtime_lock = threading.Lock()
+
+
+def get_runtime():
+    """Return the process-wide runtime, creating it on first use."""
+    global _runtime
+    if _runtime is None:
+        with _runtime_lock:
+            if _runtime is None:
+                _runtime = ContainerRuntime()
+    return _runtime
@@ -1,494 +1,396 @@
 import hashlib
-import subprocess
 import traceback
 import json
 import os
 import uuid
 import redis
 import time
-import io
-import tarfile
+from contextlib import contextmanager
+from dataclasses import dataclass, field
 
 os.environ["DJANGO_SETTINGS_MODULE"] = "dryorm.settings"
 
 from django.core.cache import cache
-import docker
 
 from docker.errors import (
     APIError,
-    ContainerError,
     ImageNotFound,
 )
 
+from dryorm import blobs
 from dryorm import constants
+from dryorm import metrics
+from dryorm import redis_pool
+from dryorm import runtime
 from dryorm.databases import DATABASES
 
+# Results are keyed on the code, so a deterministic snippet's result is good
+# for as long as the executor image it ran on.
+RESULT_CACHE_TIMEOUT = 60 * 60 * 24 * 365
 
-class OverloadedError(Exception):
-    pass
+# Snippets that touched random, Faker, uuid or the clock would print something
+# else on the next run; keep those only long enough to absorb a refresh storm.
+NONDETERMINISTIC_CACHE_TIMEOUT = 60 * 5
 
+# Running executor containers, counted across every backend process.
+CONTAINER_COUNT_KEY = "dryorm:running_containers"
 
-def run_django_sync(code, database, ignore_cache=False, orm_version="django-6.1"):
-    """Synchronous version for HTTP request/response cycle."""
-    client = docker.from_env()
-    redis_client = redis.Redis("redis")
-    key = hashlib.md5(code.encode("utf-8")).hexdigest()
+# Expiry of the count, as a safety net for a process that dies holding slots.
+CONTAINER_COUNT_TIMEOUT = 60
 
-    executor = constants.get_executor(database, orm_version)
-    selected_db = DATABASES.get(database, DATABASES["sqlite"])
-    cached_reply = cache.get(f"{database}-{orm_version}-{key}")
-    unique_name = None
-    container = None
-    container_slot_acquired = False
-
-    try:
-        # Is the result already cached?
-        if cached_reply and not ignore_cache:
-            return json.loads(cached_reply)
-        else:
-            # Use Redis to atomically check and increment container count
-            container_count_key = "dryorm:running_containers"
-
-            # Try to acquire a slot atomically
-            with redis_client.pipeline() as pipe:
-                while True:
-                    try:
-                        pipe.watch(container_count_key)
-                        current_count = int(pipe.get(container_count_key) or 0)
-
-                        if current_count >= executor.max_containers:
-                            pipe.unwatch()
-                            raise OverloadedError
-
-                        # Atomically increment
-                        pipe.multi()
-                        pipe.incr(container_count_key)
-                        pipe.expire(container_count_key, 60)  # Expire after 60s as safety
-                        pipe.execute()
-                        container_slot_acquired = True
-                        break
-                    except redis.WatchError:
-                        # Another request modified the count, retry
-                        continue
-
-            if selected_db.needs_setup:
-                unique_name = selected_db.setup()
-
-            # Create and start container
-            container_name = f"executor-{uuid.uuid4().hex[:6]}"
-
-            environment = [
-                f"CODE={code}",
-                f"SERVICE_DB_HOST={selected_db.host}",
-                f"SERVICE_DB_PORT={selected_db.port}",
-                f"DB_TYPE={selected_db.key}",
-                f"DB_NAME={unique_name}",
-                f"DB_USER={unique_name}",
-                f"DB_PASSWORD={unique_name}",
-            ]
-
-            container = client.containers.create(
-                executor.image,
-                name=container_name,
-                mem_limit=executor.memory,
-                memswap_limit=executor.memory,
-                network="dryorm_snippets_net",
-                environment=environment,
-                detach=True,
-            )
 
-            # Start and wait for container
-            container.start()
-            exit_status = container.wait()
+def cache_timeout(result_dict):
+    """How long a finished run may be served from the cache."""
+    if result_dict["result"].get("nondeterministic"):
+        return NONDETERMINISTIC_CACHE_TIMEOUT
+    return RESULT_CACHE_TIMEOUT
 
-            # Read result from file using get_archive (works on stopped containers)
-            result = b''
-            try:
-                stream, stat = container.get_archive('/tmp/result.json')
-                file_obj = io.BytesIO()
-                for chunk in stream:
-                    file_obj.write(chunk)
-                file_obj.seek(0)
-                with tarfile.open(fileobj=file_obj) as tar:
-                    member = tar.getmember('result.json')
-                    f = tar.extractfile(member)
-                    result = f.read()
-            except Exception as e:
-                pass  # result.json doesn't exist
-
-            # If result.json is empty or doesn't exist, and exit code is non-zero, try error.log
-            if not result and exit_status['StatusCode'] != 0:
-                try:
-                    stream, stat = container.get_archive('/tmp/error.log')
-                    file_obj = io.BytesIO()
-                    for chunk in stream:
-                        file_obj.write(chunk)
-                    file_obj.seek(0)
-                    with tarfile.open(fileobj=file_obj) as tar:
-                        member = tar.getmember('error.log')
-                        f = tar.extractfile(member)
-                        result = f.read()
-                except Exception as e2:
-                    # If error.log also fails, fall back to container logs
-                    result = container.logs(stdout=True, stderr=True)
-
-            # Remove container
-            container.remove()
-
-            # Check if container exited with error
-            if exit_status['StatusCode'] != 0:
-                error = ContainerError(
-                    container=container,
-                    exit_status=exit_status['StatusCode'],
-                    command='',
-                    image=executor.image,
-                    stderr=result
-                )
-                raise error
-    except ContainerError as error:
-        match error.exit_status:
-            case 137:
-                # OOM killed
-                result_dict = {
-                    "event": constants.JOB_OOM_KILLED_EVENT,
-                    "error": "OOM! Please use less memory. Sorry!",
-                }
-            case 101:
-                # Network Error
-                result_dict = {
-                    "event": constants.JOB_NETWORK_DISABLED_EVENT,
-                    "error": "Network is disabled! Sorry!",
-                }
-            case 124:
-                # Timeout
-                result_dict = {
-                    "event": constants.JOB_TIMEOUT_EVENT,
-                    "error": "Timed out! Maximum allowed is 10 seconds. Sorry!",
-                }
-            case _:
-                if error.stderr:
-                    error_message = error.stderr.decode("utf-8")
-                else:
-                    error_message = str(error)
 
-                if error.exit_status == 1 and (
-                    "Network is unreachable" in error_message
-                    or "Temporary failure in name resolution" in error_message
-                ):
-                    # Network Error
-                    result_dict = {
-                        "event": constants.JOB_NETWORK_DISABLED_EVENT,
-                        "error": "Network is disabled! Sorry!",
-                    }
-                else:
-                    result_dict = {
-                        "event": constants.JOB_CODE_ERROR_EVENT,
-                        "error": error_message
-                    }
-        return result_dict
-    except ImageNotFound as error:
-        return {
-            "event": constants.JOB_IMAGE_NOT_FOUND_ERROR_EVENT,
-            "error": f"Executor for {executor.verbose} not found!",
-        }
-    except APIError as error:
-        return {
-            "event": constants.JOB_INTERNAL_ERROR_EVENT,
-            "error": error.explanation
-        }
-    except OverloadedError as error:
-        return {
-            "event": constants.JOB_OVERLOADED,
-            "error": f"System is currently overloaded (>= {executor.max_containers} instances), please try again in a few! Sorry!",
-        }
-    except:
-        # Catch-all for any other exceptions
-        message = traceback.format_exc()
-        return {
-            "event": constants.JOB_INTERNAL_ERROR_EVENT,
-            "error": f"Unknown error occurred. Please try again later.\n{message}",
-        }
-    else:
-        decoded = result.decode("utf-8")
+def result_cache_key(code, database, orm_version=None, ref_type=None, ref_id=None, ref_sha=None, options=None):
+    """The key a run of code is cached under, for an ORM version or a ref.
 
-        # Debug: Log the raw output
-        print("=" * 80)
-        print("RAW CONTAINER OUTPUT:")
-        print(decoded)
-        print("=" * 80)
+    Runs with EXECUTION_OPTIONS are cached apart from those without. A ref's
+    sha is cut to the 12 characters its worktree is named by, so a saved
+    snippet's full sha finds the runs made under the short one.
+    """
+    key = hashlib.md5(code.encode("utf-8")).hexdigest()
+    for name, value in sorted((options or {}).items()):
+        key = f"{key}-{name}-{value}"
+    if ref_type:
+        return f"{ref_type}-{ref_id}-{(ref_sha or '')[:12]}-{database}-{key}"
+    return f"{database}-{orm_version}-{key}"
 
-        # Parse JSON from result file
-        try:
-            result_dict = {
-                "event": constants.JOB_DONE_EVENT,
-                "result": json.loads(decoded)
-            }
-        except json.JSONDecodeError as e:
-            print(f"JSON DECODE ERROR: {e}")
-            print(f"Error at position {e.pos}")
-            if e.pos < len(decoded):
-                print(f"Context around error: {repr(decoded[max(0, e.pos-50):e.pos+50])}")
-            raise
-
-        # Cache the result
-        reply_str = json.dumps(result_dict)
-        cache.set(f"{database}-{orm_version}-{key}", reply_str, timeout=60 * 60 * 24 * 365)
-
-        return result_dict
-    finally:
-        # Release container slot if it was acquired
-        if container_slot_acquired:
-            try:
-                redis_client.decr("dryorm:running_containers")
-            except:
-                pass
 
-        # Clean up container if it exists and wasn't removed
-        if container:
-            try:
-                container.remove(force=True)
-            except:
-                pass  # Container may already be removed
+def load_cached_reply(cache_key):
+    """Return the cached reply for cache_key, or None on a miss.
 
-        # Clean up database
-        if not cached_reply or ignore_cache:
-            if unique_name and selected_db.needs_setup:
-                selected_db.teardown(unique_name)
+    A reply that a fresh run would not repeat is flagged as cached.
+    """
+    cached_reply = cache.get(cache_key)
+    if cached_reply is None:
+        return None
 
+    reply = blobs.unpack(json.loads(cached_reply))
+    if reply and reply.get("result", {}).get("nondeterministic"):
+        reply["cached"] = True
+    return reply
 
-def run_django_ref_sync(code, database, ignore_cache=False, ref_type=None, ref_id=None, ref_sha=None, ref_host_path=None):
-    """Synchronous execution for Django ref mode (PR/branch/tag) - loads Django from source at runtime."""
-    client = docker.from_env()
-    redis_client = redis.Redis("redis")
-    key = hashlib.md5(code.encode("utf-8")).hexdigest()
 
-    executor = constants.get_ref_executor(database)
-    selected_db = DATABASES.get(database, DATABASES["sqlite"])
-    cache_key = f"{ref_type}-{ref_id}-{ref_sha}-{database}-{key}"
-    print(f"[DEBUG] Result cache_key = {cache_key}")
-    cached_reply = cache.get(cache_key)
-    print(f"[DEBUG] cached_reply exists = {cached_reply is not None}")
-    unique_name = None
-    container = None
-    container_slot_acquired = False
-
-    try:
-        # Is the result already cached?
-        if cached_reply and not ignore_cache:
-            return json.loads(cached_reply)
-        else:
-            # Use Redis to atomically check and increment container count
-            container_count_key = "dryorm:running_containers"
-
-            # Try to acquire a slot atomically
-            with redis_client.pipeline() as pipe:
-                while True:
-                    try:
-                        pipe.watch(container_count_key)
-                        current_count = int(pipe.get(container_count_key) or 0)
-
-                        if current_count >= executor.max_containers:
-                            pipe.unwatch()
-                            raise OverloadedError
-
-                        # Atomically increment
-                        pipe.multi()
-                        pipe.incr(container_count_key)
-                        pipe.expire(container_count_key, 60)  # Expire after 60s as safety
-                        pipe.execute()
-                        container_slot_acquired = True
-                        break
-                    except redis.WatchError:
-                        # Another request modified the count, retry
-                        continue
-
-            if selected_db.needs_setup:
-                unique_name = selected_db.setup()
-
-            # Create and start container with mounted ref source
-            container_name = f"executor-ref-{uuid.uuid4().hex[:6]}"
-
-            environment = [
-                f"CODE={code}",
-                f"SERVICE_DB_HOST={selected_db.host}",
-                f"SERVICE_DB_PORT={selected_db.port}",
-                f"DB_TYPE={selected_db.key}",
-                f"DB_NAME={unique_name}",
-                f"DB_USER={unique_name}",
-                f"DB_PASSWORD={unique_name}",
-            ]
-
-            # Mount the ref source directory into the container (use host path for Docker)
-            volumes = {
-                ref_host_path: {"bind": "/django-ref", "mode": "ro"}
-            }
+def store_reply(cache_key, result_dict):
+    """Cache a job-done reply, with its large parts stored as blobs, and return it.
 
-            container = client.containers.create(
-                executor.image,
-                name=container_name,
-                mem_limit=executor.memory,
-                memswap_limit=executor.memory,
-                network="dryorm_snippets_net",
-                environment=environment,
-                volumes=volumes,
-                detach=True,
-            )
+    The reply goes back whole: the blob references are only for the cache.
+    """
+    stored, _ = blobs.pack(result_dict)
+    cache.set(cache_key, json.dumps(stored), timeout=cache_timeout(result_dict))
+    return result_dict
 
-            # Start and wait for container
-            container.start()
-            exit_status = container.wait(timeout=120)  # Higher timeout for pip install
 
-            # Read result from file using get_archive (works on stopped containers)
-            result = b''
-            try:
-                stream, stat = container.get_archive('/tmp/result.json')
-                file_obj = io.BytesIO()
-                for chunk in stream:
-                    file_obj.write(chunk)
-                file_obj.seek(0)
-                with tarfile.open(fileobj=file_obj) as tar:
-                    member = tar.getmember('result.json')
-                    f = tar.extractfile(member)
-                    result = f.read()
-            except Exception as e:
-                pass  # result.json doesn't exist
-
-            # If result.json is empty or doesn't exist, and exit code is non-zero, try error.log
-            if not result and exit_status['StatusCode'] != 0:
+NETWORK_DISABLED_REPLY = {
+    "event": constants.JOB_NETWORK_DISABLED_EVENT,
+    "error": "Network is disabled! Sorry!",
+}
+
+
+class OverloadedError(Exception):
+    pass
+
+
+@dataclass
+class Execution:
+    """One run of a snippet, as it moves through a Pipeline."""
+
+    code: str
+    cache_key: str
+    ignore_cache: bool = False
+    # The constants.EXECUTION_OPTIONS the run was asked for.
+    options: dict = field(default_factory=dict)
+    slot_acquired: bool = False
+    database_name: str = None
+    container: object = None
+    exit_code: int = None
+    output: bytes = b""
+    # The executor's last memory sample, read when it was killed for using
+    # too much.
+    memory: dict = None
+    reply: dict = None
+    # Milliseconds spent in each stage that ran, and in each phase of the
+    # executor as it reported them.
+    timings: dict = field(default_factory=dict)
+    executor_timings: dict = field(default_factory=dict)
+
+    @contextmanager
+    def timed(self, stage):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[stage] = round((time.perf_counter() - started) * 1000, 1)
+
+    def breakdown(self):
+        return {"backend": self.timings, "executor": self.executor_timings}
+
+
+class Pipeline:
+    """Runs snippets on an executor, one stage at a time.
+
+    A run goes through admission, provision, run, collect, classify and cache,
+    then cleanup, which always runs. Each stage is a method taking the
+    Execution, timed into execution.timings. A stage may return a reply to end
+    the run there, as admission does on a cache hit. An exception from any
+    stage becomes an error reply in fail().
+
+    Every reply carries the timings, backend and executor, under "timings".
+    They describe this request, so they are never cached.
+
+    Modes subclass this and override the stages they do differently. They
+    pass the result_cache_key() arguments that tell their runs apart, beyond
+    the code, database and options, as version.
+    """
+
+    stages = ("admission", "provision", "run", "collect", "classify", "cache")
+    container_prefix = "executor"
+    network = "dryorm_snippets_net"
+    wait_timeout = None
+    oom_message = "OOM! Please use less memory. Sorry!"
+
+    def __init__(self, executor, database, **version):
+        self.executor = executor
+        self.database_key = database
+        self.database = DATABASES.get(database, DATABASES["sqlite"])
+        self.version = version
+        self.containers = runtime.get_runtime()
+        self.redis = redis_pool.get_client()
+
+    def cache_key(self, code, options=None):
+        return result_cache_key(code, self.database_key, options=options, **self.version)
+
+    def execute(self, code, ignore_cache=False, options=None):
+        """Run code and return its Execution, with the reply on it."""
+        options = options or {}
+        execution = Execution(code, self.cache_key(code, options), ignore_cache, options)
+        metrics.IN_PROGRESS.inc()
+        try:
+            for stage in self.stages:
+                with execution.timed(stage):
+                    reply = getattr(self, stage)(execution)
+                if reply is not None:
+                    execution.reply = reply
+                    break
+        except Exception as error:
+            execution.reply = self.fail(error)
+        finally:
+            with execution.timed("cleanup"):
+                self.cleanup(execution)
+            metrics.IN_PROGRESS.dec()
+        execution.reply = {**execution.reply, "timings": execution.breakdown()}
+        metrics.observe_execution(self.executor, self.database.key, execution)
+        return execution
+
+    def admission(self, execution):
+        """Serve a cached reply, or take a container slot."""
+        if not execution.ignore_cache:
+            cached_reply = load_cached_reply(execution.cache_key)
+            metrics.CACHE_LOOKUPS.labels("hit" if cached_reply else "miss").inc()
+            if cached_reply:
+                return cached_reply
+
+        # Check and increment the count atomically, retrying if another
+        # request changes it in between.
+        with self.redis.pipeline() as pipe:
+            while True:
                 try:
-                    stream, stat = container.get_archive('/tmp/error.log')
-                    file_obj = io.BytesIO()
-                    for chunk in stream:
-                        file_obj.write(chunk)
-                    file_obj.seek(0)
-                    with tarfile.open(fileobj=file_obj) as tar:
-                        member = tar.getmember('error.log')
-                        f = tar.extractfile(member)
-                        result = f.read()
-                except Exception as e2:
-                    # If error.log also fails, fall back to container logs
-                    result = container.logs(stdout=True, stderr=True)
-
-            # Remove container
-            container.remove()
-
-            # Check if container exited with error
-            if exit_status['StatusCode'] != 0:
-                error = ContainerError(
-                    container=container,
-                    exit_status=exit_status['StatusCode'],
-                    command='',
-                    image=executor.image,
-                    stderr=result
-                )
-                raise error
-    except ContainerError as error:
-        match error.exit_status:
+                    pipe.watch(CONTAINER_COUNT_KEY)
+                    current_count = int(pipe.get(CONTAINER_COUNT_KEY) or 0)
+
+                    if current_count >= self.executor.max_containers:
+                        pipe.unwatch()
+                        raise OverloadedError
+
+                    pipe.multi()
+                    pipe.incr(CONTAINER_COUNT_KEY)
+                    pipe.expire(CONTAINER_COUNT_KEY, CONTAINER_COUNT_TIMEOUT)
+                    pipe.execute()
+                    execution.slot_acquired = True
+                    return None
+                except redis.WatchError:
+                    continue
+
+    def provision(self, execution):
+        """Create the snippet's database, for backends that need one."""
+        if self.database.needs_setup:
+            execution.database_name = self.database.setup()
+
+    def environment(self, execution):
+        name = execution.database_name
+        environment = [
+            f"CODE={execution.code}",
+            f"SERVICE_DB_HOST={self.database.host}",
+            f"SERVICE_DB_PORT={self.database.port}",
+            f"DB_TYPE={self.database.key}",
+            f"DB_NAME={name}",
+            f"DB_USER={name}",
+            f"DB_PASSWORD={name}",
+        ]
+        for name, value in sorted(execution.options.items()):
+            environment.append(f"{name.upper()}={1 if value is True else value}")
+        return environment
+
+    def volumes(self, execution):
+        return None
+
+    def run(self, execution):
+        """Start the executor container and wait for it to exit."""
+        with execution.timed("run.create"):
+            execution.container = self.containers.create(
+                self.executor.image,
+                name=f"{self.container_prefix}-{uuid.uuid4().hex[:6]}",
+                environment=self.environment(execution),
+                memory=self.executor.memory,
+                network=self.network,
+                volumes=self.volumes(execution),
+            )
+        with execution.timed("run.start"):
+            self.containers.start(execution.container)
+        execution.exit_code = self.containers.wait(execution.container, timeout=self.wait_timeout)
+
+    def collect(self, execution):
+        """Read the result file, or whatever explains a failed run."""
+        container = execution.container
+        output = self.containers.read_file(container, "/tmp/result.json") or b""
+        if not output and execution.exit_code != 0:
+            output = self.containers.read_file(container, "/tmp/error.log")
+            if output is None:
+                output = self.containers.logs(container)
+        execution.output = output
+        if execution.exit_code == 137:
+            sample = self.containers.read_file(container, "/tmp/memory.json")
+            execution.memory = json.loads(sample) if sample else {}
+
+    def classify(self, execution):
+        """Turn the exit code and output into a reply."""
+        match execution.exit_code:
+            case 0:
+                result = json.loads(execution.output.decode("utf-8"))
+                execution.executor_timings = result.pop("timings", {})
+                execution.reply = {"event": constants.JOB_DONE_EVENT, "result": result}
             case 137:
-                # OOM killed
-                result_dict = {
+                execution.reply = {
                     "event": constants.JOB_OOM_KILLED_EVENT,
-                    "error": "OOM! Please use less memory.",
+                    "error": self.oom_message,
+                    "memory": {"limit": self.executor.memory, **(execution.memory or {})},
                 }
             case 101:
-                # Network Error
-                result_dict = {
-                    "event": constants.JOB_NETWORK_DISABLED_EVENT,
-                    "error": "Network is disabled! Sorry!",
-                }
+                execution.reply = dict(NETWORK_DISABLED_REPLY)
             case 124:
-                # Timeout
-                result_dict = {
+                execution.reply = {
                     "event": constants.JOB_TIMEOUT_EVENT,
                     "error": "Timed out! Maximum allowed is 10 seconds. Sorry!",
                 }
-            case _:
-                if error.stderr:
-                    error_message = error.stderr.decode("utf-8")
+            case exit_code:
+                if execution.output:
+                    error_message = execution.output.decode("utf-8")
                 else:
-                    error_message = str(error)
+                    error_message = f"{self.executor.image} exited with status {exit_code}"
 
-                if error.exit_status == 1 and (
+                if exit_code == 1 and (
                     "Network is unreachable" in error_message
                     or "Temporary failure in name resolution" in error_message
                 ):
-                    # Network Error
-                    result_dict = {
-                        "event": constants.JOB_NETWORK_DISABLED_EVENT,
-                        "error": "Network is disabled! Sorry!",
-                    }
+                    execution.reply = dict(NETWORK_DISABLED_REPLY)
                 else:
-                    result_dict = {
+                    execution.reply = {
                         "event": constants.JOB_CODE_ERROR_EVENT,
-                        "error": error_message
+                        "error": error_message,
                     }
-        return result_dict
-    except ImageNotFound as error:
-        return {
-            "event": constants.JOB_IMAGE_NOT_FOUND_ERROR_EVENT,
-            "error": f"Executor for {executor.verbose} not found! Make sure ref base images are built.",
-        }
-    except APIError as error:
-        return {
-            "event": constants.JOB_INTERNAL_ERROR_EVENT,
-            "error": error.explanation
-        }
-    except OverloadedError as error:
-        return {
-            "event": constants.JOB_OVERLOADED,
-            "error": f"System is currently overloaded (>= {executor.max_containers} instances), please try again in a few! Sorry!",
-        }
-    except:
-        # Catch-all for any other exceptions
-        message = traceback.format_exc()
+
+    def cache(self, execution):
+        if execution.reply["event"] == constants.JOB_DONE_EVENT:
+            execution.reply = store_reply(execution.cache_key, execution.reply)
+
+    def cleanup(self, execution):
+        """Give back the slot, container and database the run took."""
+        if execution.slot_acquired:
+            try:
+                self.redis.decr(CONTAINER_COUNT_KEY)
+            except redis.RedisError:
+                pass
+
+        if execution.container is not None:
+            try:
+                self.containers.remove(execution.container, force=True)
+            except Exception:
+                pass  # Container may already be gone
+
+        if execution.database_name:
+            with execution.timed("cleanup.teardown"):
+                self.database.teardown(execution.database_name)
+
+    def image_not_found_message(self):
+        return f"Executor for {self.executor.verbose} not found!"
+
+    def fail(self, error):
+        """The reply for an exception raised by a stage."""
+        if isinstance(error, ImageNotFound):
+            return {
+                "event": constants.JOB_IMAGE_NOT_FOUND_ERROR_EVENT,
+                "error": self.image_not_found_message(),
+            }
+        if isinstance(error, APIError):
+            return {
+                "event": constants.JOB_INTERNAL_ERROR_EVENT,
+                "error": error.explanation,
+            }
+        if isinstance(error, OverloadedError):
+            return {
+                "event": constants.JOB_OVERLOADED,
+                "error": f"System is currently overloaded (>= {self.executor.max_containers} instances), please try again in a few! Sorry!",
+            }
+        message = "".join(traceback.format_exception(error))
         return {
             "event": constants.JOB_INTERNAL_ERROR_EVENT,
             "error": f"Unknown error occurred. Please try again later.\n{message}",
         }
-    else:
-        decoded = result.decode("utf-8")
 
-        # Debug: Log the raw output
-        print("=" * 80)
-        print("RAW CONTAINER OUTPUT (REF MODE):")
-        print(decoded)
-        print("=" * 80)
 
-        # Parse JSON from result file
-        try:
-            result_dict = {
-                "event": constants.JOB_DONE_EVENT,
-                "result": json.loads(decoded)
-            }
-        except json.JSONDecodeError as e:
-            print(f"JSON DECODE ERROR: {e}")
-            print(f"Error at position {e.pos}")
-            if e.pos < len(decoded):
-                print(f"Context around error: {repr(decoded[max(0, e.pos-50):e.pos+50])}")
-            raise
-
-        # Cache the result
-        reply_str = json.dumps(result_dict)
-        cache.set(cache_key, reply_str, timeout=60 * 60 * 24 * 365)
-
-        return result_dict
-    finally:
-        # Release container slot if it was acquired
-        if container_slot_acquired:
-            try:
-                redis_client.decr("dryorm:running_containers")
-            except:
-                pass
+class ORMVersionPipeline(Pipeline):
+    """Runs on the prebuilt executor image for a released ORM version."""
 
-        # Clean up container if it exists and wasn't removed
-        if container:
-            try:
-                container.remove(force=True)
-            except:
-                pass  # Container may already be removed
+    def __init__(self, database, orm_version):
+        super().__init__(constants.get_executor(database, orm_version), database, orm_version=orm_version)
 
-        # Clean up database
-        if not cached_reply or ignore_cache:
-            if unique_name and selected_db.needs_setup:
-                selected_db.teardown(unique_name)
 
+class RefPipeline(Pipeline):
+    """Runs against Django source checked out from a PR, branch or tag.
+
+    The source is mounted into the ref executor, which installs it before
+    running the snippet, so the container is given longer to finish.
+    """
+
+    container_prefix = "executor-ref"
+    wait_timeout = 120
+    oom_message = "OOM! Please use less memory."
+
+    def __init__(self, database, ref_type, ref_id, ref_sha, ref_host_path):
+        super().__init__(
+            constants.get_ref_executor(database), database, ref_type=ref_type, ref_id=ref_id, ref_sha=ref_sha
+        )
+        self.ref_host_path = ref_host_path
+
+    def volumes(self, execution):
+        # A host path, since Docker resolves it rather than this container.
+        return {self.ref_host_path: {"bind": "/django-ref", "mode": "ro"}}
+
+    def image_not_found_message(self):
+        return f"{super().image_not_found_message()} Make sure ref base images are built."
+
+
+def run_django_sync(code, database, ignore_cache=False, orm_version="django-6.1", options=None):
+    """Synchronous version for HTTP request/response cycle."""
+    return ORMVersionPipeline(database, orm_version).execute(code, ignore_cache, options).reply
+
+
+def run_django_ref_sync(code, database, ignore_cache=False, ref_type=None, ref_id=None, ref_sha=None, ref_host_path=None, options=None):
+    """Synchronous execution for Django ref mode (PR/branch/tag) - loads Django from source at runtime."""
+    pipeline = RefPipeline(database, ref_type, ref_id, ref_sha, ref_host_path)
+    return pipeline.execute(code, ignore_cache, options).reply
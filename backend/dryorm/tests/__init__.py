@@ -0,0 +1,3 @@
+# The configured cache is a directory the dev stack shares; the tests that
+# fill and clear a cache get one of their own.
+LOCMEM_CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
@@ -9,7 +9,7 @@ from dryorm.tasks import run_django_sync
 DEFAULT_ORM_VERSION = "django-6.1"
 
 
-def execute(code, database="sqlite", orm_version=DEFAULT_ORM_VERSION):
+def execute(code, database="sqlite", orm_version=DEFAULT_ORM_VERSION, options=None):
     """Run a snippet the way a request does, and return the executor payload.
 
     Always bypasses the cache: the filebased cache outlives the test process,
@@ -20,12 +20,13 @@ def execute(code, database="sqlite", orm_version=DEFAULT_ORM_VERSION):
         database,
         ignore_cache=True,
         orm_version=orm_version,
+        options=options,
     )
 
 
-def execute_ok(code, database="sqlite", orm_version=DEFAULT_ORM_VERSION):
+def execute_ok(code, database="sqlite", orm_version=DEFAULT_ORM_VERSION, options=None):
     """Run a snippet and assert it completed, returning just the result body."""
-    reply = execute(code, database, orm_version)
+    reply = execute(code, database, orm_version, options)
     assert reply["event"] == constants.JOB_DONE_EVENT, reply.get("error")
     return reply["result"]
 
@@ -71,8 +72,8 @@ def default_database(request):
 
 @pytest.fixture
 def run(default_database):
-    def _run(code, database=None, orm_version=DEFAULT_ORM_VERSION):
-        return execute_ok(code, database or default_database, orm_version)
+    def _run(code, database=None, orm_version=DEFAULT_ORM_VERSION, options=None):
+        return execute_ok(code, database or default_database, orm_version, options)
 
     return _run
 
@@ -0,0 +1,104 @@
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from dryorm import blobs
+from dryorm.tests import LOCMEM_CACHES
+
+ERD = "eNpLyy_KTS0qzszPAwAUyAPk" * 20
+DDL = [
+    {"time": "0.000", "sql": "BEGIN;"},
+    {"time": "0.000", "sql": 'CREATE TABLE "app_author" (\n    "id" integer NOT NULL\n);' * 10},
+    {"time": "0.000", "sql": "COMMIT;"},
+]
+QUERIES = [
+    {
+        "time": "0.001",
+        "sql": "SELECT 1",
+        "template": "SELECT 1",
+        "line_number": 3,
+        "source_context": "Author.objects.all()",
+    },
+]
+
+
+def reply(output="hello\n", erd=ERD):
+    return {
+        "event": "job-done",
+        "result": {
+            "output": output,
+            "outputs": [],
+            "erd": erd,
+            "queries": DDL + QUERIES,
+            "returned": {},
+        },
+    }
+
+
+class SplitDDLTest(SimpleTestCase):
+    def test_splits_at_the_first_templated_query(self):
+        ddl, rest = blobs.split_ddl(DDL + QUERIES)
+        self.assertEqual(ddl, DDL)
+        self.assertEqual(rest, QUERIES)
+
+    def test_a_snippet_without_models_has_no_ddl(self):
+        self.assertEqual(blobs.split_ddl(QUERIES), ([], QUERIES))
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class PackTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_round_trip(self):
+        original = reply(output="x" * 1000)
+        stored, refs = blobs.pack(original)
+        self.assertEqual(set(refs), {"erd", "ddl", "output"})
+        self.assertEqual(blobs.unpack(stored), original)
+
+    def test_stored_reply_keeps_only_references(self):
+        stored, refs = blobs.pack(reply(output="x" * 1000))
+        self.assertNotIn("erd", stored["result"])
+        self.assertNotIn("output", stored["result"])
+        self.assertEqual(stored["result"]["queries"], QUERIES)
+        self.assertEqual(stored["blobs"], refs)
+
+    def test_identical_parts_share_a_blob(self):
+        _, first = blobs.pack(reply(output="one"))
+        _, second = blobs.pack(reply(output="two"))
+        self.assertEqual(first["erd"], second["erd"])
+        self.assertEqual(first["ddl"], second["ddl"])
+
+    def test_small_parts_stay_inline(self):
+        stored, refs = blobs.pack(reply(output="hello\n"))
+        self.assertNotIn("output", refs)
+        self.assertEqual(stored["result"]["output"], "hello\n")
+
+    def test_a_missing_blob_is_a_miss(self):
+        stored, refs = blobs.pack(reply())
+        cache.delete(f"blob-{refs['erd']}")
+        self.assertIsNone(blobs.unpack(stored))
+
+    def test_replies_cached_before_blobs_pass_through(self):
+        legacy = reply()
+        self.assertEqual(blobs.unpack(legacy), legacy)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ReferTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_a_large_erd_becomes_a_reference(self):
+        referred = blobs.refer(reply())
+        self.assertNotIn("erd", referred["result"])
+        self.assertEqual(blobs.get(referred["blobs"]["erd"]), f'"{ERD}"')
+        # The rest stays inline.
+        self.assertEqual(referred["result"]["queries"], DDL + QUERIES)
+
+    def test_a_small_erd_stays_inline(self):
+        original = reply(erd="eNpLyy")
+        self.assertEqual(blobs.refer(original), original)
+
+    def test_replies_without_a_result_pass_through(self):
+        error = {"event": "job-code-error", "error": "boom"}
+        self.assertEqual(blobs.refer(error), error)
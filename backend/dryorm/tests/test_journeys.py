@@ -0,0 +1,73 @@
+import os
+import tempfile
+from pathlib import Path
+
+from django.test import SimpleTestCase, override_settings
+
+from dryorm import journeys
+
+FIRST = """
+title = "First"
+order = 2
+
+[[chapters]]
+title = "Hello, World!"
+content = "print('hello')"
+"""
+
+SECOND = """
+title = "Second"
+order = 1
+chapters = []
+"""
+
+
+class JourneyIndexTest(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.base_dir = Path(tmp.name)
+        self.path = self.base_dir / "data" / "journeys"
+        self.path.mkdir(parents=True)
+        self.write("first.toml", FIRST)
+
+        settings = override_settings(BASE_DIR=self.base_dir)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def write(self, name, content, mtime_ns=None):
+        path = self.path / name
+        path.write_text(content)
+        if mtime_ns is not None:
+            os.utime(path, ns=(mtime_ns, mtime_ns))
+
+    def test_slugs_chapters_by_title(self):
+        index = journeys.get_index()
+        self.assertIsNotNone(index.chapter("first", "hello-world"))
+
+    def test_orders_journeys(self):
+        self.write("second.toml", SECOND)
+        index = journeys.get_index()
+        self.assertEqual(list(index.journeys), ["second", "first"])
+
+    def test_reuses_the_index_while_nothing_changes(self):
+        self.assertIs(journeys.get_index(), journeys.get_index())
+
+    def test_rebuilds_when_a_file_is_added(self):
+        before = journeys.get_index()
+        self.write("second.toml", SECOND)
+        after = journeys.get_index()
+        self.assertIsNot(before, after)
+        self.assertIn("second", after.journeys)
+
+    def test_rebuilds_when_a_file_changes(self):
+        before = journeys.get_index()
+        mtime_ns = (self.path / "first.toml").stat().st_mtime_ns
+        self.write("first.toml", FIRST.replace("First", "Premier"), mtime_ns + 1)
+        after = journeys.get_index()
+        self.assertNotEqual(before.etag, after.etag)
+        self.assertEqual(after.journeys["first"]["title"], "Premier")
+
+    def test_skips_a_broken_file(self):
+        self.write("broken.toml", "title = ")
+        self.assertEqual(list(journeys.get_index().journeys), ["first"])
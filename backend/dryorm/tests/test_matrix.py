@@ -115,3 +115,20 @@ class TestCaching:
         old = run_cached(code, orm_version="django-4.2.26")
         new = run_cached(code, orm_version="django-6.0")
         assert old["result"]["returned"] != new["result"]["returned"]
+
+    def test_a_cached_nondeterministic_result_is_marked(
+        self, run_cached, unique_snippet
+    ):
+        code = unique_snippet('import uuid; return {"id": str(uuid.uuid4())}')
+        first = run_cached(code)
+        second = run_cached(code)
+        assert "cached" not in first
+        assert second["cached"] is True
+        assert second["result"] == first["result"]
+
+    def test_a_cached_deterministic_result_is_not_marked(
+        self, run_cached, unique_snippet
+    ):
+        code = unique_snippet('return {"n": 1}')
+        run_cached(code)
+        assert "cached" not in run_cached(code)
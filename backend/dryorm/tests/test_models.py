@@ -1,6 +1,6 @@
 from django.test import TestCase
 
-from dryorm.models import Snippet, generate_random_string
+from dryorm.models import CodeBlob, Snippet, code_digest, generate_random_string
 
 
 class GenerateRandomStringTest(TestCase):
@@ -63,3 +63,65 @@ class SnippetModelTest(TestCase):
         )
         self.assertIsNotNone(snippet.id)
         self.assertEqual(snippet.name, "URL Test")
+
+
+class SnippetSearchTest(TestCase):
+    def setUp(self):
+        self.snippet = Snippet.objects.create_snippet(
+            name="Window functions",
+            code="from django.db.models import Window",
+            database="postgres",
+            private=False,
+        )
+
+    def test_search_finds_name_and_code(self):
+        self.assertEqual(list(Snippet.objects.search("window")), [self.snippet])
+        self.assertEqual(list(Snippet.objects.search("models")), [self.snippet])
+
+    def test_search_follows_edits(self):
+        self.snippet.code = "from django.db.models import Subquery"
+        self.snippet.save()
+        self.assertEqual(list(Snippet.objects.search("subquery")), [self.snippet])
+
+    def test_search_requires_every_word(self):
+        self.assertFalse(Snippet.objects.search("window subquery").exists())
+
+    def test_public_excludes_private(self):
+        self.snippet.private = True
+        self.snippet.save()
+        self.assertFalse(Snippet.objects.public().exists())
+
+    def test_summaries_leave_out_code_and_result(self):
+        snippet = Snippet.objects.summaries().get()
+        self.assertIn("blob_id", snippet.get_deferred_fields())
+        self.assertIn("result", snippet.get_deferred_fields())
+        self.assertEqual(snippet.name, "Window functions")
+
+
+class CodeBlobTest(TestCase):
+    def create(self, name, code):
+        return Snippet.objects.create_snippet(
+            name=name, code=code, database="sqlite", private=False
+        )
+
+    def test_identical_code_is_stored_once(self):
+        first = self.create("First", "# shared")
+        second = self.create("Second", "# shared")
+        self.assertEqual(first.blob_id, second.blob_id)
+        self.assertEqual(first.blob_id, code_digest("# shared"))
+        self.assertEqual(CodeBlob.objects.count(), 1)
+
+    def test_code_reads_through_the_blob(self):
+        self.create("First", "# shared")
+        self.assertEqual(Snippet.objects.get().code, "# shared")
+
+    def test_editing_code_moves_to_another_blob(self):
+        snippet = self.create("First", "# shared")
+        self.create("Second", "# shared")
+
+        snippet.code = "# edited"
+        snippet.save()
+
+        self.assertEqual(Snippet.objects.get(pk=snippet.pk).code, "# edited")
+        self.assertEqual(Snippet.objects.get(name="Second").code, "# shared")
+        self.assertEqual(CodeBlob.objects.count(), 2)
@@ -6,9 +6,9 @@ on the state of the host rather than the code being run.
 """
 
 import pytest
-import redis
 
 from dryorm import constants
+from dryorm import redis_pool
 from dryorm.tasks import run_django_sync
 
 pytestmark = pytest.mark.integration
@@ -20,7 +20,7 @@ TRIVIAL = "def run():\n    return {}\n"
 @pytest.fixture
 def saturated_slots():
     """Fill the container slots so the next request is rejected."""
-    client = redis.Redis("redis")
+    client = redis_pool.get_client()
     executor = constants.get_executor("sqlite", "django-5.2.8")
     previous = client.get(CONTAINER_COUNT_KEY)
     client.set(CONTAINER_COUNT_KEY, executor.max_containers, ex=60)
@@ -42,7 +42,7 @@ class TestOverloaded:
         assert str(saturated_slots.max_containers) in reply["error"]
 
     def test_does_not_consume_a_slot_when_rejected(self, saturated_slots):
-        client = redis.Redis("redis")
+        client = redis_pool.get_client()
         run_django_sync(TRIVIAL, "sqlite", ignore_cache=True)
         assert int(client.get(CONTAINER_COUNT_KEY)) == saturated_slots.max_containers
 
@@ -86,7 +86,7 @@ class TestImageNotFound:
             )
 
         monkeypatch.setattr(tasks.constants, "get_executor", missing)
-        client = redis.Redis("redis")
+        client = redis_pool.get_client()
         client.delete(CONTAINER_COUNT_KEY)
         run_django_sync(TRIVIAL, "sqlite", ignore_cache=True)
         assert int(client.get(CONTAINER_COUNT_KEY) or 0) == 0
@@ -0,0 +1,110 @@
+import socket
+import threading
+import time
+from unittest.mock import patch
+
+import redis
+from django.test import SimpleTestCase
+from prometheus_client import REGISTRY
+
+from dryorm import redis_pool
+
+
+def count(name):
+    return REGISTRY.get_sample_value(name) or 0
+
+
+class FakeRedisServer:
+    """Answers the handshake, then +PONG to every command, or never answers."""
+
+    def __init__(self, silent=False):
+        self.silent = silent
+        self.listener = socket.socket()
+        self.listener.bind(("127.0.0.1", 0))
+        self.listener.listen()
+        self.url = f"redis://127.0.0.1:{self.listener.getsockname()[1]}/0"
+        threading.Thread(target=self.accept, daemon=True).start()
+
+    def accept(self):
+        while True:
+            try:
+                connection, _ = self.listener.accept()
+            except OSError:
+                return
+            threading.Thread(target=self.serve, args=(connection,), daemon=True).start()
+
+    def serve(self, connection):
+        reader = connection.makefile("rb")
+        try:
+            while header := reader.readline():
+                # A command is an array of bulk strings: *<n>, then $<len> and data per item.
+                items = []
+                for _ in range(int(header[1:])):
+                    reader.readline()
+                    items.append(reader.readline().strip())
+                if items[0].upper() == b"HELLO":
+                    connection.sendall(b"%1\r\n+proto\r\n:3\r\n")
+                elif not self.silent:
+                    connection.sendall(b"+PONG\r\n")
+        except (OSError, ValueError):
+            pass
+
+    def close(self):
+        self.listener.close()
+
+
+class RedisPoolTest(SimpleTestCase):
+    def serve(self, silent=False, **settings):
+        server = FakeRedisServer(silent)
+        self.addCleanup(server.close)
+        for patcher in [
+            patch.dict(redis_pool._pools, clear=True),
+            patch.object(redis_pool, "REDIS_URL", server.url),
+            *(patch.object(redis_pool, name, value) for name, value in settings.items()),
+        ]:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_clients_share_one_pool(self):
+        self.serve()
+        self.assertIs(
+            redis_pool.get_client().connection_pool,
+            redis_pool.get_client().connection_pool,
+        )
+
+    def test_connections_are_reused(self):
+        self.serve()
+        names = [
+            "dryorm_redis_connects_total",
+            "dryorm_redis_pool_checkout_seconds_count",
+            "dryorm_redis_reply_seconds_count",
+            "dryorm_redis_errors_total",
+        ]
+        before = {name: count(name) for name in names}
+        for _ in range(5):
+            self.assertTrue(redis_pool.get_client().ping())
+
+        counts = {name: count(name) - before[name] for name in names}
+        self.assertEqual(counts["dryorm_redis_connects_total"], 1)
+        self.assertEqual(counts["dryorm_redis_pool_checkout_seconds_count"], 5)
+        self.assertGreaterEqual(counts["dryorm_redis_reply_seconds_count"], 5)
+        self.assertEqual(counts["dryorm_redis_errors_total"], 0)
+
+    def test_unresponsive_redis_times_out(self):
+        self.serve(silent=True, SOCKET_TIMEOUT=0.2)
+        errors = count("dryorm_redis_errors_total")
+        started = time.monotonic()
+        with self.assertRaises(redis.TimeoutError):
+            redis_pool.get_client().get("key")
+
+        self.assertLess(time.monotonic() - started, 2)
+        self.assertEqual(count("dryorm_redis_errors_total"), errors + 1)
+
+    def test_healthy(self):
+        self.serve()
+        self.assertTrue(redis_pool.healthy())
+
+    def test_unreachable_redis_is_unhealthy(self):
+        self.serve()
+        with patch.object(redis_pool, "REDIS_URL", "redis://127.0.0.1:1/0"):
+            self.assertFalse(redis_pool.healthy())
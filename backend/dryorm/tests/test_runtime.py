@@ -0,0 +1,254 @@
+import io
+import json
+import tarfile
+from unittest.mock import MagicMock, patch
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from prometheus_client import REGISTRY
+
+from dryorm import constants
+from dryorm import runtime
+from dryorm import tasks
+from dryorm.tests import LOCMEM_CACHES
+
+
+def tar_stream(name, content):
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w") as tar:
+        info = tarfile.TarInfo(name)
+        info.size = len(content)
+        tar.addfile(info, io.BytesIO(content))
+    return [buffer.getvalue()]
+
+
+class ContainerRuntimeTest(SimpleTestCase):
+    def test_client_is_shared(self):
+        client = MagicMock()
+        containers = runtime.ContainerRuntime(client=client)
+        containers.create("image", "name", [], "100m", "net")
+        containers.create("image", "name", [], "100m", "net")
+        self.assertEqual(client.containers.create.call_count, 2)
+        self.assertIs(containers.client, client)
+
+    def test_read_file_from_archive(self):
+        container = MagicMock()
+        container.get_archive.return_value = (tar_stream("result.json", b"{}"), {})
+        containers = runtime.ContainerRuntime(client=MagicMock())
+        self.assertEqual(containers.read_file(container, "/tmp/result.json"), b"{}")
+
+    def test_read_missing_file(self):
+        container = MagicMock()
+        container.get_archive.side_effect = runtime.APIError("No such file")
+        containers = runtime.ContainerRuntime(client=MagicMock())
+        self.assertIsNone(containers.read_file(container, "/tmp/result.json"))
+
+    def test_fake_runtime_runs_the_handler(self):
+        def handler(container):
+            container.files["/tmp/result.json"] = b"{}"
+
+        containers = runtime.FakeRuntime(handler)
+        container = containers.create("image", "name", [], "100m", "net")
+        containers.start(container)
+        self.assertEqual(containers.wait(container), 0)
+        self.assertEqual(containers.read_file(container, "/tmp/result.json"), b"{}")
+        containers.remove(container)
+        self.assertTrue(container.removed)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+@patch("dryorm.tasks.redis_pool.get_client", MagicMock())
+class RunWithFakeRuntimeTest(SimpleTestCase):
+    """run_django_sync against FakeRuntime, with the container slots mocked out."""
+
+    def setUp(self):
+        cache.clear()
+
+    def run_with(self, handler, **kwargs):
+        containers = runtime.FakeRuntime(handler, **kwargs)
+        with patch("dryorm.tasks.runtime.get_runtime", return_value=containers):
+            result = tasks.run_django_sync("print(1)", "sqlite", orm_version="django-5.2.8")
+        return result, containers
+
+    def test_job_done(self):
+        def handler(container):
+            self.assertEqual(container.env["CODE"], "print(1)")
+            container.files["/tmp/result.json"] = json.dumps({"output": "1\n"}).encode()
+
+        result, containers = self.run_with(handler)
+        self.assertEqual(result["event"], constants.JOB_DONE_EVENT)
+        self.assertEqual(result["result"]["output"], "1\n")
+        self.assertTrue(containers.containers[0].removed)
+
+    def test_timeout(self):
+        def handler(container):
+            container.exit_code = 124
+
+        result, _ = self.run_with(handler)
+        self.assertEqual(result["event"], constants.JOB_TIMEOUT_EVENT)
+
+    def test_code_error_reads_error_log(self):
+        def handler(container):
+            container.exit_code = 1
+            container.files["/tmp/error.log"] = b"NameError: name 'x' is not defined"
+
+        result, _ = self.run_with(handler)
+        self.assertEqual(result["event"], constants.JOB_CODE_ERROR_EVENT)
+        self.assertIn("NameError", result["error"])
+
+    def test_code_error_falls_back_to_logs(self):
+        def handler(container):
+            container.exit_code = 1
+            container.output = b"Traceback: boom"
+
+        result, _ = self.run_with(handler)
+        self.assertEqual(result["error"], "Traceback: boom")
+
+    def test_missing_image(self):
+        executor = constants.get_executor("sqlite", "django-5.2.8")
+        result, _ = self.run_with(None, missing_images=[executor.image])
+        self.assertEqual(result["event"], constants.JOB_IMAGE_NOT_FOUND_ERROR_EVENT)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class PipelineTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        patcher = patch("dryorm.tasks.redis_pool.get_client")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def handler(self, container):
+        container.files["/tmp/result.json"] = b"{}"
+
+    def test_every_stage_is_timed(self):
+        containers = runtime.FakeRuntime(self.handler)
+        with patch("dryorm.tasks.runtime.get_runtime", return_value=containers):
+            execution = tasks.ORMVersionPipeline("sqlite", "django-5.2.8").execute("print(1)")
+
+        self.assertEqual(execution.reply["event"], constants.JOB_DONE_EVENT)
+        self.assertLessEqual({*tasks.Pipeline.stages, "cleanup"}, set(execution.timings))
+        self.assertEqual(execution.reply["timings"]["backend"], execution.timings)
+
+    def test_executor_timings_are_reported_but_not_cached(self):
+        def handler(container):
+            result = {"output": "", "timings": {"migrate": 120.0, "run": 5.0}}
+            container.files["/tmp/result.json"] = json.dumps(result).encode()
+
+        containers = runtime.FakeRuntime(handler)
+        with patch("dryorm.tasks.runtime.get_runtime", return_value=containers):
+            pipeline = tasks.ORMVersionPipeline("sqlite", "django-5.2.8")
+            fresh = pipeline.execute("print(1)").reply
+            cached = pipeline.execute("print(1)").reply
+
+        self.assertEqual(fresh["timings"]["executor"], {"migrate": 120.0, "run": 5.0})
+        self.assertNotIn("timings", fresh["result"])
+        self.assertEqual(cached["timings"]["executor"], {})
+        self.assertNotIn("timings", cached["result"])
+
+    def test_replies_carry_their_parts_inline_not_blob_references(self):
+        def handler(container):
+            container.files["/tmp/result.json"] = json.dumps({"output": "x" * 1000}).encode()
+
+        containers = runtime.FakeRuntime(handler)
+        with patch("dryorm.tasks.runtime.get_runtime", return_value=containers):
+            pipeline = tasks.ORMVersionPipeline("sqlite", "django-5.2.8")
+            fresh = pipeline.execute("print(1)").reply
+            cached = pipeline.execute("print(1)").reply
+
+        for reply in (fresh, cached):
+            self.assertNotIn("blobs", reply)
+            self.assertEqual(reply["result"]["output"], "x" * 1000)
+
+    def test_executions_are_counted(self):
+        labels = {"executor": "python/django/sqlite/5.2.8", "database": "sqlite", "event": constants.JOB_DONE_EVENT}
+
+        def count(name, **labels):
+            return REGISTRY.get_sample_value(name, labels) or 0
+
+        before = count("dryorm_execution_events_total", **labels)
+        hits = count("dryorm_result_cache_lookups_total", result="hit")
+        containers = runtime.FakeRuntime(self.handler)
+        with patch("dryorm.tasks.runtime.get_runtime", return_value=containers):
+            pipeline = tasks.ORMVersionPipeline("sqlite", "django-5.2.8")
+            pipeline.execute("print(1)")
+            pipeline.execute("print(1)")
+
+        self.assertEqual(count("dryorm_execution_events_total", **labels), before + 2)
+        self.assertEqual(count("dryorm_result_cache_lookups_total", result="hit"), hits + 1)
+
+    def test_cache_hit_ends_at_admission(self):
+        containers = runtime.FakeRuntime(self.handler)
+        with patch("dryorm.tasks.runtime.get_runtime", return_value=containers):
+            pipeline = tasks.ORMVersionPipeline("sqlite", "django-5.2.8")
+            pipeline.execute("print(1)")
+            execution = pipeline.execute("print(1)")
+
+        self.assertEqual(execution.reply["event"], constants.JOB_DONE_EVENT)
+        self.assertEqual(list(execution.timings), ["admission", "cleanup"])
+        self.assertIn("timings", execution.reply)
+        self.assertEqual(len(containers.containers), 1)
+
+    def test_explain_is_passed_on_and_cached_apart(self):
+        containers = runtime.FakeRuntime(self.handler)
+        with patch("dryorm.tasks.runtime.get_runtime", return_value=containers):
+            pipeline = tasks.ORMVersionPipeline("sqlite", "django-5.2.8")
+            pipeline.execute("print(1)")
+            pipeline.execute("print(1)", options={"explain": "analyze"})
+            pipeline.execute("print(1)", options={"explain": "analyze"})
+
+        plain, explained = containers.containers
+        self.assertNotIn("EXPLAIN=analyze", plain.environment)
+        self.assertIn("EXPLAIN=analyze", explained.environment)
+        self.assertNotEqual(
+            tasks.result_cache_key("print(1)", "sqlite", orm_version="django-5.2.8"),
+            tasks.result_cache_key("print(1)", "sqlite", orm_version="django-5.2.8", options={"explain": "analyze"}),
+        )
+
+    def test_flag_options_are_passed_as_1(self):
+        containers = runtime.FakeRuntime(self.handler)
+        with patch("dryorm.tasks.runtime.get_runtime", return_value=containers):
+            tasks.ORMVersionPipeline("sqlite", "django-5.2.8").execute("print(1)", options={"benchmark": True})
+
+        self.assertIn("BENCHMARK=1", containers.containers[0].environment)
+
+    def test_oom_reply_carries_the_last_memory_sample(self):
+        def handler(container):
+            container.exit_code = 137
+            sample = {"rss_kb": 74000, "peak_rss_kb": 76000, "growth_by_line": [{"line_number": 4, "size_kb": 60000, "samples": 9}]}
+            container.files["/tmp/memory.json"] = json.dumps(sample).encode()
+
+        containers = runtime.FakeRuntime(handler)
+        with patch("dryorm.tasks.runtime.get_runtime", return_value=containers):
+            reply = tasks.ORMVersionPipeline("sqlite", "django-5.2.8").execute("print(1)").reply
+
+        self.assertEqual(reply["event"], constants.JOB_OOM_KILLED_EVENT)
+        self.assertEqual(reply["memory"]["limit"], "75m")
+        self.assertEqual(reply["memory"]["peak_rss_kb"], 76000)
+        self.assertEqual(reply["memory"]["growth_by_line"][0]["line_number"], 4)
+
+    def test_stage_failure_still_cleans_up(self):
+        containers = runtime.FakeRuntime(self.handler)
+        with patch("dryorm.tasks.runtime.get_runtime", return_value=containers):
+            pipeline = tasks.ORMVersionPipeline("sqlite", "django-5.2.8")
+            with patch.object(pipeline, "collect", side_effect=RuntimeError("boom")):
+                execution = pipeline.execute("print(1)")
+
+        self.assertEqual(execution.reply["event"], constants.JOB_INTERNAL_ERROR_EVENT)
+        self.assertIn("boom", execution.reply["error"])
+        self.assertTrue(containers.containers[0].removed)
+        pipeline.redis.decr.assert_called_once_with(tasks.CONTAINER_COUNT_KEY)
+
+    def test_ref_mode_mounts_the_source(self):
+        containers = runtime.FakeRuntime(self.handler)
+        with patch("dryorm.tasks.runtime.get_runtime", return_value=containers):
+            reply = tasks.run_django_ref_sync(
+                "print(1)", "sqlite", ref_type="pr", ref_id="1", ref_sha="abc", ref_host_path="/refs/pr-1"
+            )
+
+        self.assertEqual(reply["event"], constants.JOB_DONE_EVENT)
+        container = containers.containers[0]
+        self.assertTrue(container.name.startswith("executor-ref-"))
+        self.assertEqual(container.volumes, {"/refs/pr-1": {"bind": "/django-ref", "mode": "ro"}})
+        self.assertIsNotNone(cache.get(tasks.result_cache_key("print(1)", "sqlite", ref_type="pr", ref_id="1", ref_sha="abc")))
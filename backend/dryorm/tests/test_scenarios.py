@@ -154,6 +154,47 @@ class TestQueryCapture:
         assert len(hidden["queries"]) < len(visible["queries"])
 
 
+class TestQueryAnalysis:
+    def test_flags_the_n_plus_one(self, run):
+        result = run(
+            """
+            from django.db import models
+
+            class Author(models.Model):
+                name = models.CharField(max_length=100)
+
+            class Post(models.Model):
+                title = models.CharField(max_length=200)
+                author = models.ForeignKey(Author, on_delete=models.CASCADE)
+
+            def run():
+                for name in ["Ada", "Grace", "Barbara"]:
+                    Post.objects.create(title=name, author=Author.objects.create(name=name))
+                return {"names": [p.author.name for p in Post.objects.all()]}
+            """
+        )
+        [finding] = result["analysis"]["n_plus_one"]
+        assert finding["count"] == 3
+        assert finding["table"] == "app_author"
+        assert finding["suggestion"] == "select_related"
+        assert finding["line_number"] is not None
+
+    def test_joined_query_is_not_flagged(self, run):
+        result = run(
+            BLOG.replace(
+                'return {"posts": Post.objects.count()}',
+                'return {"names": [p.author.name for p in Post.objects.select_related("author")]}',
+            )
+        )
+        assert result["analysis"]["n_plus_one"] == []
+
+    def test_flags_duplicates(self, run):
+        result = run(BLOG.replace("return {", "Post.objects.count()\n        return {"))
+        [duplicate] = result["analysis"]["duplicates"]
+        assert duplicate["count"] == 2
+        assert duplicate["saved_queries"] == 1
+
+
 class TestERD:
     def test_produces_a_diagram(self, run):
         assert run(BLOG)["erd"]
@@ -227,6 +268,8 @@ class TestFailureModes:
             """
         )
         assert reply["event"] == constants.JOB_OOM_KILLED_EVENT
+        assert reply["memory"]["limit"] == "75m"
+        assert reply["memory"]["peak_rss_kb"] > 0
 
 
 class TestIsolation:
@@ -243,3 +286,228 @@ class TestIsolation:
         """
         assert run(snippet)["returned"] == {"count": 1}
         assert run(snippet)["returned"] == {"count": 1}
+
+
+class TestBenchmark:
+    def test_times_each_bench_function(self, run):
+        result = run(
+            """
+            from django.db import models
+
+            class Row(models.Model):
+                name = models.CharField(max_length=10)
+
+            def bench_loop():
+                for i in range(20):
+                    Row.objects.create(name=str(i))
+
+            def bench_bulk():
+                Row.objects.bulk_create(Row(name=str(i)) for i in range(20))
+
+            def bench_read():
+                Row.objects.bulk_create(Row(name=str(i)) for i in range(20))
+                list(Row.objects.all())
+                Row.objects.first()
+
+            def run():
+                return {"rows": Row.objects.count()}
+            """,
+            options={"benchmark": True},
+        )
+        benches = result["benchmark"]
+        loop, bulk, read = benches["bench_loop"], benches["bench_bulk"], benches["bench_read"]
+        assert loop["iterations"] >= 3
+        assert loop["min"] <= loop["median"] <= loop["p95"]
+        assert (loop["queries"], bulk["queries"]) == (20, 1)
+        assert loop["rows_written"] == bulk["rows_written"] == 20
+        assert loop["rows_read"] == bulk["rows_read"] == 0
+        assert read["rows_read"] == 21
+        # Every iteration was rolled back.
+        assert result["returned"] == {"rows": 0}
+
+    def test_benchmarks_run_without_bench_functions(self, run):
+        result = run(BLOG, options={"benchmark": True})
+        assert list(result["benchmark"]) == ["run"]
+
+
+class TestProfile:
+    def test_returns_collapsed_stacks_of_snippet_and_django_frames(self, run):
+        result = run(
+            """
+            from django.db import models
+
+            class Row(models.Model):
+                name = models.CharField(max_length=10)
+
+            def run():
+                Row.objects.bulk_create(Row(name=str(i)) for i in range(20000))
+                return {"rows": len(list(Row.objects.all()))}
+            """,
+            options={"profile": True},
+        )
+        profile = result["profile"]
+        assert profile["total_us"] > 0
+        stacks = [line.rsplit(" ", 1)[0] for line in profile["stacks"].splitlines()]
+        assert all(stack.startswith("run (models.py:") for stack in stacks if stack != "(other stacks)")
+        assert any("(django/db/models/" in stack for stack in stacks)
+
+
+class TestSeed:
+    def test_seeds_100k_rows_without_logging_them(self, run):
+        result = run(
+            """
+            import itertools
+            from django.db import models
+
+            class Author(models.Model):
+                name = models.CharField(max_length=100)
+
+            class Book(models.Model):
+                title = models.CharField(max_length=200)
+                author = models.ForeignKey(Author, on_delete=models.CASCADE)
+                price = models.DecimalField(max_digits=6, decimal_places=2)
+                notes = models.TextField(null=True)
+
+            def run():
+                _seed(Author, 100)
+                _seed(Book, 100_000, title=lambda i: f"Book {i}", price=itertools.cycle([5, 10]))
+                return {"books": Book.objects.count(), "first_author": Book.objects.filter(author_id=1).count()}
+            """
+        )
+        assert result["returned"] == {"books": 100_000, "first_author": 1000}
+        assert not any("INSERT" in q["sql"] for q in result["queries"])
+
+    def test_made_up_values_are_not_nondeterminism(self, run):
+        result = run(
+            """
+            import uuid
+            from django.db import models
+
+            class Event(models.Model):
+                key = models.UUIDField()
+                at = models.DateTimeField()
+                created = models.DateTimeField(auto_now_add=True)
+
+            def run():
+                _seed(Event, 100)
+                return {"keys": Event.objects.values("key").distinct().count()}
+            """
+        )
+        assert result["returned"] == {"keys": 100}
+        assert result["nondeterministic"] == []
+
+    def test_asks_for_fields_it_cannot_make_up(self, run_raw):
+        reply = run_raw(
+            """
+            from django.db import models
+
+            class Author(models.Model):
+                name = models.CharField(max_length=100)
+
+            class Book(models.Model):
+                author = models.ForeignKey(Author, on_delete=models.CASCADE)
+
+            def run():
+                _seed(Book, 10)
+            """
+        )
+        assert reply["event"] == constants.JOB_CODE_ERROR_EVENT
+        assert "has no rows to point at" in reply["error"]
+
+
+class TestMemory:
+    def test_reports_peak_rss(self, run):
+        memory = run(BLOG)["memory"]
+        assert memory["peak_rss_kb"] > 0
+        assert "growth_by_line" not in memory
+
+    def test_finds_the_line_memory_grows_on(self, run):
+        result = run(
+            """
+            def run():
+                small = [i for i in range(1000)]
+                big = ["x" * 1000 + str(i) for i in range(50000)]
+                return {"items": len(small) + len(big)}
+            """,
+            options={"memory": True},
+        )
+        memory = result["memory"]
+        assert memory["traced_peak_kb"] > 40000
+        assert memory["growth_by_line"][0]["line_number"] == 3
+
+
+class TestNondeterminism:
+    def test_a_deterministic_snippet_reports_no_sources(self, run):
+        assert run(BLOG)["nondeterministic"] == []
+
+    def test_reports_the_random_module(self, run):
+        result = run(
+            """
+            import random
+
+            def run():
+                return {"n": random.randint(1, 6)}
+            """
+        )
+        assert result["nondeterministic"] == ["random"]
+
+    def test_reports_faker(self, run):
+        result = run(
+            """
+            from faker import Faker
+
+            def run():
+                return {"name": Faker().name()}
+            """
+        )
+        assert "random" in result["nondeterministic"]
+
+    def test_reports_uuid(self, run):
+        result = run(
+            """
+            import uuid
+
+            def run():
+                return {"id": str(uuid.uuid4())}
+            """
+        )
+        assert result["nondeterministic"] == ["uuid"]
+
+    def test_reports_auto_now_fields(self, run):
+        result = run(
+            """
+            from django.db import models
+
+            class Event(models.Model):
+                at = models.DateTimeField(auto_now_add=True)
+
+            def run():
+                Event.objects.create()
+                return {}
+            """
+        )
+        assert result["nondeterministic"] == ["timezone.now"]
+
+    def test_reports_random_ordering(self, run):
+        result = run(
+            """
+            from django.db import models
+
+            class Thing(models.Model):
+                name = models.CharField(max_length=10)
+
+            def run():
+                return {"things": list(Thing.objects.order_by("?").values())}
+            """
+        )
+        assert result["nondeterministic"] == ["order_by('?')"]
+
+    def test_module_level_calls_count(self, run):
+        result = run(
+            """
+            import random
+
+            SEED = random.random()
+            """
+        )
+        assert result["nondeterministic"] == ["random"]
@@ -1,9 +1,16 @@
+import asyncio
 import json
-from unittest.mock import patch
+import time
+from unittest.mock import AsyncMock, patch
 
-from django.test import TestCase, Client
+from django.core.cache import cache
+from django.test import AsyncClient, TestCase, Client, override_settings
 
+from dryorm import blobs
+from dryorm import tasks
+from dryorm import templates
 from dryorm.models import Snippet
+from dryorm.tests import LOCMEM_CACHES
 
 
 class ConfigAPITest(TestCase):
@@ -37,9 +44,27 @@ class ConfigAPITest(TestCase):
         response = self.client.post("/api/config")
         self.assertEqual(response.status_code, 405)
 
+    def test_config_api_is_cacheable(self):
+        response = self.client.get("/api/config")
+        self.assertTrue(response["ETag"].startswith('"'))
+        self.assertIn("max-age=", response["Cache-Control"])
+
+    def test_config_api_not_modified(self):
+        etag = self.client.get("/api/config")["ETag"]
+        response = self.client.get("/api/config", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+
+    def test_config_api_template_code(self):
+        data = self.client.get("/api/config").json()
+        basic = next(t for t in data["templates"]["django"] if t["value"] == "basic")
+        self.assertEqual(basic["code"], templates.BASIC)
+
 
+@override_settings(CACHES=LOCMEM_CACHES)
 class SnippetsAPITest(TestCase):
     def setUp(self):
+        cache.clear()
         self.client = Client()
         Snippet.objects.create_snippet(
             name="Public Snippet 1",
@@ -78,6 +103,34 @@ class SnippetsAPITest(TestCase):
         self.assertEqual(len(data["snippets"]), 1)
         self.assertEqual(data["snippets"][0]["name"], "Public Snippet 1")
 
+    def test_snippets_api_search_matches_prefixes(self):
+        response = self.client.get("/api/snippets?q=publ")
+        data = response.json()
+        self.assertEqual(len(data["snippets"]), 2)
+
+    def test_snippets_api_search_ranks_name_above_code(self):
+        Snippet.objects.create_snippet(
+            name="Aggregates",
+            code="# prefetch_related across relations",
+            database="sqlite",
+            private=False,
+        )
+        Snippet.objects.create_snippet(
+            name="Prefetch",
+            code="# the basics",
+            database="sqlite",
+            private=False,
+        )
+        response = self.client.get("/api/snippets?q=prefetch")
+        names = [s["name"] for s in response.json()["snippets"]]
+        self.assertEqual(names, ["Prefetch", "Aggregates"])
+
+    def test_snippets_api_search_without_words(self):
+        response = self.client.get("/api/snippets?q=%23%21")
+        data = response.json()
+        self.assertEqual(data["snippets"], [])
+        self.assertEqual(data["pagination"]["total"], 0)
+
     def test_snippets_api_pagination(self):
         response = self.client.get("/api/snippets")
         data = response.json()
@@ -86,9 +139,78 @@ class SnippetsAPITest(TestCase):
         self.assertIn("totalPages", data["pagination"])
         self.assertIn("total", data["pagination"])
 
+    def test_snippets_api_total_is_estimated_when_listing(self):
+        data = self.client.get("/api/snippets").json()
+        self.assertEqual(data["pagination"]["total"], 2)
+        self.assertTrue(data["pagination"]["estimated"])
+
+        data = self.client.get("/api/snippets?q=public").json()
+        self.assertFalse(data["pagination"]["estimated"])
+
+    def test_snippets_api_cursor_pages_through_everything(self):
+        for i in range(45):
+            Snippet.objects.create_snippet(
+                name=f"Extra {i}", code="# extra", database="sqlite", private=False
+            )
+
+        names, cursor, pages = [], "", 0
+        while cursor is not None:
+            data = self.client.get("/api/snippets", {"cursor": cursor}).json()
+            names += [s["name"] for s in data["snippets"]]
+            cursor = data["pagination"]["nextCursor"]
+            pages += 1
+
+        self.assertEqual(pages, 3)
+        self.assertEqual(len(names), 47)
+        self.assertEqual(len(set(names)), 47)
+        self.assertEqual(names[0], "Extra 44")
+
+    def test_snippets_api_cursor_follows_search_rank(self):
+        for i in range(25):
+            Snippet.objects.create_snippet(
+                name=f"Extra {i}", code="# public", database="sqlite", private=False
+            )
+
+        first = self.client.get("/api/snippets", {"q": "public", "cursor": ""}).json()
+        second = self.client.get(
+            "/api/snippets", {"q": "public", "cursor": first["pagination"]["nextCursor"]}
+        ).json()
+
+        names = [s["name"] for s in first["snippets"] + second["snippets"]]
+        self.assertEqual(len(set(names)), 27)
+        # The two with "public" in their name outrank the rest.
+        self.assertEqual(set(names[:2]), {"Public Snippet 1", "Public Snippet 2"})
+        self.assertIsNone(second["pagination"]["nextCursor"])
+        self.assertIsNone(second["pagination"]["total"])
+
+    def test_snippets_api_invalid_cursor(self):
+        response = self.client.get("/api/snippets?cursor=not-a-cursor")
+        self.assertEqual(response.status_code, 400)
+
+    def test_snippets_api_search_cursor_is_invalid_for_the_listing(self):
+        for i in range(25):
+            Snippet.objects.create_snippet(
+                name=f"Extra {i}", code="# public", database="sqlite", private=False
+            )
+        search = self.client.get("/api/snippets", {"q": "public", "cursor": ""}).json()
+        listing = self.client.get("/api/snippets", {"cursor": ""}).json()
+
+        response = self.client.get("/api/snippets", {"cursor": search["pagination"]["nextCursor"]})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get("/api/snippets", {"q": "public", "cursor": listing["pagination"]["nextCursor"]})
+        self.assertEqual(response.status_code, 400)
 
+
+def cache_result(code, database, output, event="job-done", **version):
+    """Leave a finished run of code in the result cache, as /execute would."""
+    reply = {"event": event, "result": {"output": output, "queries": []}}
+    tasks.store_reply(tasks.result_cache_key(code, database, **version), reply)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
 class SnippetAPITest(TestCase):
     def setUp(self):
+        cache.clear()
         self.client = Client()
         self.snippet = Snippet.objects.create_snippet(
             name="Test Snippet",
@@ -126,9 +248,48 @@ class SnippetAPITest(TestCase):
         self.assertEqual(data["refInfo"]["type"], "pr")
         self.assertEqual(data["refInfo"]["id"], "12345")
 
+    def test_snippet_api_without_a_result(self):
+        data = self.client.get(f"/api/snippet/{self.snippet.slug}").json()
+        self.assertIsNone(data["result"])
+
+    def test_snippet_api_keeps_the_cached_result(self):
+        cache_result("# test code", "sqlite", "hello", orm_version="django-5.2.8")
 
+        data = self.client.get(f"/api/snippet/{self.snippet.slug}").json()
+        self.assertEqual(data["result"]["result"]["output"], "hello")
+
+        # Still there once the cache has forgotten it.
+        cache.clear()
+        data = self.client.get(f"/api/snippet/{self.snippet.slug}").json()
+        self.assertEqual(data["result"]["result"]["output"], "hello")
+
+    def test_snippet_api_keeps_the_cached_result_of_a_ref_run(self):
+        sha = "0123456789abcdef0123456789abcdef01234567"
+        snippet = Snippet.objects.create_snippet(
+            name="PR Snippet",
+            code="# pr test",
+            database="postgres",
+            private=False,
+            ref_type="pr",
+            ref_id="12345",
+            sha=sha,
+        )
+        # /execute runs refs under the sha cut to 12 characters.
+        cache_result("# pr test", "postgres", "from the pr", ref_type="pr", ref_id="12345", ref_sha=sha[:12])
+
+        data = self.client.get(f"/api/snippet/{snippet.slug}").json()
+        self.assertEqual(data["result"]["result"]["output"], "from the pr")
+
+    def test_snippet_api_ignores_failed_runs(self):
+        cache_result("# test code", "sqlite", "", event="job-code-error", orm_version="django-5.2.8")
+        data = self.client.get(f"/api/snippet/{self.snippet.slug}").json()
+        self.assertIsNone(data["result"])
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
 class SaveViewTest(TestCase):
     def setUp(self):
+        cache.clear()
         self.client = Client()
 
     def test_save_creates_snippet(self):
@@ -213,6 +374,25 @@ class SaveViewTest(TestCase):
         self.assertEqual(snippet.name, "Updated")
         self.assertEqual(snippet.code, "# updated")
 
+    def test_save_keeps_the_result_of_the_last_run(self):
+        cache_result("# original", "sqlite", "first", orm_version="django-6.1")
+        response = self.client.post(
+            "/save",
+            data=json.dumps({"code": "# original\n", "database": "sqlite"}),
+            content_type="application/json",
+        )
+        slug = response.json()["slug"]
+        snippet = Snippet.objects.get(slug=slug)
+        self.assertEqual(json.loads(snippet.result)["result"]["output"], "first")
+
+        self.client.post(
+            "/save",
+            data=json.dumps({"slug": slug, "code": "# edited", "database": "sqlite"}),
+            content_type="application/json",
+        )
+        snippet.refresh_from_db()
+        self.assertEqual(snippet.result, "")
+
 
 class SearchRefsViewTest(TestCase):
     def setUp(self):
@@ -232,6 +412,13 @@ class SearchRefsViewTest(TestCase):
         response = self.client.post("/search-refs")
         self.assertEqual(response.status_code, 405)
 
+    @patch("dryorm.views.ref_service.search_branches", new_callable=AsyncMock)
+    def test_search_refs_branches(self, mock_search):
+        mock_search.return_value = [{"name": "main", "sha": "abc", "cached": False}]
+        response = self.client.get("/search-refs?type=branch&q=main")
+        self.assertEqual(response.json()["results"][0]["name"], "main")
+        mock_search.assert_awaited_once_with("main")
+
 
 class ExecuteViewTest(TestCase):
     def setUp(self):
@@ -259,6 +446,14 @@ class ExecuteViewTest(TestCase):
         response = self.client.get("/execute")
         self.assertEqual(response.status_code, 405)
 
+    def test_execute_invalid_option(self):
+        response = self.client.post(
+            "/execute",
+            data=json.dumps({"code": "print(1)", "explain": "verbose"}),
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 400)
+
     @patch("dryorm.views.tasks.run_django_sync")
     def test_execute_calls_task(self, mock_run):
         mock_run.return_value = {"event": "complete", "data": {}}
@@ -275,6 +470,166 @@ class ExecuteViewTest(TestCase):
         self.assertEqual(response.status_code, 200)
         mock_run.assert_called_once()
 
+    @override_settings(CACHES=LOCMEM_CACHES)
+    @patch("dryorm.views.tasks.run_django_sync")
+    def test_execute_refers_to_a_large_erd_by_digest(self, mock_run):
+        erd = "eNpLyy_KTS0qzszPAwAUyAPk" * 20
+        mock_run.return_value = {"event": "job-done", "result": {"output": "", "erd": erd}}
+
+        data = self.client.post(
+            "/execute",
+            data=json.dumps({"code": "print(1)", "database": "sqlite"}),
+            content_type="application/json",
+        ).json()
+        self.assertNotIn("erd", data["result"])
+
+        response = self.client.get(f"/api/blob/{data['blobs']['erd']}")
+        self.assertEqual(response.json(), erd)
+
+    @patch("dryorm.views.tasks.run_django_sync")
+    async def test_executions_run_concurrently(self, mock_run):
+        def slow_run(code, *args):
+            time.sleep(0.3)
+            return {"event": "job-done", "result": {"output": code}}
+
+        mock_run.side_effect = slow_run
+        client = AsyncClient()
+
+        started = time.monotonic()
+        responses = await asyncio.gather(*(
+            client.post(
+                "/execute",
+                data=json.dumps({"code": f"print({i})", "database": "sqlite"}),
+                content_type="application/json",
+            )
+            for i in range(5)
+        ))
+
+        self.assertLess(time.monotonic() - started, 1.0)
+        self.assertEqual(
+            sorted(r.json()["result"]["output"] for r in responses),
+            [f"print({i})" for i in range(5)],
+        )
+
+
+def matrix_reply(code, database, ignore_cache, orm_version):
+    queries = [{"sql": "CREATE TABLE app_book"}]
+    if orm_version != "django-4.2.26":
+        queries.append({"sql": "SELECT 1", "template": "SELECT 1"})
+    return {
+        "event": "job-done",
+        "result": {"output": f"{database}\n", "queries": queries, "returned": {"count": 1}},
+    }
+
+
+class ExecuteMatrixViewTest(TestCase):
+    async def post(self, payload):
+        response = await AsyncClient().post(
+            "/execute/matrix", data=json.dumps(payload), content_type="application/json"
+        )
+        if not response.streaming:
+            return response, None
+        body = b"".join([chunk async for chunk in response.streaming_content])
+        return response, [json.loads(line) for line in body.decode().splitlines()]
+
+    async def test_execute_matrix_no_code(self):
+        response, _ = await self.post({"databases": ["sqlite"]})
+        self.assertEqual(response.status_code, 400)
+
+    async def test_execute_matrix_unknown_database(self):
+        response, _ = await self.post({"code": "print(1)", "databases": ["oracle"]})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("oracle", response.json()["error"])
+
+    @patch("dryorm.views.tasks.run_django_sync", side_effect=matrix_reply)
+    async def test_execute_matrix_streams_cells_then_summary(self, mock_run):
+        response, lines = await self.post({
+            "code": "print(1)",
+            "databases": ["sqlite", "postgres"],
+            "orm_versions": ["django-6.1", "django-4.2.26"],
+        })
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        self.assertEqual(mock_run.call_count, 4)
+
+        cells, summary = lines[:-1], lines[-1]
+        self.assertEqual(
+            sorted((cell["database"], cell["orm_version"]) for cell in cells),
+            [("postgres", "django-4.2.26"), ("postgres", "django-6.1"),
+             ("sqlite", "django-4.2.26"), ("sqlite", "django-6.1")],
+        )
+        self.assertTrue(all(cell["type"] == "cell" for cell in cells))
+
+        self.assertEqual(summary["type"], "summary")
+        self.assertEqual(summary["cells"], 4)
+        self.assertEqual(summary["failed"], {})
+        self.assertTrue(summary["ddl"]["identical"])
+        self.assertTrue(summary["returned"]["identical"])
+        self.assertFalse(summary["output"]["identical"])
+        self.assertEqual(len(summary["output"]["groups"]), 2)
+
+        queries = summary["queries"]
+        self.assertFalse(queries["identical"])
+        first, second = queries["groups"]
+        self.assertEqual(first["cells"], ["postgres/django-4.2.26", "sqlite/django-4.2.26"])
+        self.assertEqual(first["diff"], [])
+        self.assertEqual(second["cells"], ["postgres/django-6.1", "sqlite/django-6.1"])
+        self.assertIn("+SELECT 1", second["diff"])
+
+    @patch("dryorm.views.tasks.run_django_sync")
+    async def test_execute_matrix_reports_failed_cells(self, mock_run):
+        def run(code, database, ignore_cache, orm_version):
+            if database == "postgres":
+                raise RuntimeError("docker is down")
+            return matrix_reply(code, database, ignore_cache, orm_version)
+
+        mock_run.side_effect = run
+        _, lines = await self.post({
+            "code": "print(1)", "databases": ["sqlite", "postgres"], "orm_versions": ["django-6.1"],
+        })
+        summary = lines[-1]
+        self.assertEqual(summary["failed"], {"postgres/django-6.1": "job-internal-error"})
+        self.assertEqual(summary["output"]["groups"], [{"cells": ["sqlite/django-6.1"], "diff": []}])
+
+    @patch("dryorm.views.tasks.run_django_sync")
+    async def test_execute_matrix_runs_cells_in_parallel(self, mock_run):
+        def slow_run(*args):
+            time.sleep(0.3)
+            return matrix_reply(*args)
+
+        mock_run.side_effect = slow_run
+        started = time.monotonic()
+        _, lines = await self.post({"code": "print(1)", "orm_versions": ["django-6.1"]})
+        self.assertLess(time.monotonic() - started, 0.3 * (len(lines) - 1) - 0.1)
+
+    @patch("dryorm.views.matrix.MATRIX_RETRY_INTERVAL", 0)
+    @patch("dryorm.views.tasks.run_django_sync")
+    async def test_execute_matrix_cells_wait_for_a_slot(self, mock_run):
+        overloaded = {"event": "job-overloaded", "error": "Server is busy"}
+        mock_run.side_effect = [overloaded, overloaded, matrix_reply("print(1)", "sqlite", False, "django-6.1")]
+
+        _, lines = await self.post({"code": "print(1)", "databases": ["sqlite"], "orm_versions": ["django-6.1"]})
+        cell, summary = lines
+        self.assertEqual(mock_run.call_count, 3)
+        self.assertEqual(cell["event"], "job-done")
+        self.assertEqual((summary["skipped"], summary["failed"]), ([], {}))
+
+    @patch("dryorm.views.matrix.MATRIX_SLOT_WAIT", 0)
+    @patch("dryorm.views.tasks.run_django_sync")
+    async def test_execute_matrix_skips_cells_that_never_get_a_slot(self, mock_run):
+        def run(code, database, ignore_cache, orm_version):
+            if database == "postgres":
+                return {"event": "job-overloaded", "error": "Server is busy"}
+            return matrix_reply(code, database, ignore_cache, orm_version)
+
+        mock_run.side_effect = run
+        _, lines = await self.post({
+            "code": "print(1)", "databases": ["sqlite", "postgres"], "orm_versions": ["django-6.1"],
+        })
+        summary = lines[-1]
+        self.assertEqual(summary["skipped"], ["postgres/django-6.1"])
+        self.assertEqual(summary["failed"], {})
+        self.assertEqual(summary["output"]["groups"], [{"cells": ["sqlite/django-6.1"], "diff": []}])
+
 
 class FetchRefViewTest(TestCase):
     def setUp(self):
@@ -301,6 +656,53 @@ class FetchRefViewTest(TestCase):
         self.assertEqual(response.status_code, 405)
 
 
+class MetricsViewTest(TestCase):
+    @patch("dryorm.redis_pool.get_client")
+    def test_metrics(self, get_client):
+        get_client.return_value.get.return_value = b"3"
+        response = self.client.get("/metrics")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/plain"))
+        body = response.content.decode()
+        self.assertIn("dryorm_container_slots_in_use 3.0", body)
+        self.assertIn("dryorm_redis_up 1.0", body)
+        self.assertIn('dryorm_container_slots_max{executor="python/django/sqlite/6.1"}', body)
+        self.assertIn("# TYPE dryorm_execution_seconds histogram", body)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class BlobAPITest(TestCase):
+    def setUp(self):
+        self.client = Client()
+        cache.clear()
+        self.digest = blobs.put({"erd": "diagram"})
+
+    def test_blob_api_returns_the_blob(self):
+        response = self.client.get(f"/api/blob/{self.digest}")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"erd": "diagram"})
+
+    def test_blob_api_is_cacheable_forever(self):
+        response = self.client.get(f"/api/blob/{self.digest}")
+        self.assertEqual(response["ETag"], f'"{self.digest}"')
+        self.assertIn("immutable", response["Cache-Control"])
+
+    def test_blob_api_not_modified(self):
+        response = self.client.get(
+            f"/api/blob/{self.digest}", HTTP_IF_NONE_MATCH=f'"{self.digest}"'
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_blob_api_not_found(self):
+        response = self.client.get(f"/api/blob/{'0' * 64}")
+        self.assertEqual(response.status_code, 404)
+
+    def test_blob_api_missing_blob_is_not_found_even_if_none_match(self):
+        digest = "0" * 64
+        response = self.client.get(f"/api/blob/{digest}", HTTP_IF_NONE_MATCH=f'"{digest}"')
+        self.assertEqual(response.status_code, 404)
+
+
 class JourneysAPITest(TestCase):
     def setUp(self):
         self.client = Client()
@@ -313,3 +715,38 @@ class JourneysAPITest(TestCase):
     def test_journeys_api_post_not_allowed(self):
         response = self.client.post("/api/journeys")
         self.assertEqual(response.status_code, 405)
+
+    def test_journeys_api_not_modified(self):
+        etag = self.client.get("/api/journeys")["ETag"]
+        response = self.client.get("/api/journeys", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+
+class JourneyChapterAPITest(TestCase):
+    def setUp(self):
+        self.client = Client()
+        journey = self.client.get("/api/journeys").json()["orm-fundamentals"]
+        self.chapter = journey["chapters"][0]
+
+    def test_journey_chapter_api_returns_chapter(self):
+        response = self.client.get(f"/api/journey/orm-fundamentals/{self.chapter['slug']}")
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data["title"], self.chapter["title"])
+        self.assertEqual(data["code"], self.chapter["content"])
+
+    def test_journey_chapter_api_unknown_journey(self):
+        response = self.client.get(f"/api/journey/nonexistent/{self.chapter['slug']}")
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json()["error"], "Journey not found")
+
+    def test_journey_chapter_api_unknown_chapter(self):
+        response = self.client.get("/api/journey/orm-fundamentals/nonexistent")
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json()["error"], "Chapter not found")
+
+    def test_journey_chapter_api_not_modified(self):
+        url = f"/api/journey/orm-fundamentals/{self.chapter['slug']}"
+        etag = self.client.get(url)["ETag"]
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
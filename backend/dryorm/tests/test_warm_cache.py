@@ -0,0 +1,65 @@
+import io
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.test import SimpleTestCase
+
+from dryorm import constants
+from dryorm import journeys
+from dryorm import templates
+
+
+@patch("dryorm.management.commands.warm_cache.tasks.run_django_sync")
+class WarmCacheCommandTest(SimpleTestCase):
+    def warm(self, **options):
+        out = io.StringIO()
+        call_command(
+            "warm_cache",
+            databases="sqlite",
+            orm_versions="django-6.1",
+            stdout=out,
+            **options,
+        )
+        return out.getvalue()
+
+    def test_runs_every_template_and_chapter(self, mock_run):
+        mock_run.return_value = {"event": constants.JOB_DONE_EVENT}
+        self.warm()
+
+        chapters = sum(len(j["chapters"]) for j in journeys.get_index().journeys.values())
+        expected = len(templates.EXECUTOR_TEMPLATES["django"]) + chapters
+        self.assertEqual(mock_run.call_count, expected)
+
+    def test_sends_the_code_the_frontend_would(self, mock_run):
+        mock_run.return_value = {"event": constants.JOB_DONE_EVENT}
+        self.warm()
+
+        sent = {c.args[0] for c in mock_run.call_args_list}
+        self.assertIn(templates.BASIC.strip(), sent)
+
+    def test_fans_out_over_databases_and_versions(self, mock_run):
+        mock_run.return_value = {"event": constants.JOB_DONE_EVENT}
+        call_command(
+            "warm_cache",
+            databases="sqlite,postgres",
+            orm_versions="django-6.1,django-5.2.8",
+            stdout=io.StringIO(),
+        )
+
+        combinations = {(c.args[1], c.kwargs["orm_version"]) for c in mock_run.call_args_list}
+        self.assertEqual(len(combinations), 4)
+
+    def test_uses_the_cache_unless_forced(self, mock_run):
+        mock_run.return_value = {"event": constants.JOB_DONE_EVENT}
+        self.warm()
+        self.assertFalse(mock_run.call_args.kwargs["ignore_cache"])
+
+        self.warm(force=True)
+        self.assertTrue(mock_run.call_args.kwargs["ignore_cache"])
+
+    def test_reports_each_item_and_the_event_mix(self, mock_run):
+        mock_run.return_value = {"event": constants.JOB_OVERLOADED}
+        output = self.warm()
+
+        self.assertIn("template basic", output)
+        self.assertIn(f"{constants.JOB_OVERLOADED}: ", output)
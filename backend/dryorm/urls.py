@@ -8,12 +8,15 @@ urlpatterns = [
     path("api/journeys", views.journeys_api, name="journeys_api"),
     path("api/snippets", views.snippets_api, name="snippets_api"),
     path("api/snippet/<slug:slug>", views.snippet_api, name="snippet_api"),
+    path("api/blob/<slug:digest>", views.blob_api, name="blob_api"),
     path("api/journey/<slug:journey_slug>/<slug:chapter_slug>", views.journey_chapter_api, name="journey_chapter_api"),
     # Backend endpoints
     path("save", views.save, name="save"),
     path("execute", views.execute, name="execute"),
+    path("execute/matrix", views.execute_matrix, name="execute_matrix"),
     path("fetch-pr", views.fetch_pr, name="fetch_pr"),
     path("search-refs", views.search_refs, name="search_refs"),
+    path("metrics", views.metrics_view, name="metrics"),
     # React SPA catch-all - serves index.html for all other routes
     re_path(r"^.*$", views.react_home, name="react_catchall"),
 ]
@@ -1,17 +1,27 @@
 from django.views import generic
 from django import http
-import os
+from asgiref.sync import sync_to_async
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import functools
 import hashlib
-import tomllib
-import re
-from django.conf import settings
+import os
+import time
 from django.http import JsonResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
 from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import condition
 import json
 
 import event_monitoring
 
+from . import blobs
+from . import journeys
+from . import matrix
+from . import metrics
 from . import models
+from . import pagination
 from . import templates
 from . import constants
 from . import databases
@@ -32,13 +42,43 @@ EXECUTION_EVENTS = {
 }
 
 
-def _emit_execution(code, database, result, url=None, **extra):
+# Runs and ref checkouts block on Docker and git for seconds at a time. They
+# get threads of their own so the event loop keeps serving everything else
+# meanwhile; how many actually run at once is still up to the container slots.
+BLOCKING_THREADS = int(os.environ.get("BLOCKING_THREADS", 256))
+
+_blocking_pool = ThreadPoolExecutor(max_workers=BLOCKING_THREADS, thread_name_prefix="blocking")
+
+
+async def _run_blocking(func, *args):
+    started = False
+
+    def run():
+        nonlocal started
+        started = True
+        metrics.QUEUED.dec()
+        return func(*args)
+
+    metrics.QUEUED.inc()
+    try:
+        return await sync_to_async(run, thread_sensitive=False, executor=_blocking_pool)()
+    finally:
+        # Cancelled before a thread picked it up.
+        if not started:
+            metrics.QUEUED.dec()
+
+
+async def _emit_execution(code, database, result, url=None, **extra):
     """Report one code execution to the monitoring dashboard (opt-in, best-effort)."""
     job_event = result.get("event")
     payload = {"database": database, "job_event": job_event, "code": code, **extra}
     if result.get("error"):
         payload["error"] = str(result["error"])
-    event_monitoring.emit(
+    if result.get("timings"):
+        payload["timings"] = result["timings"]
+    if result.get("memory"):
+        payload["memory"] = result["memory"]
+    await event_monitoring.aemit(
         EXECUTION_EVENTS.get(job_event, "execution_error"),
         entity_type="execution",
         entity_id=hashlib.md5((code or "").encode("utf-8")).hexdigest()[:12],
@@ -47,6 +87,34 @@ def _emit_execution(code, database, result, url=None, **extra):
     )
 
 
+def _snippet_result(snippet):
+    """The snippet's last successful result, or None if it was never cached.
+
+    A snippet that has none yet takes it from the result cache, where a run
+    of the same code usually left one before it was saved, and keeps it, so
+    opening a shared link does not need a container.
+    """
+    if snippet.result:
+        return json.loads(snippet.result)
+
+    cache_key = tasks.result_cache_key(
+        # Executions are keyed on the code the editor sends, which it trims.
+        snippet.code.strip(),
+        snippet.database,
+        orm_version=snippet.orm_version,
+        ref_type=snippet.ref_type,
+        ref_id=snippet.ref_id,
+        ref_sha=snippet.sha,
+    )
+    reply = tasks.load_cached_reply(cache_key)
+    if reply is None or reply.get("event") != constants.JOB_DONE_EVENT:
+        return None
+
+    snippet.result = json.dumps(reply)
+    models.Snippet.objects.filter(pk=snippet.pk).update(result=snippet.result)
+    return reply
+
+
 class ReactHomeView(generic.TemplateView):
     """Serves the React frontend."""
     template_name = "index.html"
@@ -98,7 +166,10 @@ def save(request):
             snippet.ref_type = ref_type
             snippet.ref_id = ref_id
             snippet.sha = sha
+            # Whatever changed, the old result may no longer be this code's.
+            snippet.result = ""
             snippet.save()
+            _snippet_result(snippet)
             event_monitoring.emit(
                 "snippet_updated",
                 entity_type="snippet",
@@ -123,6 +194,7 @@ def save(request):
         sha=sha,
         session_key=session_key,
     )
+    _snippet_result(instance)
 
     event_monitoring.emit(
         "snippet_created",
@@ -141,64 +213,32 @@ def save(request):
     return JsonResponse({"slug": instance.slug})
 
 
-def slugify(text):
-    """Convert text to a URL-friendly slug."""
-    # Remove or replace special characters, convert to lowercase
-    slug = re.sub(r'[^\w\s-]', '', text.lower())
-    # Replace spaces and multiple dashes with single dashes
-    slug = re.sub(r'[-\s]+', '-', slug)
-    # Strip leading/trailing dashes
-    return slug.strip('-')
-
-def load_journeys():
-    journeys_path = os.path.join(settings.BASE_DIR, 'data', 'journeys')
-    journeys_list = []
-    
-    if os.path.exists(journeys_path):
-        for filename in os.listdir(journeys_path):
-            if filename.endswith('.toml'):
-                file_path = os.path.join(journeys_path, filename)
-                try:
-                    with open(file_path, 'rb') as f:
-                        journey_data = tomllib.load(f)
-                    
-                    slug = filename[:-5]  # Remove .toml extension
-                    journey = {
-                        'title': journey_data.get('title', slug),
-                        'slug': slug,
-                        'chapters': journey_data.get('chapters', []),
-                        'order': journey_data.get('order', 999)  # Default to high number if no order
-                    }
-                    
-                    # Add slugs to chapters based on their titles
-                    for chapter in journey['chapters']:
-                        chapter['slug'] = slugify(chapter['title'])
-                    
-                    journeys_list.append(journey)
-                        
-                except Exception as e:
-                    print(f"Error loading journey {filename}: {e}")
-    
-    # Sort by order field and convert to dict
-    journeys_list.sort(key=lambda x: x['order'])
-    journeys = {journey['slug']: journey for journey in journeys_list}
-    
-    return journeys
+def json_etag_response(request, payload, etag):
+    """Serve pre-serialized JSON, or a 304 if the client already has it."""
+    etag = quote_etag(etag)
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = http.HttpResponse(payload, content_type="application/json")
+    response["ETag"] = etag
+    return response
 
 
 def journeys_api(request):
     if request.method != "GET":
         return http.HttpResponseNotAllowed(["GET"])
 
-    journeys = load_journeys()
-    return JsonResponse(journeys)
+    index = journeys.get_index()
+    return json_etag_response(request, index.payload, index.etag)
 
 
-def config_api(request):
-    """API endpoint to return app configuration for the React frontend."""
-    if request.method != "GET":
-        return http.HttpResponseNotAllowed(["GET"])
+# The config only changes on deploy; past this the browser revalidates and
+# gets a 304 until it does.
+CONFIG_MAX_AGE = 60 * 5
+
 
+@functools.cache
+def config_payload():
+    """The serialized /api/config body and its ETag, built once per process."""
     # Build databases list
     databases_list = [
         {"value": key, "label": db.description}
@@ -219,31 +259,69 @@ def config_api(request):
             for name, code in orm_templates.items()
         ]
 
-    return JsonResponse({
+    payload = json.dumps({
         "databases": databases_list,
         "ormVersions": orm_versions_list,
         "templates": templates_grouped,
-    })
+    }).encode("utf-8")
+    return payload, hashlib.sha256(payload).hexdigest()
+
+
+def config_api(request):
+    """API endpoint to return app configuration for the React frontend."""
+    if request.method != "GET":
+        return http.HttpResponseNotAllowed(["GET"])
+
+    payload, etag = config_payload()
+    response = json_etag_response(request, payload, etag)
+    patch_cache_control(response, public=True, max_age=CONFIG_MAX_AGE)
+    return response
 
 
 def snippets_api(request):
-    """API endpoint to list public snippets."""
+    """API endpoint to list public snippets.
+
+    Pages by number by default. Passing cursor (empty for the first page)
+    pages by position instead: the response carries a nextCursor, and the
+    total is an estimate for plain listings and omitted for searches.
+    """
     if request.method != "GET":
         return http.HttpResponseNotAllowed(["GET"])
 
     query = request.GET.get("q", "").strip()
-    page = int(request.GET.get("page", 1))
+    cursor = request.GET.get("cursor")
     per_page = 20
 
-    snippets = models.Snippet.objects.filter(private=False).order_by("-created")
+    snippets = models.Snippet.objects.public().summaries()
 
     if query:
-        from django.db.models import Q
-        snippets = snippets.filter(Q(name__icontains=query) | Q(code__icontains=query))
+        snippets = snippets.search(query)
+    else:
+        snippets = snippets.recent()
 
-    total = snippets.count()
-    total_pages = (total + per_page - 1) // per_page
-    snippets = snippets[(page - 1) * per_page : page * per_page]
+    if cursor is not None:
+        try:
+            page_snippets, next_cursor = pagination.paginate_after(snippets, cursor, per_page)
+        except pagination.InvalidCursor:
+            return JsonResponse({"error": "Invalid cursor"}, status=400)
+        page_info = {
+            "nextCursor": next_cursor,
+            "total": None if query else pagination.estimated_count(snippets),
+            "estimated": not query,
+        }
+    else:
+        page = int(request.GET.get("page", 1))
+        if query:
+            total = snippets.count()
+        else:
+            total = pagination.estimated_count(snippets)
+        page_snippets = snippets[(page - 1) * per_page : page * per_page]
+        page_info = {
+            "page": page,
+            "totalPages": (total + per_page - 1) // per_page,
+            "total": total,
+            "estimated": not query,
+        }
 
     from django.utils.timesince import timesince
 
@@ -259,13 +337,9 @@ def snippets_api(request):
                 "sha": s.sha,
                 "created": timesince(s.created),
             }
-            for s in snippets
+            for s in page_snippets
         ],
-        "pagination": {
-            "page": page,
-            "totalPages": total_pages,
-            "total": total,
-        }
+        "pagination": page_info,
     })
 
 
@@ -275,7 +349,7 @@ def snippet_api(request, slug):
         return http.HttpResponseNotAllowed(["GET"])
 
     try:
-        snippet = models.Snippet.objects.get(slug=slug)
+        snippet = models.Snippet.objects.select_related("blob").get(slug=slug)
     except models.Snippet.DoesNotExist:
         return JsonResponse({"error": "Snippet not found"}, status=404)
 
@@ -290,7 +364,10 @@ def snippet_api(request, slug):
         "name": snippet.name,
         "slug": snippet.slug,
         "isOwner": is_owner,
+        "result": None,
     }
+    if result := _snippet_result(snippet):
+        data["result"] = blobs.refer(result)
 
     # Add ref info if present
     if snippet.ref_type:
@@ -303,38 +380,44 @@ def snippet_api(request, slug):
     return JsonResponse(data)
 
 
+# Only a blob that exists has an ETag, so a missing one is never "not modified".
+@condition(etag_func=lambda request, digest: digest if blobs.exists(digest) else None)
+def blob_api(request, digest):
+    """API endpoint to return one content-addressed part of a result.
+
+    A blob never changes under its digest, so browsers may keep it forever.
+    """
+    if request.method != "GET":
+        return http.HttpResponseNotAllowed(["GET"])
+
+    blob = blobs.get(digest)
+    if blob is None:
+        return JsonResponse({"error": "Blob not found"}, status=404)
+
+    response = http.HttpResponse(blob, content_type="application/json")
+    response["Cache-Control"] = "public, max-age=31536000, immutable"
+    return response
+
+
 def journey_chapter_api(request, journey_slug, chapter_slug):
     """API endpoint to return a specific journey chapter's code."""
     if request.method != "GET":
         return http.HttpResponseNotAllowed(["GET"])
 
-    journeys = load_journeys()
+    index = journeys.get_index()
 
-    if journey_slug not in journeys:
+    if journey_slug not in index.journeys:
         return JsonResponse({"error": "Journey not found"}, status=404)
 
-    journey = journeys[journey_slug]
-    chapters = journey.get("chapters", [])
-
-    # Find the chapter by slug
-    chapter = None
-    for ch in chapters:
-        if ch.get("slug") == chapter_slug:
-            chapter = ch
-            break
-
+    chapter = index.chapter(journey_slug, chapter_slug)
     if not chapter:
         return JsonResponse({"error": "Chapter not found"}, status=404)
 
-    return JsonResponse({
-        "code": chapter.get("content", "") or chapter.get("code", ""),
-        "title": chapter.get("title", ""),
-        "description": chapter.get("description", ""),
-    })
+    return json_etag_response(request, chapter.payload, chapter.etag)
 
 
 @csrf_exempt
-def fetch_ref(request):
+async def fetch_ref(request):
     """HTTP endpoint for fetching and caching a Django ref (PR, branch, or tag) from GitHub."""
     if request.method != "POST":
         return http.HttpResponseNotAllowed(["POST"])
@@ -369,7 +452,7 @@ def fetch_ref(request):
         was_cached = cached_ref is not None
 
         # Fetch (and cache if needed) the ref
-        ref_info = ref_service.fetch_ref(ref_type, ref_id)
+        ref_info = await _run_blocking(ref_service.fetch_ref, ref_type, ref_id)
 
         return JsonResponse({
             "success": True,
@@ -406,7 +489,7 @@ fetch_pr = fetch_ref
 
 
 @csrf_exempt
-def search_refs(request):
+async def search_refs(request):
     """HTTP endpoint for searching Django refs (PRs, branches, tags)."""
     if request.method != "GET":
         return http.HttpResponseNotAllowed(["GET"])
@@ -419,11 +502,11 @@ def search_refs(request):
 
     try:
         if ref_type == "pr":
-            results = ref_service.search_prs(query)
+            results = await ref_service.search_prs(query)
         elif ref_type == "branch":
-            results = ref_service.search_branches(query)
+            results = await ref_service.search_branches(query)
         elif ref_type == "tag":
-            results = ref_service.search_tags(query)
+            results = await ref_service.search_tags(query)
         else:
             return JsonResponse({"error": "Invalid ref type"}, status=400)
 
@@ -433,8 +516,12 @@ def search_refs(request):
 
 
 @csrf_exempt
-def execute(request):
-    """HTTP endpoint for executing ORM snippets synchronously."""
+async def execute(request):
+    """HTTP endpoint for executing ORM snippets.
+
+    The run itself happens on a thread from _blocking_pool, so a process can
+    hold many executions in flight at once.
+    """
     if request.method != "POST":
         return http.HttpResponseNotAllowed(["POST"])
 
@@ -447,6 +534,7 @@ def execute(request):
         database = payload.get("database", "sqlite")
         orm_version = payload.get("orm_version", "django-6.1")
         ignore_cache = payload.get("ignore_cache", False)
+        options = {name: payload[name] for name in constants.EXECUTION_OPTIONS if payload.get(name)}
 
         # Ref mode (PR, branch, or tag)
         ref_type = payload.get("ref_type")  # pr, branch, or tag
@@ -464,6 +552,12 @@ def execute(request):
                 {"event": constants.JOB_CODE_ERROR_EVENT, "error": "No code provided"},
                 status=400
             )
+        for name, value in options.items():
+            if value not in constants.EXECUTION_OPTIONS[name]:
+                return JsonResponse(
+                    {"event": constants.JOB_CODE_ERROR_EVENT, "error": f"Invalid {name}: {value}"},
+                    status=400
+                )
 
         # Execute the task synchronously
         if ref_type and ref_id:
@@ -482,7 +576,7 @@ def execute(request):
                 if not ref_info:
                     # Fetch the ref (will use current SHA from GitHub)
                     print(f"[DEBUG] Worktree not cached, fetching fresh...")
-                    ref_info = ref_service.fetch_ref(ref_type, ref_id)
+                    ref_info = await _run_blocking(ref_service.fetch_ref, ref_type, ref_id)
                     print(f"[DEBUG] Fetched ref_info.sha = {ref_info.sha}")
 
                 # Normalize SHA to 12 chars for cache key consistency
@@ -490,8 +584,9 @@ def execute(request):
                 raw_sha = ref_sha if ref_sha else ref_info.sha
                 execution_sha = raw_sha[:12]
                 print(f"[DEBUG] execution_sha = {execution_sha}, ref_info.host_path = {ref_info.host_path}")
-                result = tasks.run_django_ref_sync(
-                    code, database, ignore_cache, ref_type, ref_id, execution_sha, ref_info.host_path
+                result = await _run_blocking(
+                    tasks.run_django_ref_sync,
+                    code, database, ignore_cache, ref_type, ref_id, execution_sha, ref_info.host_path, options,
                 )
             except (RefNotFoundError, RefFetchError) as e:
                 return JsonResponse(
@@ -499,11 +594,11 @@ def execute(request):
                     status=400
                 )
         else:
-            result = tasks.run_django_sync(code, database, ignore_cache, orm_version)
+            result = await _run_blocking(tasks.run_django_sync, code, database, ignore_cache, orm_version, options)
 
-        _emit_execution(code, database, result, url=source_url, orm_version=orm_version,
+        await _emit_execution(code, database, result, url=source_url, orm_version=orm_version,
                         ref_type=ref_type, ref_id=ref_id)
-        return JsonResponse(result)
+        return JsonResponse(await sync_to_async(blobs.refer, thread_sensitive=False)(result))
 
     except json.JSONDecodeError:
         return JsonResponse(
@@ -511,7 +606,7 @@ def execute(request):
             status=400
         )
     except Exception as e:
-        _emit_execution(code, database,
+        await _emit_execution(code, database,
                         {"event": constants.JOB_INTERNAL_ERROR_EVENT, "error": str(e)},
                         url=source_url)
         return JsonResponse(
@@ -520,5 +615,92 @@ def execute(request):
         )
 
 
+@csrf_exempt
+async def execute_matrix(request):
+    """Run one snippet on several executors, streaming each cell's reply.
+
+    The body takes the code plus optional "databases" and "orm_versions"
+    lists, every executor's by default. The response is NDJSON: a "cell"
+    line per (database, ORM version) as it finishes, then a "summary" line
+    comparing them (see matrix.summarize).
+    """
+    if request.method != "POST":
+        return http.HttpResponseNotAllowed(["POST"])
+
+    try:
+        payload = json.loads(request.body)
+    except json.JSONDecodeError:
+        return JsonResponse(
+            {"event": constants.JOB_CODE_ERROR_EVENT, "error": "Invalid JSON"},
+            status=400
+        )
+
+    code = payload.get("code")
+    ignore_cache = payload.get("ignore_cache", False)
+    source_url = request.headers.get("Referer")
+    if not code:
+        return JsonResponse(
+            {"event": constants.JOB_CODE_ERROR_EVENT, "error": "No code provided"},
+            status=400
+        )
+    try:
+        cells = matrix.select_cells(payload.get("databases"), payload.get("orm_versions"))
+    except ValueError as e:
+        return JsonResponse({"event": constants.JOB_CODE_ERROR_EVENT, "error": str(e)}, status=400)
+    if not cells:
+        return JsonResponse(
+            {"event": constants.JOB_CODE_ERROR_EVENT, "error": "No executor matches the selection"},
+            status=400
+        )
+
+    concurrency = asyncio.Semaphore(matrix.MATRIX_CONCURRENCY)
+
+    async def run_cell(database, orm_version):
+        async with concurrency:
+            deadline = time.monotonic() + matrix.MATRIX_SLOT_WAIT
+            while True:
+                try:
+                    result = await _run_blocking(tasks.run_django_sync, code, database, ignore_cache, orm_version)
+                except Exception as e:
+                    result = {"event": constants.JOB_INTERNAL_ERROR_EVENT, "error": str(e)}
+                # Every slot is taken: wait on the loop, not a thread, and ask again.
+                if result.get("event") != constants.JOB_OVERLOADED or time.monotonic() >= deadline:
+                    break
+                await asyncio.sleep(matrix.MATRIX_RETRY_INTERVAL)
+        await _emit_execution(code, database, result, url=source_url, orm_version=orm_version, matrix=True)
+        return database, orm_version, result
+
+    async def stream():
+        pending = [asyncio.ensure_future(run_cell(*cell)) for cell in cells]
+        replies = {}
+        try:
+            for finished in asyncio.as_completed(pending):
+                database, orm_version, result = await finished
+                replies[matrix.label(database, orm_version)] = result
+                line = {"type": "cell", "database": database, "orm_version": orm_version, **result}
+                yield json.dumps(line) + "\n"
+        finally:
+            # The client went away: don't start the cells still waiting.
+            for task in pending:
+                task.cancel()
+        # Summarized in EXECUTORS order, not finishing order, so it is stable.
+        ordered = {matrix.label(*cell): replies[matrix.label(*cell)] for cell in cells}
+        yield json.dumps({"type": "summary", **matrix.summarize(ordered)}) + "\n"
+
+    response = http.StreamingHttpResponse(stream(), content_type="application/x-ndjson")
+    # Otherwise nginx holds the cells back until the whole matrix is done.
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+def metrics_view(request):
+    """Prometheus metrics for executions. Blocked at the public web server."""
+    if request.method != "GET":
+        return http.HttpResponseNotAllowed(["GET"])
+
+    body, content_type = metrics.render()
+    return http.HttpResponse(body, content_type=content_type)
+
+
 # View instance
 react_home = ReactHomeView.as_view()
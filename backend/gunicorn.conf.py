@@ -0,0 +1,23 @@
+"""Gunicorn settings the Dockerfile's command does not set.
+
+Workers share their Prometheus metrics through files in
+PROMETHEUS_MULTIPROC_DIR, which has to start out empty and forget workers
+that exit.
+"""
+
+import os
+import shutil
+
+from prometheus_client import multiprocess
+
+
+def on_starting(server):
+    directory = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if directory:
+        shutil.rmtree(directory, ignore_errors=True)
+        os.makedirs(directory)
+
+
+def child_exit(server, worker):
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(worker.pid)
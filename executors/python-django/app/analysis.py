@@ -0,0 +1,104 @@
+"""Finds the avoidable queries in a snippet's query log.
+
+Two patterns are reported, each with how many queries and how much database
+time fixing it would save:
+
+- N+1: one line of the snippet running the same SELECT template again and
+  again with different parameters, as a loop over objects does when it
+  follows a relation of each. A template that fetches a single row by a
+  column of its own table (Django's LIMIT 21 on a related object access) is
+  a forward relation that select_related() would join into the outer query;
+  anything else is a reverse or many-to-many relation that
+  prefetch_related() would fetch in one more query.
+- Duplicates: the very same SELECT, parameters and all, run more than once.
+
+Both are read off the SQL, so they are estimates rather than a diagnosis.
+"""
+
+import re
+from collections import defaultdict
+
+# A template repeated fewer times on one line is not worth flagging.
+N_PLUS_ONE_THRESHOLD = 3
+
+IN_LIST = re.compile(r"\bIN \((?:%s, )*%s\)")
+FROM_TABLE = re.compile(r'\bFROM [`"]?(\w+)[`"]?')
+SINGLE_ROW_LOOKUP = re.compile(r'\bWHERE [`"]?(\w+)[`"]?\.[`"]?\w+[`"]? = %s LIMIT 21$')
+
+
+def normalize(template):
+    """template with its whitespace collapsed and IN lists of any length alike"""
+    return IN_LIST.sub("IN (...)", " ".join(str(template).split()))
+
+
+def is_select(sql):
+    return str(sql).lstrip()[:6].upper() == "SELECT"
+
+
+def _seconds(queries):
+    return sum(float(q["time"]) for q in queries)
+
+
+def _suggestion(template):
+    table = FROM_TABLE.search(template)
+    lookup = SINGLE_ROW_LOOKUP.search(template)
+    if table and lookup and lookup.group(1) == table.group(1):
+        return "select_related"
+    return "prefetch_related"
+
+
+def find_n_plus_one(queries):
+    by_call_site = defaultdict(list)
+    for q in queries:
+        if is_select(q["template"]):
+            by_call_site[(q.get("line_number"), normalize(q["template"]))].append(q)
+
+    found = []
+    for (line_number, template), group in by_call_site.items():
+        if len(group) < N_PLUS_ONE_THRESHOLD or len({q["sql"] for q in group}) == 1:
+            continue
+        suggestion = _suggestion(template)
+        # Joined into the outer query, or fetched all at once by one more.
+        saved = len(group) if suggestion == "select_related" else len(group) - 1
+        table = FROM_TABLE.search(template)
+        found.append({
+            "line_number": line_number,
+            "source_context": group[0].get("source_context"),
+            "template": template,
+            "table": table.group(1) if table else None,
+            "count": len(group),
+            "suggestion": suggestion,
+            "saved_queries": saved,
+            "saved_time": round(_seconds(group) * saved / len(group), 3),
+        })
+    return found
+
+
+def find_duplicates(queries):
+    by_sql = defaultdict(list)
+    for q in queries:
+        if is_select(q["sql"]):
+            by_sql[q["sql"]].append(q)
+
+    return [
+        {
+            "sql": sql,
+            "count": len(group),
+            "line_numbers": sorted({q["line_number"] for q in group if q.get("line_number")}),
+            "saved_queries": len(group) - 1,
+            "saved_time": round(_seconds(group[1:]), 3),
+        }
+        for sql, group in by_sql.items()
+        if len(group) > 1
+    ]
+
+
+def analyze_queries(queries):
+    """Report the N+1 patterns and duplicate queries among queries.
+
+    queries are LineAwareQueryLogger's, DDL excluded.
+    """
+    return {
+        "n_plus_one": sorted(find_n_plus_one(queries), key=lambda f: -f["saved_queries"]),
+        "duplicates": sorted(find_duplicates(queries), key=lambda f: -f["saved_queries"]),
+    }
@@ -0,0 +1,166 @@
+"""Repeat-and-time benchmarking of the snippet's functions.
+
+One run of a snippet is too noisy to tell two ways of doing something apart,
+so with BENCHMARK set each bench_* function the snippet defines (run() if it
+defines none) is run over and over, each iteration in a transaction that is
+rolled back so they all start from the same data.
+
+The targets share one deadline, each getting an even share of whatever time
+is left when its turn comes, warm-up included. After one warm-up iteration,
+the number of iterations is picked so that all of them fit in what is left
+of the share, between MIN_ITERATIONS and MAX_ITERATIONS. No iteration is
+started that the slowest one so far says would end past the share; a target
+whose warm-up alone used it all is reported from the warm-up. Nothing can
+cut the warm-up itself short, but SnippetTimeout still bounds the whole run.
+"""
+
+import math
+import statistics
+import time
+
+from django.db import connection, transaction
+
+from .management.commands.run_snippet import SnippetTimeout
+
+MIN_ITERATIONS = 3
+MAX_ITERATIONS = 1000
+
+# Issued by the transaction each iteration runs in, not by the snippet.
+TRANSACTION_CONTROL = ("BEGIN", "SAVEPOINT", "RELEASE SAVEPOINT", "ROLLBACK")
+
+
+def targets(module):
+    """The functions to benchmark in module, by name"""
+    benches = {
+        name: value
+        for name, value in vars(module).items()
+        if name.startswith("bench_") and callable(value)
+    }
+    if not benches and callable(getattr(module, "run", None)):
+        benches = {"run": module.run}
+    return benches
+
+
+class QueryCounter:
+    """Counts the queries run, the rows they inserted, updated or deleted,
+    and the rows fetched from them"""
+
+    def __init__(self):
+        self.queries = 0
+        self.rows_written = 0
+        self.rows_read = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        result = execute(sql, params, many, context)
+        statement = sql.lstrip().upper()
+        if not statement.startswith(TRANSACTION_CONTROL):
+            self.queries += 1
+            if statement.startswith("SELECT"):
+                self.count_fetches(context["cursor"])
+            else:
+                self.rows_written += max(context["cursor"].rowcount, 0)
+        return result
+
+    def count_fetches(self, cursor):
+        """Count the rows fetched through cursor from now on
+
+        A SELECT's rowcount is -1 on SQLite, so the rows are counted as they
+        are fetched instead. Only the fetch methods are counted; a raw cursor
+        iterated over directly reads rows this does not see.
+        """
+        # Django's cursor wrapper hands these over from __getattr__, so
+        # setting them on the instance puts the counting ones first.
+        if "fetchmany" in vars(cursor):
+            return
+        fetchone, fetchmany, fetchall = cursor.fetchone, cursor.fetchmany, cursor.fetchall
+
+        def counted_fetchone():
+            row = fetchone()
+            self.rows_read += row is not None
+            return row
+
+        def counted_fetchmany(*args, **kwargs):
+            rows = fetchmany(*args, **kwargs)
+            self.rows_read += len(rows)
+            return rows
+
+        def counted_fetchall():
+            rows = fetchall()
+            self.rows_read += len(rows)
+            return rows
+
+        cursor.fetchone, cursor.fetchmany, cursor.fetchall = counted_fetchone, counted_fetchmany, counted_fetchall
+
+
+def iteration(func):
+    """Run func once, rolled back, returning its seconds and QueryCounter"""
+    counter = QueryCounter()
+    connection.ensure_connection()
+    # SQLite leaves the rowcount of an INSERT ... RETURNING unset until its
+    # rows are fetched, but counts every change on the connection.
+    sqlite_changes = connection.connection.total_changes if connection.vendor == "sqlite" else None
+    with connection.execute_wrapper(counter):
+        started = time.perf_counter()
+        with transaction.atomic():
+            func()
+            transaction.set_rollback(True)
+        seconds = time.perf_counter() - started
+    if sqlite_changes is not None:
+        counter.rows_written = connection.connection.total_changes - sqlite_changes
+    # DEBUG logs every query; don't let the iterations pile them up.
+    connection.queries_log.clear()
+    return seconds, counter
+
+
+def measure(func, budget):
+    """Time func over as many iterations as fit in budget seconds, warm-up included"""
+    deadline = time.perf_counter() + budget
+    warmup, warmup_counter = iteration(func)
+    left = deadline - time.perf_counter()
+    wanted = min(max(int(left / max(warmup, 1e-6)), MIN_ITERATIONS), MAX_ITERATIONS)
+
+    seconds, counters = [], []
+    slowest = warmup
+    while len(seconds) < wanted and time.perf_counter() + slowest <= deadline:
+        elapsed, counter = iteration(func)
+        seconds.append(elapsed)
+        counters.append(counter)
+        slowest = max(slowest, elapsed)
+
+    if not seconds:
+        # The warm-up left no room for another; it is all there is.
+        seconds, counters = [warmup], [warmup_counter]
+
+    ms = sorted(round(s * 1000, 3) for s in seconds)
+    return {
+        "iterations": len(seconds),
+        "min": ms[0],
+        "median": round(statistics.median(ms), 3),
+        "p95": ms[math.ceil(len(ms) * 0.95) - 1],
+        "max": ms[-1],
+        # Per iteration; the last one's, as they rarely differ.
+        "queries": counters[-1].queries,
+        "rows_written": counters[-1].rows_written,
+        "rows_read": counters[-1].rows_read,
+    }
+
+
+def benchmark(module, budget):
+    """Benchmark every target in module, sharing budget seconds between them
+
+    A target that raises is reported with its error instead.
+    """
+    deadline = time.perf_counter() + budget
+    benches = targets(module)
+    results = {}
+    for position, (name, func) in enumerate(benches.items()):
+        # An even share of what is left, so a target that ran over its own
+        # share takes it from the ones after it, not from past the deadline.
+        share = max(deadline - time.perf_counter(), 0) / (len(benches) - position)
+        try:
+            results[name] = measure(func, share)
+        except SnippetTimeout:
+            raise
+        except Exception as e:
+            results[name] = {"error": f"{type(e).__name__}: {e}"}
+    return results
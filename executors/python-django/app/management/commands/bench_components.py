@@ -0,0 +1,127 @@
+import contextlib
+import io
+import json
+import statistics
+import time
+import tracemalloc
+
+from app import models
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from ...utils import LineAwarePrintCapture
+from . import mermaid
+from .execute import LineAwareQueryLogger, collect_ddl, format_sql_queries
+
+
+class Command(BaseCommand):
+    """Time each piece of the executor's instrumentation on the snippet in app/models.py.
+
+    The snippet's run() is timed bare, then under the query logger and under
+    the print capture, so their overhead is the difference. The output stages
+    (DDL, query formatting, the ERD and the result JSON) are timed on what
+    that run produced. Every run() is rolled back, so repeats see the same
+    database.
+
+    Each component is timed --repeat times, then run once more under
+    tracemalloc for its peak memory, which tracemalloc would skew the timing
+    of. benchmark.py drives this once per synthetic snippet.
+    """
+
+    help = "Times the executor's instrumentation components"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=3)
+        parser.add_argument("--output", help="Write the results here instead of stdout")
+
+    def handle(self, *args, **options):
+        call_command("makemigrations", "app", verbosity=0)
+        call_command("migrate", verbosity=0)
+
+        with open(models.__file__) as f:
+            self.user_code = f.read()
+        self.queries = []
+        self.returned = None
+
+        components = {
+            "run": self.run_bare,
+            "query_logger": self.run_logged,
+            "print_capture": self.run_captured,
+            "collect_ddl": collect_ddl,
+            "format_sql_queries": lambda: format_sql_queries(self.queries),
+            "erd": lambda: mermaid.kroki_encode(mermaid.generate_mermaid_erd()),
+            "serialize": self.serialize,
+        }
+        results = {
+            name: self.measure(component, options["repeat"])
+            for name, component in components.items()
+        }
+        results["counts"] = {"queries": len(self.queries)}
+
+        report = json.dumps(results, indent=1)
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                f.write(report)
+        else:
+            self.stdout.write(report)
+
+    def measure(self, component, repeat):
+        seconds = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            component()
+            seconds.append(time.perf_counter() - started)
+
+        tracemalloc.start()
+        try:
+            component()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        return {
+            "median": statistics.median(seconds),
+            "min": min(seconds),
+            "peak_bytes": peak,
+        }
+
+    def run_snippet(self):
+        with transaction.atomic():
+            self.returned = models.run() if hasattr(models, "run") else {}
+            transaction.set_rollback(True)
+        # DEBUG logs every query; don't let repeats pile them up.
+        connection.queries_log.clear()
+
+    def run_bare(self):
+        # Printing to the terminal would cost more than capturing does.
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.run_snippet()
+
+    def run_logged(self):
+        query_logger = LineAwareQueryLogger()
+        query_logger.set_user_code(self.user_code)
+        original_cursor = connection.cursor
+        query_logger.patch_cursor()
+        try:
+            self.run_bare()
+        finally:
+            connection.cursor = original_cursor
+        self.queries = query_logger.queries
+
+    def run_captured(self):
+        print_capture = LineAwarePrintCapture()
+        print_capture.set_user_code(self.user_code)
+        print_capture.patch()
+        try:
+            self.run_snippet()
+        finally:
+            print_capture.restore()
+
+    def serialize(self):
+        return json.dumps(
+            {
+                "queries": format_sql_queries(self.queries),
+                "returned": self.returned,
+            }
+        )
@@ -2,6 +2,7 @@ import contextlib
 import inspect
 import io
 import json
+import os
 import re
 import time
 
@@ -10,10 +11,25 @@ from app import models
 from app.thread_locals import thread_locals
 from django.core.management import call_command
 from django.core.management.base import BaseCommand, CommandError
-from django.db import connection
+from django.db import connection, transaction
 
+from ...analysis import analyze_queries
+from ...benchmark import benchmark
+from ...profiler import make_profiler
+from ...seed import seed
 from ...utils import LineAwarePrintCapture
 from . import mermaid
+from .run_snippet import EXECUTE_TIMEOUT
+
+# order_by("?") compiles to RANDOM() on SQLite and PostgreSQL, RAND() on MySQL.
+RANDOM_ORDERING = re.compile(r"\bORDER BY\b.*\bRAND(?:OM)?\(\)", re.DOTALL)
+
+# Explaining stops once it has taken this long in total, so that it cannot
+# eat much of the 10 seconds the snippet has.
+EXPLAIN_BUDGET = 2.0
+
+# Benchmarking leaves the other half of the time for the regular run.
+BENCHMARK_BUDGET = EXECUTE_TIMEOUT / 2
 
 
 def format_ddl(sql):
@@ -40,28 +56,95 @@ def collect_ddl():
         ]
 
 
+def collect_nondeterminism(queries):
+    """Name the sources that make this run's output differ from the next one's"""
+    tracker = getattr(thread_locals, "nondeterminism", None)
+    sources = set(tracker.sources) if tracker else set()
+    if any(RANDOM_ORDERING.search(str(q["template"])) for q in queries):
+        sources.add("order_by('?')")
+    return sorted(sources)
+
+
 def format_sql_queries(queries):
-    return [
-        {
+    formatted = []
+    for q in queries:
+        if not q["sql"]:
+            continue
+        query = {
             "time": q["time"],
             "sql": sqlparse.format(q["sql"], reindent=True),
             "template": sqlparse.format(q.get("template", q["sql"]), reindent=True),
             "line_number": q.get("line_number"),
             "source_context": q.get("source_context"),
         }
-        for q in queries
-        if q["sql"]
-    ]
+        if "plan" in q:
+            query["plan"] = q["plan"]
+        formatted.append(query)
+    return formatted
+
+
+class QueryExplainer:
+    """Takes the plan of each distinct SELECT the snippet runs.
+
+    The EXPLAIN runs right after the query, with its parameters, on a cursor
+    of its own, so it sees the data as the query did. It runs in a savepoint
+    that is rolled back, which keeps EXPLAIN ANALYZE from having effects and
+    a failing EXPLAIN from breaking the snippet's transaction. Later queries
+    with the same template are not explained again, and none are once
+    EXPLAIN_BUDGET is spent.
+
+    SQLite cannot ANALYZE, so it gets the plain plan in both modes.
+    """
+
+    def __init__(self, mode, budget=EXPLAIN_BUDGET):
+        self.analyze = mode == "analyze"
+        self.budget = budget
+        self.spent = 0.0
+        self.explained = set()
+
+    def prefix(self):
+        if self.analyze:
+            try:
+                return connection.ops.explain_query_prefix(analyze=True)
+            except ValueError:
+                pass  # The backend has no ANALYZE option
+        return connection.ops.explain_query_prefix()
+
+    def explain(self, create_cursor, sql, params):
+        """The plan of sql, or None if it is not to be explained."""
+        if not sql.lstrip()[:6].upper() == "SELECT" or sql in self.explained:
+            return None
+        if self.spent >= self.budget:
+            return None
+        self.explained.add(sql)
+
+        started = time.perf_counter()
+        try:
+            with transaction.atomic(), create_cursor() as cursor:
+                cursor.execute(f"{self.prefix()} {sql}", params)
+                rows = cursor.fetchall()
+                transaction.set_rollback(True)
+        except Exception as e:
+            return f"Could not explain this query: {e}"
+        finally:
+            self.spent += time.perf_counter() - started
+
+        # Flattened the way QuerySet.explain() does.
+        return "\n".join(
+            row if isinstance(row, str) else " ".join(str(column) for column in row)
+            for row in rows
+        )
 
 
 # The code for LineAwaraQueryLogger has been taken from:
 # https://github.com/TkTech/wetorm
 # and adapted to fit DryORM needs
 class LineAwareQueryLogger:
-    def __init__(self):
+    def __init__(self, explainer=None):
         self.queries = []
         self.user_code_lines = []
         self.logging_enabled = True
+        self.explainer = explainer
 
     def set_user_code(self, code):
         """Store user code lines for line number tracking"""
@@ -99,6 +182,12 @@ class LineAwareQueryLogger:
                     }
                     self.queries.append(query_info)
 
+                    if self.explainer:
+                        with self.do_not_log():
+                            plan = self.explainer.explain(original_cursor, sql, params)
+                        if plan is not None:
+                            query_info["plan"] = plan
+
                 return result
 
             def executemany_with_line_tracking(sql, param_list):
@@ -188,6 +277,17 @@ def _do_not_log():
         yield
 
 
+def _seed(model, n, **generators):
+    """Insert n rows of model fast, leaving them out of the query log
+
+    Usage:
+        _seed(Author, 100)
+        _seed(Book, 100_000, title=lambda i: f"Book {i}", price=itertools.cycle([5, 10]))
+    """
+    with _do_not_log():
+        return seed(model, n, **generators)
+
+
 class Command(BaseCommand):
     help = "executes the transaction"
 
@@ -201,7 +301,8 @@ class Command(BaseCommand):
             module_level_output = ""
 
         # Initialize line-aware query logger
-        query_logger = LineAwareQueryLogger()
+        explain = os.environ.get("EXPLAIN")
+        query_logger = LineAwareQueryLogger(QueryExplainer(explain) if explain else None)
         _global_query_logger = query_logger
 
         # Initialize line-aware print capture
@@ -222,24 +323,52 @@ class Command(BaseCommand):
         # Patch print for line tracking
         print_capture.patch()
 
-        # Make _do_not_log available in models namespace
+        # Make _do_not_log and _seed available in models namespace
         models._do_not_log = _do_not_log
+        models._seed = _seed
+
+        timer = thread_locals.timer
 
         try:
-            sqlmigrate_queries = collect_ddl()
+            with timer.phase("ddl"):
+                sqlmigrate_queries = collect_ddl()
             connection.queries_log.clear()
             query_logger.queries.clear()  # Clear our custom queries too
             print_capture.outputs.clear()  # Clear print outputs too
 
+            # Before the regular run, so that both start from the same data.
+            bench = None
+            if os.environ.get("BENCHMARK"):
+                with timer.phase("benchmark"), print_capture.paused(), query_logger.do_not_log():
+                    bench = benchmark(models, BENCHMARK_BUDGET)
+
+            profiler = make_profiler(models.__file__) if os.environ.get("PROFILE") else None
+
             # Capture stderr separately (print capture handles stdout)
             err = io.StringIO()
-            with contextlib.redirect_stderr(err):
+            memory = getattr(thread_locals, "memory", None)
+            with (
+                contextlib.redirect_stderr(err),
+                timer.phase("run"),
+                profiler.profiling() if profiler else contextlib.nullcontext(),
+                memory.traced() if memory and memory.trace else contextlib.nullcontext(),
+            ):
                 if hasattr(models, "run"):
                     returned = models.run()
                 else:
                     returned = {}
 
-            erd = mermaid.kroki_encode(mermaid.generate_mermaid_erd())
+            if query_logger.explainer:
+                # Spent inside run(), so also part of its time.
+                timer.phases["explain"] = round(query_logger.explainer.spent * 1000, 1)
+
+            nondeterministic = collect_nondeterminism(query_logger.queries)
+
+            with timer.phase("analysis"):
+                analysis = analyze_queries(query_logger.queries)
+
+            with timer.phase("erd"):
+                erd = mermaid.kroki_encode(mermaid.generate_mermaid_erd())
 
             # Combine Django's queries with our line-aware queries
             all_queries = sqlmigrate_queries + format_sql_queries(query_logger.queries)
@@ -256,6 +385,13 @@ class Command(BaseCommand):
                 erd=erd,
                 queries=all_queries,
                 returned=returned,
+                nondeterministic=nondeterministic,
+                analysis=analysis,
+                benchmark=bench,
+                profile=profiler.result() if profiler else None,
+                memory=memory.stop() if memory else None,
+                # Split off by the backend, which reports them with its own.
+                timings=timer.phases,
             )
 
             # Write to file instead of stdout to avoid pollution
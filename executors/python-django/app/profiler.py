@@ -0,0 +1,129 @@
+"""Profiling of the snippet's run().
+
+With PROFILE set, run() is profiled and the result carries its stacks in the
+collapsed format flamegraph.pl and speedscope read: a "root;...;leaf weight"
+line per distinct stack, weighted in microseconds of CPU time. Only the
+snippet's own frames and Django's are kept, so the stacks show where in the
+ORM the time went rather than the executor around it.
+
+SamplingProfiler is the default: a SIGPROF timer interrupts run() every
+SAMPLE_INTERVAL of CPU time and records the stack it was in, which costs
+little however many calls run() makes. Waiting on the database is not CPU
+time, so it is not sampled; the queries' own times cover it. Where there is
+no setitimer(), CProfileProfiler traces every call instead. cProfile only
+knows the callers of each function, so its stacks are two frames deep.
+"""
+
+import abc
+import contextlib
+import cProfile
+import os
+import pstats
+import signal
+from collections import Counter
+
+import django
+
+SAMPLE_INTERVAL = 0.001
+
+# The result keeps this many of the heaviest stacks and adds up the rest.
+MAX_STACKS = 200
+
+DJANGO_DIR = os.path.dirname(django.__file__)
+
+
+class Profiler(abc.ABC):
+    mode = None
+
+    def __init__(self, user_file):
+        self.user_file = user_file
+        self.stacks = Counter()
+        self.labels = {}
+
+    def label(self, filename, line, name):
+        """The function as "name (path:line)", or None to leave it out"""
+        key = (filename, line, name)
+        if key not in self.labels:
+            if filename == self.user_file:
+                path = "models.py"
+            elif filename.startswith(DJANGO_DIR):
+                path = "django" + filename[len(DJANGO_DIR):]
+            else:
+                path = None
+            self.labels[key] = f"{name} ({path}:{line})" if path else None
+        return self.labels[key]
+
+    @abc.abstractmethod
+    def profiling(self):
+        """Context manager to profile the code run within it"""
+
+    def result(self):
+        heaviest = self.stacks.most_common(MAX_STACKS)
+        lines = [f"{stack} {weight}" for stack, weight in heaviest]
+        total = sum(self.stacks.values())
+        if rest := total - sum(weight for _, weight in heaviest):
+            lines.append(f"(other stacks) {rest}")
+        return {"mode": self.mode, "total_us": total, "stacks": "\n".join(lines)}
+
+
+class SamplingProfiler(Profiler):
+    mode = "sampling"
+
+    def __init__(self, user_file, interval=SAMPLE_INTERVAL):
+        super().__init__(user_file)
+        self.interval = interval
+        self.weight = round(interval * 1_000_000)
+
+    def sample(self, signum, frame):
+        labels = []
+        outermost = None
+        while frame is not None:
+            code = frame.f_code
+            if label := self.label(code.co_filename, code.co_firstlineno, code.co_qualname):
+                labels.append(label)
+                if code.co_filename == self.user_file:
+                    outermost = len(labels)
+            frame = frame.f_back
+        # Above the snippet's outermost frame is the command that called it.
+        if outermost:
+            self.stacks[";".join(reversed(labels[:outermost]))] += self.weight
+
+    @contextlib.contextmanager
+    def profiling(self):
+        previous = signal.signal(signal.SIGPROF, self.sample)
+        # Restart system calls the timer interrupts, database drivers' included.
+        signal.siginterrupt(signal.SIGPROF, False)
+        signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+        try:
+            yield
+        finally:
+            signal.setitimer(signal.ITIMER_PROF, 0)
+            signal.signal(signal.SIGPROF, previous)
+
+
+class CProfileProfiler(Profiler):
+    mode = "cprofile"
+
+    @contextlib.contextmanager
+    def profiling(self):
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            self.collect(profile)
+
+    def collect(self, profile):
+        for function, (_, _, _, _, callers) in pstats.Stats(profile).stats.items():
+            if not (callee := self.label(*function)):
+                continue
+            for caller, (_, _, own_time, _) in callers.items():
+                stack = f"{caller_label};{callee}" if (caller_label := self.label(*caller)) else callee
+                self.stacks[stack] += round(own_time * 1_000_000)
+
+
+def make_profiler(user_file):
+    if hasattr(signal, "setitimer"):
+        return SamplingProfiler(user_file)
+    return CProfileProfiler(user_file)
@@ -0,0 +1,238 @@
+"""Fast bulk seeding of a snippet's models.
+
+A loop of Model() calls and bulk_create() builds every instance and every
+query through the ORM, which takes most of the 10 seconds long before
+100,000 rows are in. seed() skips the instances: it makes each chunk of
+CHUNK_SIZE rows as plain values, prepared for the database by their fields,
+and writes them straight to a cursor. That is COPY on PostgreSQL and
+multi-row INSERTs elsewhere. Only one chunk is held at a time, so memory
+stays flat however many rows are asked for.
+
+The cursor is the driver's own, from beneath Django's debug wrapper and the
+query logger, so the rows it writes do not fill the query log. The made up
+values do not count towards the run's nondeterminism either: the time is
+read with tracking paused and UUIDs are made from the row number, so a
+seeded snippet is cached like any other. Values from the generators seed()
+is given are the snippet's own and are tracked as usual.
+"""
+
+import contextlib
+import datetime
+import decimal
+import io
+import uuid
+
+from django.db import connections, models, router, transaction
+from django.utils import timezone
+
+from app.thread_locals import thread_locals
+
+CHUNK_SIZE = 5000
+
+# A foreign key seed() is given nothing for points at no more than this many
+# of the existing rows, in turn, so it never loads a whole big table.
+MAX_RELATED = 10_000
+
+# Written to COPY's text format as str() writes them.
+COPY_TYPES = (str, int, float, decimal.Decimal, uuid.UUID)
+
+COPY_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+
+
+def copy_text(value):
+    """value as a column of a COPY ... FROM STDIN text format row
+
+    Raises TypeError for a value it has no text for, to make its chunk an
+    INSERT instead.
+    """
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, COPY_TYPES):
+        return str(value).translate(COPY_ESCAPES)
+    # psycopg2's Json, which JSONField prepares its values as.
+    if hasattr(value, "adapted") and hasattr(value, "dumps"):
+        return value.dumps(value.adapted).translate(COPY_ESCAPES)
+    raise TypeError(f"no COPY text for {type(value).__name__}")
+
+
+def _untracked():
+    if tracker := getattr(thread_locals, "nondeterminism", None):
+        return tracker.paused()
+    return contextlib.nullcontext()
+
+
+class Constant:
+    """The same value for every row, so it is prepared for the database once"""
+
+    def __init__(self, value):
+        self.value = value
+
+
+def default_generator(field, connection, now):
+    """Make values for a field seed() was given nothing for
+
+    Returns a function of the row number or a Constant, or raises ValueError
+    if the field needs to be told what to hold.
+    """
+    if field.has_default():
+        if callable(field.default):
+            return lambda i: field.get_default()
+        return Constant(field.get_default())
+    if getattr(field, "auto_now", False) or getattr(field, "auto_now_add", False):
+        return Constant(now if isinstance(field, models.DateTimeField) else now.date())
+    if field.null:
+        return Constant(None)
+    if field.choices:
+        values = [value for value, _ in field.flatchoices]
+        return lambda i: values[i % len(values)]
+    if field.many_to_one or field.one_to_one:
+        related = field.related_model
+        target = field.target_field.attname
+        rows = related._base_manager.using(connection.alias).order_by(target)
+        pks = list(rows.values_list(target, flat=True)[:MAX_RELATED])
+        if not pks:
+            raise ValueError(f"{field} needs a value; {related.__name__} has no rows to point at")
+        return lambda i: pks[i % len(pks)]
+    if isinstance(field, models.BooleanField):
+        return lambda i: i % 2 == 0
+    if isinstance(field, models.IntegerField):
+        _, high = connection.ops.integer_field_range(field.get_internal_type())
+        return lambda i: i % high if high else i
+    if isinstance(field, models.FloatField):
+        return lambda i: float(i)
+    if isinstance(field, models.DecimalField):
+        limit = 10 ** (field.max_digits - field.decimal_places)
+        return lambda i: decimal.Decimal(i % limit)
+    if isinstance(field, models.DateTimeField):
+        return Constant(now)
+    if isinstance(field, models.DateField):
+        return Constant(now.date())
+    if isinstance(field, models.UUIDField):
+        return lambda i: uuid.UUID(int=i, version=4)
+    if isinstance(field, models.EmailField):
+        return lambda i: f"{field.name}{i}@example.com"
+    if isinstance(field, models.CharField | models.TextField):
+
+        def text(i, limit=field.max_length):
+            # The name gives way first, so the number keeps values apart.
+            number = f" {i}"
+            if not limit:
+                return field.name + number
+            return (field.name[: max(limit - len(number), 0)] + number)[-limit:]
+
+        return text
+    if isinstance(field, models.JSONField):
+        return Constant({})
+    raise ValueError(f"{field} needs a value; pass {field.name}=... to seed()")
+
+
+def generator(value):
+    """Make values from what seed() was given for a field
+
+    A callable is called with the row number, an iterator is advanced, and
+    anything else is the value of every row.
+    """
+    if callable(value):
+        return value
+    if hasattr(value, "__next__"):
+        return lambda i: next(value)
+    return Constant(value)
+
+
+def column(connection, field, make, numbers):
+    """The values of field for the rows numbered numbers, ready to write"""
+    if isinstance(make, Constant):
+        return [field.get_db_prep_save(make.value, connection)] * len(numbers)
+    prepare = field.get_db_prep_save
+    return [prepare(make(i), connection) for i in numbers]
+
+
+def insert(connection, cursor, table, fields, rows):
+    """INSERT rows, as many to a statement as the database takes"""
+    qn = connection.ops.quote_name
+    columns = ", ".join(qn(field.column) for field in fields)
+    batch_size = connection.ops.bulk_batch_size(fields, rows) or len(rows)
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start:start + batch_size]
+        values = connection.ops.bulk_insert_sql(fields, [["%s"] * len(fields)] * len(batch))
+        params = [value for row in batch for value in row]
+        cursor.execute(f"INSERT INTO {qn(table)} ({columns}) {values}", params)
+
+
+def copy(connection, cursor, table, fields, rows):
+    """COPY rows in, over psycopg 3 or psycopg2, or return False if it can't"""
+    qn = connection.ops.quote_name
+    sql = f"COPY {qn(table)} ({', '.join(qn(field.column) for field in fields)}) FROM STDIN"
+    if hasattr(cursor, "copy_expert"):
+        try:
+            text = "".join("\t".join(map(copy_text, row)) + "\n" for row in rows)
+        except TypeError:
+            return False
+        cursor.copy_expert(sql, io.StringIO(text))
+        return True
+    if hasattr(cursor, "copy"):
+        with cursor.copy(sql) as stream:
+            for row in rows:
+                stream.write_row(row)
+        return True
+    return False
+
+
+def seed(model, n, **generators):
+    """Insert n rows of model, and return how many went in
+
+    Each keyword names a field and says what it holds: a function of the row
+    number, an iterator to take values from, or one value for every row.
+    Fields left out get their default, None where they are nullable, the
+    first MAX_RELATED existing rows in turn where they are a foreign key, or
+    a made up value of their type. Row numbers carry on from the rows the
+    table already has, so made up values of unique fields stay unique from
+    one call to the next.
+
+        _seed(Author, 100, name=lambda i: fake.name())
+        _seed(Book, 100_000, price=itertools.cycle([5, 10, 20]))
+    """
+    meta = model._meta
+    using = router.db_for_write(model)
+    # Looked up once; every use of django.db.connection goes through a proxy.
+    connection = connections[using]
+    fields = [
+        field
+        for field in meta.concrete_fields
+        if not (field.primary_key and field.db_returning and field.name not in generators)
+        and not getattr(field, "generated", False)
+    ]
+    unknown = set(generators) - {field.name for field in fields} - {field.attname for field in fields}
+    if unknown:
+        raise ValueError(f"{model.__name__} has no field {', '.join(sorted(unknown))}")
+
+    start = model._base_manager.using(using).count()
+    with _untracked():
+        now = timezone.now()
+    makers = []
+    for field in fields:
+        if field.name in generators:
+            makers.append(generator(generators[field.name]))
+        elif field.attname in generators:
+            makers.append(generator(generators[field.attname]))
+        else:
+            makers.append(default_generator(field, connection, now))
+
+    with transaction.atomic(using=using):
+        cursor = connection.create_cursor()
+        try:
+            for chunk in range(start, start + n, CHUNK_SIZE):
+                numbers = range(chunk, min(chunk + CHUNK_SIZE, start + n))
+                # A column at a time, so each field's preparation is looked
+                # up once a chunk rather than once a value.
+                columns = [column(connection, field, make, numbers) for field, make in zip(fields, makers)]
+                rows = list(zip(*columns))
+                if connection.vendor != "postgresql" or not copy(connection, cursor, meta.db_table, fields, rows):
+                    insert(connection, cursor, meta.db_table, fields, rows)
+        finally:
+            cursor.close()
+    return n
@@ -1,6 +1,11 @@
 import builtins
+import contextlib
+import functools
 import inspect
 import io
+import random
+import time
+import uuid
 
 
 class LineAwarePrintCapture:
@@ -73,3 +78,87 @@ class LineAwarePrintCapture:
     def get_combined_output(self):
         """Get all output as a single string"""
         return self.output_buffer.getvalue()
+
+    @contextlib.contextmanager
+    def paused(self):
+        """Context manager to discard prints instead of capturing them"""
+        builtins.print = self.original_print
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                yield
+        finally:
+            builtins.print = self.tracked_print
+
+
+class NondeterminismTracker:
+    """Records which sources of run-to-run variation the user code touched"""
+
+    # random.Random methods everything else in the module is built on. Faker
+    # and factory_boy keep their own Random instances, so patching the class
+    # covers them too; SystemRandom (secrets, get_random_string) overrides
+    # both and is left alone.
+    RANDOM_PRIMITIVES = ("random", "getrandbits")
+
+    def __init__(self):
+        self.sources = set()
+        self.enabled = True
+
+    def track(self, source, func):
+        """Wrap func so that calling it records source"""
+
+        @functools.wraps(func)
+        def tracked(*args, **kwargs):
+            if self.enabled:
+                self.sources.add(source)
+            return func(*args, **kwargs)
+
+        return tracked
+
+    def patch(self):
+        """Install the tracking wrappers, before the user code is imported"""
+        from django.utils import timezone
+
+        for name in self.RANDOM_PRIMITIVES:
+            setattr(
+                random.Random, name, self.track("random", getattr(random.Random, name))
+            )
+            # The module-level functions are methods bound to a hidden instance
+            # at import time, so rebind them to pick up the wrappers.
+            setattr(random, name, getattr(random._inst, name))
+
+        uuid.uuid1 = self.track("uuid", uuid.uuid1)
+        uuid.uuid4 = self.track("uuid", uuid.uuid4)
+        timezone.now = self.track("timezone.now", timezone.now)
+
+    @contextlib.contextmanager
+    def paused(self):
+        """Context manager to ignore calls made by Django itself"""
+        previous_state = self.enabled
+        self.enabled = False
+        try:
+            yield
+        finally:
+            self.enabled = previous_state
+
+
+class PhaseTimer:
+    """Records how long each phase of the run took, in milliseconds"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases = {}
+
+    def elapsed(self, started=None):
+        return round((time.perf_counter() - (started or self.started)) * 1000, 1)
+
+    def mark(self, name):
+        """Record the time since the timer was created as phase name"""
+        self.phases[name] = self.elapsed()
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.elapsed(started)
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""Micro-benchmarks for the executor's instrumentation.
+
+Runs synthetic snippets, each stressing one part of what the executor does
+around the user's code, through `manage.py bench_components` in a scratch
+copy of this directory on SQLite. That command reports the time and peak
+memory of every component: the query logger, the print capture,
+collect_ddl, format_sql_queries, the ERD and the result JSON.
+
+Every millisecond the instrumentation spends inside the user's run() comes
+out of their time budget, so compare revisions before changing it:
+
+    python benchmark.py run --save before.json
+    python benchmark.py compare main HEAD
+    python benchmark.py compare main .          # "." is the working tree
+
+Revisions are checked out with `git worktree` and measured with this
+checkout's bench_components, so older revisions can be compared too.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+COMMAND = Path("app", "management", "commands", "bench_components.py")
+
+
+def many_models(count=60):
+    classes = ["from django.db import models\n"]
+    for i in range(count):
+        parent = f"    parent = models.ForeignKey('Model{i - 1}', models.CASCADE, null=True)\n" if i else ""
+        classes.append(
+            f"class Model{i}(models.Model):\n"
+            f"    name = models.CharField(max_length=100)\n"
+            f"    created = models.DateTimeField(auto_now_add=True)\n"
+            f"{parent}"
+        )
+    classes.append(
+        "def run():\n"
+        "    parent = None\n"
+        f"    for i in range({count}):\n"
+        "        model = globals()[f'Model{i}']\n"
+        "        kwargs = {'parent': parent} if i else {}\n"
+        "        parent = model.objects.create(name=str(i), **kwargs)\n"
+    )
+    return "\n\n".join(classes)
+
+
+SCENARIOS = {
+    "many_models": many_models(),
+    "many_queries": """
+from django.db import models
+
+
+class Author(models.Model):
+    name = models.CharField(max_length=100)
+
+
+class Book(models.Model):
+    author = models.ForeignKey(Author, models.CASCADE)
+    title = models.CharField(max_length=100)
+
+
+def run():
+    for i in range(500):
+        author = Author.objects.create(name=f"author {i}")
+        Book.objects.create(author=author, title=f"book {i}")
+    for book in Book.objects.all():
+        book.author.name
+    for i in range(1000):
+        Author.objects.filter(name=f"author {i}").exists()
+""",
+    "heavy_printing": """
+def run():
+    for i in range(5000):
+        print("line", i, {"value": i})
+""",
+    "large_return": """
+from django.db import models
+
+
+class Row(models.Model):
+    name = models.CharField(max_length=100)
+    value = models.IntegerField()
+
+
+def run():
+    Row.objects.bulk_create(Row(name=f"row {i}", value=i) for i in range(5000))
+    return {"rows": list(Row.objects.values("id", "name", "value"))}
+""",
+}
+
+
+def run_scenario(executor_dir, code, repeat):
+    """bench_components' results for code, run in a scratch copy of executor_dir."""
+    with tempfile.TemporaryDirectory() as scratch:
+        workdir = Path(scratch, "executor")
+        shutil.copytree(
+            executor_dir,
+            workdir,
+            ignore=shutil.ignore_patterns("__pycache__", "db.sqlite3", "0*.py"),
+        )
+        (workdir / "app" / "models.py").write_text(code.strip() + "\n")
+        output = workdir / "bench.json"
+        subprocess.run(
+            [sys.executable, "manage.py", "bench_components", "--repeat", str(repeat), "--output", output],
+            cwd=workdir,
+            env={**os.environ, "DB_TYPE": "sqlite"},
+            check=True,
+        )
+        return json.loads(output.read_text())
+
+
+def run_suite(executor_dir, scenarios, repeat):
+    results = {}
+    for name in scenarios:
+        print(f"  {name}", file=sys.stderr)
+        results[name] = run_scenario(executor_dir, SCENARIOS[name], repeat)
+    return results
+
+
+def components(result):
+    return [name for name in result if name != "counts"]
+
+
+def print_results(columns):
+    """Print one table per scenario, with a column per revision."""
+    labels = list(columns)
+    first = columns[labels[0]]
+    for scenario in first:
+        queries = first[scenario]["counts"]["queries"]
+        print(f"\n{scenario} ({queries} queries)")
+        print(f"  {'':<20}" + "".join(f"{label[:24]:>26}" for label in labels))
+        for component in components(first[scenario]):
+            cells = []
+            for label in labels:
+                measured = columns[label].get(scenario, {}).get(component)
+                if measured is None:
+                    cells.append(f"{'-':>26}")
+                    continue
+                cell = f"{measured['median'] * 1000:9.1f}ms {measured['peak_bytes'] / 2**20:7.1f}MiB"
+                base = first[scenario][component]["median"]
+                if label != labels[0] and base:
+                    cell += f" {(measured['median'] - base) / base:+4.0%}"
+                cells.append(f"{cell:>26}")
+            print(f"  {component:<20}" + "".join(cells))
+
+
+def git(*args, cwd):
+    return subprocess.run(["git", *args], cwd=cwd, check=True, capture_output=True, text=True).stdout.strip()
+
+
+def measure_revision(revision, scenarios, repeat):
+    """Results for the executor as of revision, or the working tree for "."."""
+    if revision == ".":
+        return run_suite(HERE, scenarios, repeat)
+
+    root = Path(git("rev-parse", "--show-toplevel", cwd=HERE))
+    executor = HERE.relative_to(root)
+    with tempfile.TemporaryDirectory() as scratch:
+        worktree = Path(scratch, "tree")
+        git("worktree", "add", "--detach", str(worktree), revision, cwd=root)
+        try:
+            shutil.copy(HERE / COMMAND, worktree / executor / COMMAND)
+            return run_suite(worktree / executor, scenarios, repeat)
+        finally:
+            git("worktree", "remove", "--force", str(worktree), cwd=root)
+
+
+def command_run(args):
+    results = run_suite(HERE, args.scenarios, args.repeat)
+    print_results({"this tree": results})
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=1)
+
+
+def command_compare(args):
+    columns = {}
+    for revision in args.revisions:
+        print(f"{revision}:", file=sys.stderr)
+        columns[revision] = measure_revision(revision, args.scenarios, args.repeat)
+    print_results(columns)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(required=True)
+
+    run = commands.add_parser("run", help="Benchmark this tree")
+    run.set_defaults(func=command_run)
+    run.add_argument("--save", help="Write the results to this JSON file")
+
+    compare = commands.add_parser("compare", help="Benchmark git revisions side by side")
+    compare.set_defaults(func=command_compare)
+    compare.add_argument("revisions", nargs="+", help='Revisions to compare, "." for the working tree')
+
+    for command in (run, compare):
+        command.add_argument(
+            "--scenario",
+            dest="scenarios",
+            action="append",
+            choices=SCENARIOS,
+            help="Run only this scenario (repeatable)",
+        )
+        command.add_argument("--repeat", type=int, default=3, help="Timed runs per component")
+
+    args = parser.parse_args()
+    args.scenarios = args.scenarios or list(SCENARIOS)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
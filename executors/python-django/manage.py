@@ -2,8 +2,13 @@
 import os
 import sys
 
+from app.memory import MemoryMonitor
 from app.thread_locals import thread_locals
-from app.utils import LineAwarePrintCapture
+from app.utils import LineAwarePrintCapture, NondeterminismTracker, PhaseTimer
+
+# Started first thing, so the boot phase covers importing Django too.
+thread_locals.timer = PhaseTimer()
+
 # Why? Because we're using test client in the snippets
 # which resets the queries and closes old connections
 # which won't allow us to capture _everything_ that
@@ -35,6 +40,10 @@ if __name__ == "__main__":
             )
         raise
     if len(sys.argv) > 1 and sys.argv[1] == "run_snippet":
+        thread_locals.memory = MemoryMonitor(trace=bool(os.environ.get("MEMORY")))
+        thread_locals.memory.start()
         thread_locals.print_capture = LineAwarePrintCapture()
         thread_locals.print_capture.patch()
+        thread_locals.nondeterminism = NondeterminismTracker()
+        thread_locals.nondeterminism.patch()
     execute_from_command_line(sys.argv)
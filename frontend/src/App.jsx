@@ -14,6 +14,7 @@ import AboutPage from './components/Pages/AboutPage';
 import BrowsePage from './components/Pages/BrowsePage';
 import PrivacyPage from './components/Pages/PrivacyPage';
 import { fetchConfig, fetchSnippet, fetchJourneys, fetchJourneyChapter } from './lib/api';
+import { showResponse } from './hooks/useExecute';
 
 // Home page component (editor)
 function HomePage() {
@@ -58,7 +59,10 @@ function SnippetPage() {
         const snippet = await fetchSnippet(slug);
         dispatch({ type: 'LOAD_SNIPPET', payload: snippet });
         snippetLoadedRef.current = true;
-        if (shouldRun) {
+        if (snippet.result) {
+          // Saved along with the result of its last run, no need to run it
+          showResponse(dispatch, snippet.result);
+        } else if (shouldRun) {
           dispatch({ type: 'SET_SHOULD_AUTO_RUN', payload: true });
         }
         dispatch({ type: 'FOCUS_EDITOR', payload: true });
@@ -108,7 +112,11 @@ function SnippetRunPage() {
         const snippet = await fetchSnippet(slug);
         dispatch({ type: 'LOAD_SNIPPET', payload: snippet });
         snippetLoadedRef.current = true;
-        dispatch({ type: 'SET_SHOULD_AUTO_RUN', payload: true });
+        if (snippet.result) {
+          showResponse(dispatch, snippet.result);
+        } else {
+          dispatch({ type: 'SET_SHOULD_AUTO_RUN', payload: true });
+        }
         dispatch({ type: 'FOCUS_EDITOR', payload: true });
       } catch (err) {
         console.error('Failed to load snippet:', err);
@@ -0,0 +1,72 @@
+import React from 'react';
+import { useAppState } from '../../context/AppContext';
+import { Collapsible } from '../common';
+import { InfoIcon } from '../icons';
+
+function Finding({ lineNumber, title, detail, sql }) {
+  return (
+    <li className="py-2 border-b border-theme-border last:border-b-0">
+      <div className="flex items-baseline gap-2 text-sm text-theme-text">
+        {lineNumber && (
+          <span className="text-xs font-mono text-django-primary dark:text-django-secondary">
+            L{lineNumber}
+          </span>
+        )}
+        <span className="font-medium">{title}</span>
+      </div>
+      <p className="text-xs text-theme-text-secondary">{detail}</p>
+      <p className="text-xs font-mono text-theme-text-muted truncate">{sql}</p>
+    </li>
+  );
+}
+
+function AnalysisSection() {
+  const state = useAppState();
+  const { n_plus_one: nPlusOne = [], duplicates = [] } = state.analysis || {};
+
+  if (nPlusOne.length === 0 && duplicates.length === 0) {
+    return null;
+  }
+
+  return (
+    <Collapsible
+      title={
+        <span className="flex items-center gap-2 font-bold text-theme-text">
+          <InfoIcon size={18} />
+          Query Analysis ({nPlusOne.length + duplicates.length})
+        </span>
+      }
+      defaultOpen={true}
+      className=""
+      headerClassName="h-10 px-3 bg-results-header border-b border-theme-border"
+      contentClassName=""
+    >
+      <ul className="px-3">
+        {nPlusOne.map((finding, index) => (
+          <Finding
+            key={`n-plus-one-${index}`}
+            lineNumber={finding.line_number}
+            title={`N+1: ${finding.count} queries on ${finding.table || 'the same table'}`}
+            detail={`${finding.suggestion}() would save ${finding.saved_queries} ${
+              finding.saved_queries === 1 ? 'query' : 'queries'
+            } (${finding.saved_time}s)`}
+            sql={finding.template}
+          />
+        ))}
+        {duplicates.map((finding, index) => (
+          <Finding
+            key={`duplicate-${index}`}
+            lineNumber={finding.line_numbers[0]}
+            title={`Duplicate: run ${finding.count} times`}
+            detail={`Reusing the first result would save ${finding.saved_queries} ${
+              finding.saved_queries === 1 ? 'query' : 'queries'
+            } (${finding.saved_time}s)`}
+            sql={finding.sql}
+          />
+        ))}
+      </ul>
+    </Collapsible>
+  );
+}
+
+export default AnalysisSection;
@@ -0,0 +1,71 @@
+import React from 'react';
+import { useAppState } from '../../context/AppContext';
+import { Collapsible } from '../common';
+import { ListIcon } from '../icons';
+
+const COLUMNS = [
+  ['iterations', 'Runs'],
+  ['min', 'Min ms'],
+  ['median', 'Median ms'],
+  ['p95', 'p95 ms'],
+  ['queries', 'Queries'],
+  ['rows_written', 'Rows written'],
+  ['rows_read', 'Rows read'],
+];
+
+function BenchmarkSection() {
+  const state = useAppState();
+  const entries = Object.entries(state.benchmarkResults || {});
+
+  if (entries.length === 0) {
+    return null;
+  }
+
+  return (
+    <Collapsible
+      title={
+        <span className="flex items-center gap-2 font-bold text-theme-text">
+          <ListIcon size={18} />
+          Benchmark
+        </span>
+      }
+      defaultOpen={true}
+      className=""
+      headerClassName="h-10 px-3 bg-results-header border-b border-theme-border"
+      contentClassName=""
+    >
+      <div className="p-3 overflow-auto">
+        <table className="w-full text-sm font-mono">
+          <thead>
+            <tr className="text-xs text-theme-text-muted">
+              <th className="text-left pr-3 py-0.5">Function</th>
+              {COLUMNS.map(([key, label]) => (
+                <th key={key} className="text-right pl-3 py-0.5 whitespace-nowrap">{label}</th>
+              ))}
+            </tr>
+          </thead>
+          <tbody>
+            {entries.map(([name, stats]) => (
+              <tr key={name} className="text-theme-text">
+                <td className="pr-3 py-0.5 whitespace-nowrap">{name}</td>
+                {stats.error ? (
+                  <td colSpan={COLUMNS.length} className="pl-3 py-0.5 text-red-700 dark:text-red-300">
+                    {stats.error}
+                  </td>
+                ) : (
+                  COLUMNS.map(([key]) => (
+                    <td key={key} className="text-right pl-3 py-0.5 text-theme-text-secondary">
+                      {stats[key]}
+                    </td>
+                  ))
+                )}
+              </tr>
+            ))}
+          </tbody>
+        </table>
+      </div>
+    </Collapsible>
+  );
+}
+
+export default BenchmarkSection;
@@ -0,0 +1,61 @@
+import React from 'react';
+import { useAppState } from '../../context/AppContext';
+import { Collapsible } from '../common';
+import { ListIcon } from '../icons';
+
+function megabytes(kb) {
+  return `${(kb / 1024).toFixed(1)} MB`;
+}
+
+function MemorySection() {
+  const state = useAppState();
+  const memory = state.memoryResult;
+  const lines = memory?.growth_by_line || [];
+
+  if (lines.length === 0) {
+    return null;
+  }
+
+  const largest = Math.max(...lines.map((line) => line.size_kb), 1);
+
+  return (
+    <Collapsible
+      title={
+        <span className="flex items-center gap-2 font-bold text-theme-text">
+          <ListIcon size={18} />
+          Memory
+        </span>
+      }
+      defaultOpen={true}
+      className=""
+      headerClassName="h-10 px-3 bg-results-header border-b border-theme-border"
+      contentClassName=""
+    >
+      <div className="p-3 overflow-auto space-y-2">
+        <p className="text-xs text-theme-text-muted">
+          Peak {megabytes(memory.peak_rss_kb)} resident, {megabytes(memory.traced_peak_kb)} allocated by Python
+        </p>
+        <table className="w-full text-sm font-mono">
+          <tbody>
+            {lines.map((line) => (
+              <tr key={line.line_number}>
+                <td className="pr-3 py-0.5 text-theme-text whitespace-nowrap">Line {line.line_number}</td>
+                <td className="w-full py-0.5">
+                  <div
+                    className="h-2 rounded bg-django-secondary/60"
+                    style={{ width: `${(line.size_kb / largest) * 100}%` }}
+                  />
+                </td>
+                <td className="pl-3 py-0.5 text-right text-theme-text-secondary whitespace-nowrap">
+                  {megabytes(line.size_kb)}
+                </td>
+              </tr>
+            ))}
+          </tbody>
+        </table>
+      </div>
+    </Collapsible>
+  );
+}
+
+export default MemorySection;
@@ -0,0 +1,71 @@
+import React, { useMemo } from 'react';
+import { useAppState } from '../../context/AppContext';
+import { Collapsible, CopyButton } from '../common';
+import { ListIcon } from '../icons';
+
+// How many of the functions with the most self time to list.
+const TOP_FUNCTIONS = 15;
+
+/**
+ * Add up the weight of each collapsed stack's leaf, the function that was
+ * running when it was sampled.
+ */
+function selfTimes(stacks) {
+  const totals = new Map();
+  stacks.split('\n').forEach((line) => {
+    const split = line.lastIndexOf(' ');
+    if (split < 0) return;
+    const frames = line.slice(0, split).split(';');
+    const leaf = frames[frames.length - 1];
+    totals.set(leaf, (totals.get(leaf) || 0) + Number(line.slice(split + 1)));
+  });
+  return [...totals.entries()].sort((a, b) => b[1] - a[1]).slice(0, TOP_FUNCTIONS);
+}
+
+function ProfileSection() {
+  const state = useAppState();
+  const profile = state.profileResult;
+  const functions = useMemo(() => selfTimes(profile?.stacks || ''), [profile]);
+
+  if (!profile || functions.length === 0) {
+    return null;
+  }
+
+  return (
+    <Collapsible
+      title={
+        <span className="flex items-center gap-2 font-bold text-theme-text">
+          <ListIcon size={18} />
+          Profile
+        </span>
+      }
+      defaultOpen={true}
+      className=""
+      headerClassName="h-10 px-3 bg-results-header border-b border-theme-border"
+      contentClassName=""
+      rightContent={
+        <CopyButton text={profile.stacks} size={16} label="Copy collapsed stacks for a flame graph" />
+      }
+    >
+      <div className="p-3 overflow-auto">
+        <table className="w-full text-sm font-mono">
+          <tbody>
+            {functions.map(([name, us]) => (
+              <tr key={name} className="text-theme-text">
+                <td className="pr-3 py-0.5 truncate max-w-0 w-full" title={name}>{name}</td>
+                <td className="pl-3 py-0.5 text-right text-theme-text-secondary whitespace-nowrap">
+                  {(us / 1000).toFixed(1)} ms
+                </td>
+                <td className="pl-3 py-0.5 text-right text-theme-text-muted whitespace-nowrap">
+                  {((us / profile.total_us) * 100).toFixed(0)}%
+                </td>
+              </tr>
+            ))}
+          </tbody>
+        </table>
+      </div>
+    </Collapsible>
+  );
+}
+
+export default ProfileSection;
@@ -91,6 +91,14 @@ function QueryItem({ query, index, isHighlighted }) {
               </code>
             </div>
           )}
+          {query.plan && (
+            <div className="mt-2 pt-2 border-t border-theme-border">
+              <span className="text-xs text-theme-text-muted">Plan:</span>
+              <pre className="mt-1 whitespace-pre overflow-auto text-xs font-mono text-theme-text">
+                {query.plan}
+              </pre>
+            </div>
+          )}
         </div>
       </Collapsible>
     </div>
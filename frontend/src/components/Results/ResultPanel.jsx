@@ -1,8 +1,13 @@
 import React from 'react';
 import { useAppState, useAppDispatch } from '../../context/AppContext';
+import AnalysisSection from './AnalysisSection';
+import BenchmarkSection from './BenchmarkSection';
+import MemorySection from './MemorySection';
 import OutputSection from './OutputSection';
+import ProfileSection from './ProfileSection';
 import QueriesSection from './QueriesSection';
 import ReturnedData from './ReturnedData';
+import TimingsSection from './TimingsSection';
 import { SpinnerIcon } from '../icons';
 
 function ResultPanel() {
@@ -64,8 +69,23 @@ function ResultPanel() {
       {/* Queries section */}
       {state.rawQueries.length > 0 && <QueriesSection />}
 
+      {/* N+1 and duplicate query findings */}
+      {state.analysis && <AnalysisSection />}
+
+      {/* Repeated timings of the bench_* functions */}
+      {state.benchmarkResults && <BenchmarkSection />}
+
+      {/* Sampled stacks of run() */}
+      {state.profileResult && <ProfileSection />}
+
+      {/* Memory run() used, and the lines it grew on */}
+      {state.memoryResult?.growth_by_line && <MemorySection />}
+
       {/* Returned data tables */}
       {state.returnedData && <ReturnedData data={state.returnedData} />}
+
+      {/* Timing breakdown */}
+      {state.showTimings && state.timings && <TimingsSection />}
     </div>
   );
 }
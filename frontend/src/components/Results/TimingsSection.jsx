@@ -0,0 +1,67 @@
+import React from 'react';
+import { useAppState } from '../../context/AppContext';
+import { Collapsible } from '../common';
+import { ListIcon } from '../icons';
+
+function TimingRows({ label, timings }) {
+  const entries = Object.entries(timings || {});
+  if (entries.length === 0) {
+    return null;
+  }
+
+  const longest = Math.max(...entries.map(([, ms]) => ms), 1);
+
+  return (
+    <div>
+      <h4 className="text-xs font-semibold uppercase text-theme-text-muted mb-1">{label}</h4>
+      <table className="w-full text-sm font-mono">
+        <tbody>
+          {entries.map(([phase, ms]) => (
+            <tr key={phase}>
+              <td className="pr-3 py-0.5 text-theme-text whitespace-nowrap">{phase}</td>
+              <td className="w-full py-0.5">
+                <div
+                  className="h-2 rounded bg-django-secondary/60"
+                  style={{ width: `${(ms / longest) * 100}%` }}
+                />
+              </td>
+              <td className="pl-3 py-0.5 text-right text-theme-text-secondary whitespace-nowrap">
+                {ms.toFixed(1)} ms
+              </td>
+            </tr>
+          ))}
+        </tbody>
+      </table>
+    </div>
+  );
+}
+
+function TimingsSection() {
+  const state = useAppState();
+
+  if (!state.timings) {
+    return null;
+  }
+
+  return (
+    <Collapsible
+      title={
+        <span className="flex items-center gap-2 font-bold text-theme-text">
+          <ListIcon size={18} />
+          Timings
+        </span>
+      }
+      defaultOpen={true}
+      className=""
+      headerClassName="h-10 px-3 bg-results-header border-b border-theme-border"
+      contentClassName=""
+    >
+      <div className="p-3 space-y-3">
+        <TimingRows label="Backend" timings={state.timings.backend} />
+        <TimingRows label="Executor" timings={state.timings.executor} />
+      </div>
+    </Collapsible>
+  );
+}
+
+export default TimingsSection;
@@ -131,6 +131,74 @@ function SettingsPanel() {
           </p>
         </div>
 
+        {/* Query plans */}
+        <div>
+          <label className="block text-sm font-medium text-gray-700 dark:text-gray-300 mb-2">
+            Query Plans
+          </label>
+          <Select
+            value={state.explain}
+            onChange={(value) => dispatch({ type: 'SET_EXPLAIN', payload: value })}
+            options={[
+              { value: 'off', label: 'Off' },
+              { value: 'plan', label: 'EXPLAIN' },
+              { value: 'analyze', label: 'EXPLAIN ANALYZE' },
+            ]}
+            placeholder="Select query plans..."
+          />
+          <p className="mt-1 text-xs text-gray-500 dark:text-gray-400">
+            Show the plan of each distinct SELECT under its query
+          </p>
+        </div>
+
+        {/* Benchmark checkbox */}
+        <div>
+          <Checkbox
+            checked={state.benchmark}
+            onChange={(checked) => dispatch({ type: 'SET_BENCHMARK', payload: checked })}
+            label="Benchmark"
+          />
+          <p className="mt-1 text-xs text-gray-500 dark:text-gray-400 ml-7">
+            Time each bench_* function (or run) over repeated, rolled back iterations
+          </p>
+        </div>
+
+        {/* Profile checkbox */}
+        <div>
+          <Checkbox
+            checked={state.profile}
+            onChange={(checked) => dispatch({ type: 'SET_PROFILE', payload: checked })}
+            label="Profile"
+          />
+          <p className="mt-1 text-xs text-gray-500 dark:text-gray-400 ml-7">
+            Sample where run() spends its Python time
+          </p>
+        </div>
+
+        {/* Memory checkbox */}
+        <div>
+          <Checkbox
+            checked={state.memory}
+            onChange={(checked) => dispatch({ type: 'SET_MEMORY', payload: checked })}
+            label="Memory"
+          />
+          <p className="mt-1 text-xs text-gray-500 dark:text-gray-400 ml-7">
+            Trace the lines of run() memory grows on
+          </p>
+        </div>
+
+        {/* Timings checkbox */}
+        <div>
+          <Checkbox
+            checked={state.showTimings}
+            onChange={(checked) => dispatch({ type: 'SET_SHOW_TIMINGS', payload: checked })}
+            label="Show timings"
+          />
+          <p className="mt-1 text-xs text-gray-500 dark:text-gray-400 ml-7">
+            Break down where each run spent its time
+          </p>
+        </div>
+
         {/* GitHub ref info */}
         {state.currentRefInfo && (
           <div className="bg-theme-surface border border-theme-border rounded-lg p-3">
@@ -40,16 +40,27 @@ def run():
   rawOutput: '',
   rawQueries: [],
   returnedData: null,
+  analysis: null,
+  benchmarkResults: null,
+  profileResult: null,
+  memoryResult: null,
   erdLink: null,
+  erdDigest: null,
   htmlTemplate: null,
   error: null,
+  timings: null,
 
   // Settings
   database: 'sqlite',
   ormVersion: 'django-6.1',
   ignoreCache: false,
+  explain: 'off', // 'off', 'plan' or 'analyze'
+  benchmark: false,
+  profile: false,
+  memory: false,
   currentRefInfo: null,
   editorMode: 'default', // 'default' or 'vim'
+  showTimings: false,
 
   // Snippet ownership
   currentSlug: null,
@@ -90,7 +101,8 @@ function loadPersistedState() {
     const themeMode = localStorage.getItem('themeMode') || 'system';
     const zenMode = localStorage.getItem('zenMode') === 'true';
     const editorMode = localStorage.getItem('editorMode') || 'default';
-    return { themeMode, zenMode, editorMode };
+    const showTimings = localStorage.getItem('showTimings') === 'true';
+    return { themeMode, zenMode, editorMode, showTimings };
   } catch {
     return {};
   }
@@ -104,6 +116,8 @@ const actions = {
   SET_EDITOR_VIEW: 'SET_EDITOR_VIEW',
   SET_RESULTS: 'SET_RESULTS',
   SET_ERROR: 'SET_ERROR',
+  SET_TIMINGS: 'SET_TIMINGS',
+  SET_ERD_LINK: 'SET_ERD_LINK',
   CLEAR_RESULTS: 'CLEAR_RESULTS',
   TOGGLE_SETTINGS: 'TOGGLE_SETTINGS',
   TOGGLE_JOURNEY_NAV: 'TOGGLE_JOURNEY_NAV',
@@ -117,7 +131,12 @@ const actions = {
   SET_DATABASE: 'SET_DATABASE',
   SET_ORM_VERSION: 'SET_ORM_VERSION',
   SET_IGNORE_CACHE: 'SET_IGNORE_CACHE',
+  SET_EXPLAIN: 'SET_EXPLAIN',
+  SET_BENCHMARK: 'SET_BENCHMARK',
+  SET_PROFILE: 'SET_PROFILE',
+  SET_MEMORY: 'SET_MEMORY',
   SET_EDITOR_MODE: 'SET_EDITOR_MODE',
+  SET_SHOW_TIMINGS: 'SET_SHOW_TIMINGS',
   SET_CURRENT_REF: 'SET_CURRENT_REF',
   CLEAR_CURRENT_REF: 'CLEAR_CURRENT_REF',
   SET_QUERY_FILTER: 'SET_QUERY_FILTER',
@@ -161,24 +180,45 @@ function appReducer(state, action) {
         rawOutput: action.payload.output || '',
         rawQueries: action.payload.queries || [],
         returnedData: action.payload.returnedData || null,
+        analysis: action.payload.analysis || null,
+        benchmarkResults: action.payload.benchmarkResults || null,
+        profileResult: action.payload.profileResult || null,
+        memoryResult: action.payload.memoryResult || null,
         erdLink: action.payload.erdLink || null,
+        erdDigest: action.payload.erdDigest || null,
         htmlTemplate: action.payload.htmlTemplate || null,
         error: null,
       };
 
+    case actions.SET_ERD_LINK:
+      // Only for the results that asked for it, not ones shown since.
+      if (action.payload.digest !== state.erdDigest) {
+        return state;
+      }
+      return { ...state, erdLink: action.payload.erdLink };
+
     case actions.SET_ERROR:
       return { ...state, error: action.payload };
 
+    case actions.SET_TIMINGS:
+      return { ...state, timings: action.payload };
+
     case actions.CLEAR_RESULTS:
       return {
         ...state,
         rawOutput: '',
         rawQueries: [],
         returnedData: null,
+        analysis: null,
+        benchmarkResults: null,
+        profileResult: null,
+        memoryResult: null,
         erdLink: null,
+        erdDigest: null,
         htmlTemplate: null,
         showHtmlPreview: false,
         error: null,
+        timings: null,
         lineToQueryMap: new Map(),
         lineToOutputMap: new Map(),
         lineToErrorMap: new Map(),
@@ -230,6 +270,18 @@ function appReducer(state, action) {
     case actions.SET_IGNORE_CACHE:
       return { ...state, ignoreCache: action.payload };
 
+    case actions.SET_EXPLAIN:
+      return { ...state, explain: action.payload };
+
+    case actions.SET_BENCHMARK:
+      return { ...state, benchmark: action.payload };
+
+    case actions.SET_PROFILE:
+      return { ...state, profile: action.payload };
+
+    case actions.SET_MEMORY:
+      return { ...state, memory: action.payload };
+
     case actions.SET_EDITOR_MODE: {
       const newEditorMode = action.payload;
       try {
@@ -238,6 +290,14 @@ function appReducer(state, action) {
       return { ...state, editorMode: newEditorMode };
     }
 
+    case actions.SET_SHOW_TIMINGS: {
+      const newShowTimings = action.payload;
+      try {
+        localStorage.setItem('showTimings', newShowTimings);
+      } catch {}
+      return { ...state, showTimings: newShowTimings };
+    }
+
     case actions.SET_CURRENT_REF:
       return { ...state, currentRefInfo: action.payload };
 
@@ -1,6 +1,6 @@
 import { useCallback, useEffect, useRef } from 'react';
 import { useAppState, useAppDispatch } from '../context/AppContext';
-import { execute as executeApi } from '../lib/api';
+import { execute as executeApi, fetchBlob } from '../lib/api';
 import { isMobile } from '../lib/utils';
 
 /**
@@ -25,6 +25,121 @@ function parseErrorLineNumber(errorMessage) {
   return { lineNumber: null, message: errorMessage };
 }
 
+/**
+ * Describe the memory sample an OOM-killed run came back with
+ */
+function describeMemory(memory) {
+  const mb = (kb) => `${(kb / 1024).toFixed(1)} MB`;
+  const lines = [];
+  if (memory.peak_rss_kb) {
+    lines.push(`Peak memory: ${mb(memory.peak_rss_kb)} (limit ${memory.limit})`);
+  }
+  (memory.growth_by_line || []).slice(0, 3).forEach((line) => {
+    lines.push(`Line ${line.line_number}: grew ${mb(line.size_kb)}`);
+  });
+  return lines.join('\n');
+}
+
+/**
+ * Show an /execute response: the results of a finished run, or its error.
+ * Also used for the stored result a saved snippet is loaded with.
+ */
+export function showResponse(dispatch, response) {
+  dispatch({ type: 'SET_TIMINGS', payload: response.timings || null });
+
+  if (response.event === 'job-done') {
+    const result = response.result || {};
+
+    // Build line to query map
+    const lineToQueryMap = new Map();
+    if (result.queries) {
+      result.queries.forEach((query, index) => {
+        const lineNumber = query.line_number;
+        if (lineNumber !== undefined && lineNumber !== null) {
+          if (!lineToQueryMap.has(lineNumber)) {
+            lineToQueryMap.set(lineNumber, []);
+          }
+          lineToQueryMap.get(lineNumber).push({ ...query, index });
+        }
+      });
+    }
+
+    // Build line to output map
+    const lineToOutputMap = new Map();
+    if (result.outputs) {
+      result.outputs.forEach((output, index) => {
+        const lineNumber = output.line_number;
+        if (lineNumber !== undefined && lineNumber !== null) {
+          if (!lineToOutputMap.has(lineNumber)) {
+            lineToOutputMap.set(lineNumber, []);
+          }
+          lineToOutputMap.get(lineNumber).push({ ...output, index });
+        }
+      });
+    }
+
+    // Handle returned data - can be a string (HTML template) or object (data)
+    let returnedData = null;
+    let htmlTemplate = null;
+    if (typeof result.returned === 'string') {
+      htmlTemplate = result.returned;
+    } else if (result.returned) {
+      returnedData = result.returned;
+    }
+
+    dispatch({
+      type: 'SET_RESULTS',
+      payload: {
+        output: result.output || '',
+        queries: result.queries || [],
+        returnedData,
+        analysis: result.analysis || null,
+        benchmarkResults: result.benchmark || null,
+        profileResult: result.profile || null,
+        memoryResult: result.memory || null,
+        erdLink: result.erd || null,
+        erdDigest: response.blobs?.erd || null,
+        htmlTemplate,
+      },
+    });
+
+    // A large ERD comes as a digest, loaded from the browser cache if seen before.
+    const erdDigest = response.blobs?.erd;
+    if (erdDigest) {
+      fetchBlob(erdDigest)
+        .then((erdLink) => dispatch({ type: 'SET_ERD_LINK', payload: { digest: erdDigest, erdLink } }))
+        .catch(() => {});
+    }
+
+    dispatch({ type: 'SET_LINE_QUERY_MAP', payload: lineToQueryMap });
+    dispatch({ type: 'SET_LINE_OUTPUT_MAP', payload: lineToOutputMap });
+
+    // Auto-open HTML preview dialog when template is returned
+    if (htmlTemplate) {
+      dispatch({ type: 'TOGGLE_HTML_PREVIEW' });
+    }
+  } else if (response.error) {
+    // Handle error responses (job-code-error, job-internal-error, etc.)
+    let errorText = response.error || 'An error occurred';
+    if (response.memory) {
+      errorText += `\n\n${describeMemory(response.memory)}`;
+    }
+    const { lineNumber, message } = parseErrorLineNumber(errorText);
+
+    // Build line to error map if we found a line number
+    const lineToErrorMap = new Map();
+    if (lineNumber !== null) {
+      lineToErrorMap.set(lineNumber, [{ error: message, line_number: lineNumber }]);
+    }
+
+    dispatch({ type: 'SET_LINE_ERROR_MAP', payload: lineToErrorMap });
+    dispatch({
+      type: 'SET_ERROR',
+      payload: errorText,
+    });
+  }
+}
+
 /**
  * Hook for executing code
  */
@@ -52,6 +167,19 @@ export function useExecute() {
         ignore_cache: state.ignoreCache || forceRefresh,
       };
 
+      if (state.explain !== 'off') {
+        payload.explain = state.explain;
+      }
+      if (state.benchmark) {
+        payload.benchmark = true;
+      }
+      if (state.profile) {
+        payload.profile = true;
+      }
+      if (state.memory) {
+        payload.memory = true;
+      }
+
       // Add ref info if present
       if (state.currentRefInfo) {
         payload.ref_type = state.currentRefInfo.type;
@@ -61,86 +189,11 @@ export function useExecute() {
 
       const response = await executeApi(payload);
 
-      // Handle different response types
-      if (response.event === 'job-done') {
-        const result = response.result || {};
-
-        // Build line to query map
-        const lineToQueryMap = new Map();
-        if (result.queries) {
-          result.queries.forEach((query, index) => {
-            const lineNumber = query.line_number;
-            if (lineNumber !== undefined && lineNumber !== null) {
-              if (!lineToQueryMap.has(lineNumber)) {
-                lineToQueryMap.set(lineNumber, []);
-              }
-              lineToQueryMap.get(lineNumber).push({ ...query, index });
-            }
-          });
-        }
-
-        // Build line to output map
-        const lineToOutputMap = new Map();
-        if (result.outputs) {
-          result.outputs.forEach((output, index) => {
-            const lineNumber = output.line_number;
-            if (lineNumber !== undefined && lineNumber !== null) {
-              if (!lineToOutputMap.has(lineNumber)) {
-                lineToOutputMap.set(lineNumber, []);
-              }
-              lineToOutputMap.get(lineNumber).push({ ...output, index });
-            }
-          });
-        }
-
-        // Handle returned data - can be a string (HTML template) or object (data)
-        let returnedData = null;
-        let htmlTemplate = null;
-        if (typeof result.returned === 'string') {
-          htmlTemplate = result.returned;
-        } else if (result.returned) {
-          returnedData = result.returned;
-        }
-
-        dispatch({
-          type: 'SET_RESULTS',
-          payload: {
-            output: result.output || '',
-            queries: result.queries || [],
-            returnedData,
-            erdLink: result.erd || null,
-            htmlTemplate,
-          },
-        });
-
-        dispatch({ type: 'SET_LINE_QUERY_MAP', payload: lineToQueryMap });
-        dispatch({ type: 'SET_LINE_OUTPUT_MAP', payload: lineToOutputMap });
-
-        // Auto-open HTML preview dialog when template is returned
-        if (htmlTemplate) {
-          dispatch({ type: 'TOGGLE_HTML_PREVIEW' });
-        }
-
-        // Auto-switch to result tab on mobile
-        if (isMobile()) {
-          dispatch({ type: 'SET_SHOW_RESULT', payload: true });
-        }
-      } else if (response.error) {
-        // Handle error responses (job-code-error, job-internal-error, etc.)
-        const errorText = response.error || 'An error occurred';
-        const { lineNumber, message } = parseErrorLineNumber(errorText);
-
-        // Build line to error map if we found a line number
-        const lineToErrorMap = new Map();
-        if (lineNumber !== null) {
-          lineToErrorMap.set(lineNumber, [{ error: message, line_number: lineNumber }]);
-        }
+      showResponse(dispatch, response);
 
-        dispatch({ type: 'SET_LINE_ERROR_MAP', payload: lineToErrorMap });
-        dispatch({
-          type: 'SET_ERROR',
-          payload: errorText,
-        });
+      // Auto-switch to result tab on mobile
+      if (response.event === 'job-done' && isMobile()) {
+        dispatch({ type: 'SET_SHOW_RESULT', payload: true });
       }
     } catch (err) {
       const errorText = err.message || 'Failed to execute code';
@@ -160,7 +213,7 @@ export function useExecute() {
     } finally {
       dispatch({ type: 'SET_LOADING', payload: false });
     }
-  }, [state.code, state.database, state.ormVersion, state.ignoreCache, state.currentRefInfo, dispatch]);
+  }, [state.code, state.database, state.ormVersion, state.ignoreCache, state.explain, state.benchmark, state.profile, state.memory, state.currentRefInfo, dispatch]);
 
   // Keep ref updated for event handler
   executeRef.current = execute;
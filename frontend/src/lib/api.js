@@ -66,6 +66,14 @@ export async function fetchSnippet(slug) {
   return apiFetch(`/api/snippet/${slug}`);
 }
 
+/**
+ * Fetch one content-addressed part of a result by its digest. The response
+ * never changes, so the browser answers repeats from its cache.
+ */
+export async function fetchBlob(digest) {
+  return apiFetch(`/api/blob/${digest}`);
+}
+
 /**
  * Execute code
  */
@@ -119,6 +127,7 @@ export async function fetchJourneyChapter(slug, chapter) {
 export default {
   fetchConfig,
   fetchSnippet,
+  fetchBlob,
   execute,
   saveSnippet,
   searchRefs,
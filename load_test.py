@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+"""Load and latency benchmark for a running DryORM stack.
+
+Replays a mix of the snippets real visitors run against /execute: templates
+and journey chapters (as fetched from the stack itself), the sample snippet
+shipped with the executor, recorded /execute payloads, and fresh code that
+is bound to miss the result cache. Requests are sent either by a fixed
+number of clients, each waiting for its previous response, or at a fixed
+arrival rate regardless of how fast the stack answers.
+
+It reports latency percentiles, throughput, the mix of JOB_* events and the
+per-phase timings every reply carries. Runs can be saved as JSON and
+compared with each other. Only the standard library is used, and only the
+stack's own URL is contacted.
+
+    python load_test.py run --concurrency 8 --requests 200 --save before.json
+    python load_test.py run --rate 2 --duration 60 --mix journey=1,miss=1
+    python load_test.py compare before.json after.json
+"""
+
+import argparse
+import json
+import math
+import random
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+SAMPLE_PATH = Path(__file__).parent / "executors" / "python-django" / "samples.txt"
+
+DEFAULT_MIX = "template=4,journey=4,sample=1,recorded=1,miss=1"
+
+PERCENTILES = (50, 90, 99)
+
+
+def get_json(url):
+    with urllib.request.urlopen(url, timeout=30) as response:
+        return json.load(response)
+
+
+def load_sources(url, recorded_path):
+    """The code each kind of request draws from, as a kind -> [payload] map.
+
+    Payloads carry code and, for recorded ones, whatever else they were sent
+    with. miss draws from every other kind and makes the code unique.
+    """
+    config = get_json(f"{url}/api/config")
+    sources = {
+        "template": [
+            {"code": template["code"]}
+            for group in config["templates"].values()
+            for template in group
+        ],
+        "journey": [
+            {"code": chapter["content"]}
+            for journey in get_json(f"{url}/api/journeys").values()
+            for chapter in journey["chapters"]
+        ],
+        "sample": [{"code": SAMPLE_PATH.read_text()}] if SAMPLE_PATH.exists() else [],
+        "recorded": [],
+    }
+    if recorded_path:
+        with open(recorded_path) as f:
+            sources["recorded"] = [json.loads(line) for line in f if line.strip()]
+    sources["miss"] = [payload for kind in list(sources) for payload in sources[kind]]
+    return sources
+
+
+def parse_mix(text, sources):
+    """Turn "kind=weight,..." into kinds and weights, dropping empty kinds."""
+    kinds, weights = [], []
+    for part in text.split(","):
+        kind, _, weight = part.partition("=")
+        kind = kind.strip()
+        if kind not in sources:
+            raise SystemExit(f"Unknown kind in --mix: {kind}")
+        if sources[kind] and float(weight or 1) > 0:
+            kinds.append(kind)
+            weights.append(float(weight or 1))
+    if not kinds:
+        raise SystemExit("Nothing to send: every kind in --mix is empty")
+    return kinds, weights
+
+
+class Traffic:
+    """Picks the next request to send, reproducibly for a given seed."""
+
+    def __init__(self, sources, mix, databases, orm_version, seed):
+        self.sources = sources
+        self.kinds, self.weights = parse_mix(mix, sources)
+        self.databases = databases
+        self.orm_version = orm_version
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+
+    def next(self):
+        with self.lock:
+            kind = self.random.choices(self.kinds, self.weights)[0]
+            payload = dict(self.random.choice(self.sources[kind]))
+            database = self.random.choice(self.databases)
+        payload.setdefault("database", database)
+        payload.setdefault("orm_version", self.orm_version)
+        payload["code"] = payload["code"].strip()
+        if kind == "miss":
+            payload["code"] = f"# {uuid.uuid4().hex}\n{payload['code']}"
+        return kind, payload
+
+
+def execute(url, payload, timeout):
+    """POST one payload to /execute and return what happened to it."""
+    request = urllib.request.Request(
+        f"{url}/execute",
+        data=json.dumps(payload).encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+        method="POST",
+    )
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            status, body = response.status, response.read()
+    except urllib.error.HTTPError as e:
+        status, body = e.code, e.read()
+    except (urllib.error.URLError, TimeoutError, ConnectionError) as e:
+        return {"latency": time.perf_counter() - started, "status": None, "event": f"client-error: {e}"}
+    latency = time.perf_counter() - started
+
+    try:
+        reply = json.loads(body)
+    except ValueError:
+        reply = {}
+    timings = reply.get("timings") or {}
+    backend = timings.get("backend") or {}
+    return {
+        "latency": latency,
+        "status": status,
+        "event": reply.get("event", f"http-{status}"),
+        # A cache hit ends at admission, so it never reaches the run stage.
+        "cache": ("miss" if "run" in backend else "hit") if backend else None,
+        "timings": timings,
+    }
+
+
+def run_closed(traffic, send, concurrency, count, deadline):
+    """concurrency clients, each sending its next request on a response."""
+    records = []
+    in_flight = [0]
+    lock = threading.Lock()
+
+    def client():
+        while time.monotonic() < deadline:
+            with lock:
+                if count is not None and len(records) + in_flight[0] >= count:
+                    return
+                in_flight[0] += 1
+            record = send(*traffic.next())
+            with lock:
+                in_flight[0] -= 1
+                records.append(record)
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return records
+
+
+def run_open(traffic, send, rate, count, deadline, max_in_flight):
+    """Requests arriving at rate per second, Poisson distributed."""
+    futures = []
+    with ThreadPoolExecutor(max_workers=max_in_flight) as pool:
+        next_at = time.monotonic()
+        while time.monotonic() < deadline and (count is None or len(futures) < count):
+            time.sleep(max(0.0, next_at - time.monotonic()))
+            futures.append(pool.submit(send, *traffic.next()))
+            next_at += traffic.random.expovariate(rate)
+    return [future.result() for future in futures]
+
+
+def percentiles(values):
+    if not values:
+        return None
+    ordered = sorted(values)
+
+    def rank(p):
+        return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+    summary = {f"p{p}": rank(p) for p in PERCENTILES}
+    summary["mean"] = sum(ordered) / len(ordered)
+    summary["max"] = ordered[-1]
+    return summary
+
+
+def summarize(records, elapsed):
+    by_cache = defaultdict(list)
+    by_kind = defaultdict(list)
+    phases = defaultdict(list)
+    for record in records:
+        by_cache[record.get("cache") or "unknown"].append(record["latency"])
+        by_kind[record["kind"]].append(record["latency"])
+        for source, timings in (record.get("timings") or {}).items():
+            for phase, ms in timings.items():
+                phases[f"{source}.{phase}"].append(ms / 1000)
+
+    return {
+        "requests": len(records),
+        "elapsed": elapsed,
+        "throughput": len(records) / elapsed if elapsed else 0.0,
+        "latency": percentiles([r["latency"] for r in records]),
+        "latency_by_cache": {key: percentiles(values) for key, values in sorted(by_cache.items())},
+        "latency_by_kind": {key: percentiles(values) for key, values in sorted(by_kind.items())},
+        "events": dict(Counter(r["event"] for r in records).most_common()),
+        "phases": {key: percentiles(values) for key, values in sorted(phases.items())},
+    }
+
+
+def format_latency(summary):
+    if not summary:
+        return "-"
+    return "  ".join(f"{key} {summary[key] * 1000:8.1f}ms" for key in ("p50", "p90", "p99", "max"))
+
+
+def print_summary(summary):
+    print(f"{summary['requests']} requests in {summary['elapsed']:.1f}s, "
+          f"{summary['throughput']:.2f} req/s")
+    print(f"\n{'latency':<28} {format_latency(summary['latency'])}")
+    for title, group in (("cache", summary["latency_by_cache"]), ("kind", summary["latency_by_kind"])):
+        for key, latency in group.items():
+            print(f"  {title} {key:<21} {format_latency(latency)}")
+
+    print("\nevents")
+    for event, count in summary["events"].items():
+        print(f"  {event:<26} {count:6d}  {count / summary['requests']:6.1%}")
+
+    if summary["phases"]:
+        print("\nphases")
+        for phase, latency in summary["phases"].items():
+            print(f"  {phase:<26} {format_latency(latency)}")
+
+
+def command_run(args):
+    url = args.url.rstrip("/")
+    sources = load_sources(url, args.recorded)
+    traffic = Traffic(
+        sources, args.mix, args.databases.split(","), args.orm_version, args.seed
+    )
+    count = args.requests if args.duration is None else None
+    deadline = time.monotonic() + (args.duration or float("inf"))
+
+    def send(kind, payload):
+        record = execute(url, {**payload, "ignore_cache": args.ignore_cache}, args.timeout)
+        record["kind"] = kind
+        if args.verbose:
+            print(f"{record['latency'] * 1000:8.1f}ms  {record['event']:<26} {kind}", file=sys.stderr)
+        return record
+
+    started = time.monotonic()
+    if args.rate:
+        records = run_open(traffic, send, args.rate, count, deadline, args.max_in_flight)
+    else:
+        records = run_closed(traffic, send, args.concurrency, count, deadline)
+    summary = summarize(records, time.monotonic() - started)
+    print_summary(summary)
+
+    if args.save:
+        config = {key: value for key, value in vars(args).items() if key != "func"}
+        with open(args.save, "w") as f:
+            json.dump({"config": config, "summary": summary, "records": records}, f, indent=1)
+        print(f"\nSaved to {args.save}")
+
+
+def command_compare(args):
+    runs = []
+    for path in args.runs:
+        with open(path) as f:
+            runs.append(json.load(f)["summary"])
+
+    def row(label, values, unit="ms", scale=1000):
+        cells = []
+        for index, value in enumerate(values):
+            if value is None:
+                cells.append(f"{'-':>18}")
+                continue
+            cell = f"{value * scale:10.1f}{unit}"
+            if index and values[0]:
+                cell += f" {(value - values[0]) / values[0]:+6.0%}"
+            cells.append(f"{cell:>18}")
+        print(f"{label:<30}" + "".join(cells))
+
+    print(f"{'':<30}" + "".join(f"{Path(path).name[:17]:>18}" for path in args.runs))
+    row("throughput", [run["throughput"] for run in runs], unit="/s", scale=1)
+    for key in ("p50", "p90", "p99", "max"):
+        row(f"latency {key}", [run["latency"][key] if run["latency"] else None for run in runs])
+    for cache in sorted({key for run in runs for key in run["latency_by_cache"]}):
+        row(f"{cache} p90", [(run["latency_by_cache"].get(cache) or {}).get("p90") for run in runs])
+    for phase in sorted({key for run in runs for key in run["phases"]}):
+        row(f"{phase} p90", [(run["phases"].get(phase) or {}).get("p90") for run in runs])
+    for event in sorted({key for run in runs for key in run["events"]}):
+        row(
+            event,
+            [run["events"].get(event, 0) / run["requests"] if run["requests"] else None for run in runs],
+            unit="%",
+            scale=100,
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(required=True)
+
+    run = commands.add_parser("run", help="Send a traffic mix and report on it")
+    run.set_defaults(func=command_run)
+    run.add_argument("--url", default="http://localhost:8090", help="The stack to load")
+    load = run.add_mutually_exclusive_group()
+    load.add_argument("--concurrency", type=int, default=4, help="Clients sending back to back")
+    load.add_argument("--rate", type=float, help="Requests per second, whatever the response times")
+    run.add_argument("--max-in-flight", type=int, default=256, help="Open requests allowed with --rate")
+    stop = run.add_mutually_exclusive_group()
+    stop.add_argument("--requests", type=int, default=100, help="Requests to send")
+    stop.add_argument("--duration", type=float, help="Seconds to send for, instead of --requests")
+    run.add_argument("--mix", default=DEFAULT_MIX, help="Relative weight of each kind of request")
+    run.add_argument("--recorded", help="JSON lines of /execute payloads, for the recorded kind")
+    run.add_argument("--databases", default="sqlite", help="Comma-separated databases to spread requests over")
+    run.add_argument("--orm-version", default="django-6.1")
+    run.add_argument("--ignore-cache", action="store_true", help="Make every request run a container")
+    run.add_argument("--timeout", type=float, default=180, help="Seconds to wait for one response")
+    run.add_argument("--seed", type=int, default=0, help="Seed for picking requests")
+    run.add_argument("--save", help="Write the summary and every request to this JSON file")
+    run.add_argument("-v", "--verbose", action="store_true", help="Print each response as it arrives")
+
+    compare = commands.add_parser("compare", help="Compare saved runs against the first one")
+    compare.set_defaults(func=command_compare)
+    compare.add_argument("runs", nargs="+", help="Files written by run --save")
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()